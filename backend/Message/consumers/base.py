@@ -7,8 +7,10 @@ from django.conf import settings
 from channels.db import database_sync_to_async
 from .mixins.online import OnlineTrackerMixin
 from ..models import Conversation
+import logging
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class BaseConsumer(AsyncJsonWebsocketConsumer, OnlineTrackerMixin):
@@ -32,7 +34,7 @@ class BaseConsumer(AsyncJsonWebsocketConsumer, OnlineTrackerMixin):
             await self.mark_online()
             await self.broadcast_presence("online")
         except Exception as e:
-            print(f"Warning: Failed to broadcast presence: {e}")
+            logger.warning(f"Failed to broadcast presence: {e}")
 
     async def disconnect(self, close_code):
         if not self.user:
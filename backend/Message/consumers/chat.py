@@ -1,5 +1,7 @@
 from channels.db import database_sync_to_async
 
+from common.metrics import ConsumerMetricsMixin
+
 from .base import BaseConsumer
 from .mixins.auth import ConversationAuthMixin
 from .mixins.typing import TypingMixin
@@ -9,6 +11,7 @@ from ..models import Message
 
 
 class ChatConsumer(
+    ConsumerMetricsMixin,
     BaseConsumer,
     ConversationAuthMixin,
     TypingMixin,
@@ -4,6 +4,8 @@ from redis import Redis
 from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from common.metrics import ConsumerMetricsMixin
+
 logger = logging.getLogger(__name__)
 
 # Use REDIS_URL if available, otherwise fallback to local
@@ -42,7 +44,7 @@ class OnlineTrackerMixin:
         return [int(uid) for uid in users]
 
 
-class OnlineConsumer(AsyncJsonWebsocketConsumer):    
+class OnlineConsumer(ConsumerMetricsMixin, AsyncJsonWebsocketConsumer):    
     async def connect(self):
         from ..base import BaseConsumer
         
@@ -1,7 +1,5 @@
 class TypingMixin:
     async def handle_typing(self, conversation_id, user):
-        print("⌨️ user typing:", user.id)
-
         await self.channel_layer.group_send(
             f"chat_{conversation_id}",
             {
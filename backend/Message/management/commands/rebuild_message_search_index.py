@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from common.search import is_postgres
+from Message.models import Message
+from Message.search import MessageSearch
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the message search index in batches of primary keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help='Only index messages that have no search vector yet'
+        )
+
+    def handle(self, *args, **options):
+        if not is_postgres():
+            self.stdout.write("Message search vectors are only stored on PostgreSQL; nothing to do")
+            return
+
+        batch_size = options['batch_size']
+        queryset = Message.objects.order_by('pk')
+        if options['missing_only']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        indexed = 0
+        last_pk = 0
+        while True:
+            ids = list(
+                queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            MessageSearch.index(ids)
+            indexed += len(ids)
+            last_pk = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} messages"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Message', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'timestamp'], name='messages_sender__557813_idx'),
+        ),
+    ]
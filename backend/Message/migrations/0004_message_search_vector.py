@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:45
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_gin_index(apps, schema_editor):
+    # tsvector GIN indexes only exist on PostgreSQL; other backends use the
+    # column fallback in Message.search
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS messages_search_vector_gin "
+        "ON messages USING gin (search_vector)"
+    )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS messages_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Message', '0003_message_sender_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from Message.search import search_vector
+
+BATCH_SIZE = 5000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # Vectors are only stored on PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Message = apps.get_model('Message', 'Message')
+    queryset = Message.objects.filter(search_vector__isnull=True).order_by('pk')
+
+    last_pk = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        Message.objects.filter(pk__in=ids).update(search_vector=search_vector())
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Message', '0004_message_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ from group.models import StudyGroup
 from django.conf import settings
 from django.db.models import CheckConstraint, Q
 from cloudinary.models import CloudinaryField
+from django.contrib.postgres.search import SearchVectorField
 
 class ConversationManager(models.Manager):
     def get_or_create_individual(self, user1_id, user2_id):
@@ -115,12 +116,16 @@ class Message(models.Model):
     is_edited = models.BooleanField(default=False)
     edited_at = models.DateTimeField(blank=True, null=True)
     reply_to = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True, related_name='replies')
+
+    # Full-text index over content and file_name, see Message.search
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
     
     class Meta:
         db_table = 'messages'
         ordering = ['timestamp']
         indexes = [
             models.Index(fields=['conversation', 'timestamp']),
+            models.Index(fields=['sender', 'timestamp']),
         ]
     def __str__(self):
         return f"{self.sender.email}: {self.content[:50]}"
@@ -0,0 +1,117 @@
+"""
+Message search.
+
+Every message carries a tsvector over its content and file name, refreshed
+whenever either changes (see common.signals). On PostgreSQL the vector is
+GIN-indexed, so a search is an index lookup rather than a scan of the
+conversation history. Other databases fall back to term matching on the
+raw columns.
+
+Hits come with context cursors: `MessageSearch.context()` pages around a
+hit using the (conversation, timestamp) index.
+"""
+
+from django.contrib.postgres.search import SearchRank, SearchVector
+from django.db.models import Count, F, FloatField, Q, Value, Window
+
+from common.search import SEARCH_CONFIG, is_postgres, prefix_query, search_terms
+from .models import ConversationMember, Message
+
+
+def search_vector():
+    # Text weighs more than the attachment name
+    return (
+        SearchVector('content', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('file_name', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class MessageSearch:
+    INDEXED_FIELDS = {'content', 'file_name'}
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Indexing
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def needs_index(cls, created, update_fields):
+        return created or not update_fields or bool(cls.INDEXED_FIELDS & set(update_fields))
+
+    @staticmethod
+    def index(message_ids):
+        """Refresh the search vector of the given messages."""
+        if is_postgres():
+            Message.objects.filter(pk__in=message_ids).update(search_vector=search_vector())
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Querying
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def visible_conversation_ids(user):
+        return ConversationMember.objects.filter(user=user).values('conversation_id')
+
+    @classmethod
+    def search(cls, user, query, conversation_id=None, limit=20, offset=0):
+        """
+        Rank messages in the user's conversations against the query.
+        Returns (results, total) from a single SQL statement.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return [], 0
+
+        queryset = Message.objects.filter(
+            conversation_id__in=cls.visible_conversation_ids(user)
+        )
+        if conversation_id:
+            queryset = queryset.filter(conversation_id=conversation_id)
+
+        if is_postgres():
+            ts_query = prefix_query(terms)
+            queryset = queryset.filter(search_vector=ts_query).annotate(
+                rank=SearchRank(F('search_vector'), ts_query)
+            )
+        else:
+            for term in terms:
+                queryset = queryset.filter(
+                    Q(content__icontains=term) | Q(file_name__icontains=term)
+                )
+            queryset = queryset.annotate(rank=Value(1.0, output_field=FloatField()))
+
+        rows = list(
+            queryset.select_related('sender', 'conversation')
+            .annotate(search_total=Window(Count('pk')))
+            .order_by('-rank', '-timestamp', '-pk')[offset:offset + limit]
+        )
+        total = rows[0].search_total if rows else 0
+        return rows, total
+
+    @staticmethod
+    def context(message, before=10, after=10):
+        """
+        Return (older, newer, has_more_older, has_more_newer) around a message,
+        both lists in chronological order.
+        """
+        siblings = Message.objects.filter(
+            conversation_id=message.conversation_id
+        ).select_related('sender', 'conversation')
+
+        older = list(
+            siblings.filter(
+                Q(timestamp__lt=message.timestamp)
+                | Q(timestamp=message.timestamp, pk__lt=message.pk)
+            ).order_by('-timestamp', '-pk')[:before + 1]
+        )
+        newer = list(
+            siblings.filter(
+                Q(timestamp__gt=message.timestamp)
+                | Q(timestamp=message.timestamp, pk__gt=message.pk)
+            ).order_by('timestamp', 'pk')[:after + 1]
+        )
+        return (
+            older[:before][::-1],
+            newer[:after],
+            len(older) > before,
+            len(newer) > after,
+        )
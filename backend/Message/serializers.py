@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Message, Conversation, ConversationMember
 from group.models import GroupMember
@@ -6,6 +7,9 @@ from PIL import Image as PILImage
 from io import BytesIO
 import cloudinary.uploader 
 from urllib.parse import unquote
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -21,13 +25,24 @@ class ConversationListSerializer(serializers.ModelSerializer):
             'unread_count', 'members', 'updated_at'
         ]
 
+    @staticmethod
+    def members_prefetch():
+        """Prefetch for get_members, so listing conversations doesn't query per row."""
+        return Prefetch('members', queryset=ConversationMember.objects.select_related('user'))
+
     def get_unread_count(self, obj):
+        # Set on conversations loaded through the list views' annotation
+        if hasattr(obj, 'unread_count'):
+            return obj.unread_count
         user = self.context['request'].user
         # unread messages in this conversation for the user
         return obj.messages.filter(is_read=False).exclude(sender=user).count()
 
     def get_members(self, obj):
-        users = [m.user for m in obj.members.select_related('user').all()]
+        members = obj.members.all()
+        if 'members' not in getattr(obj, '_prefetched_objects_cache', {}):
+            members = members.select_related('user')
+        users = [m.user for m in members]
         return UserBasicSerializer(users, many=True).data
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -78,7 +93,7 @@ class ChatMessageSerializer(serializers.ModelSerializer):
             url, options = cloudinary.utils.cloudinary_url(file_value, resource_type=resource_type)
             return url
         except Exception as e:
-            print(f"Error building Cloudinary URL for '{file_value}': {e}")
+            logger.warning(f"Error building Cloudinary URL for '{file_value}': {e}")
             return file_value
 
     def get_file_info(self, obj):
@@ -231,6 +246,6 @@ class GroupConversationSerializer(serializers.ModelSerializer):
 
     def get_total_members(self, obj):
         if obj.group:
-            return obj.group.members.filter(is_active=True).count()
+            return obj.group.active_member_count
         return 0
 
@@ -1,3 +1,114 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import Conversation, ConversationMember, Message
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MessageSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.friend = User.objects.create_user(
+            email='friend@test.com',
+            username='friend',
+            password='password123'
+        )
+        self.stranger = User.objects.create_user(
+            email='stranger@test.com',
+            username='stranger',
+            password='password123'
+        )
+        self.conversation, _ = Conversation.objects.get_or_create_individual(
+            self.user.id, self.friend.id
+        )
+        self.other_conversation, _ = Conversation.objects.get_or_create_individual(
+            self.friend.id, self.stranger.id
+        )
+        self.url = reverse('message-search')
+        self.client.force_authenticate(user=self.user)
+
+    def _send(self, content, conversation=None, sender=None, **kwargs):
+        return Message.objects.create(
+            conversation=conversation or self.conversation,
+            sender=sender or self.friend,
+            content=content,
+            **kwargs
+        )
+
+    def test_search_is_scoped_to_user_conversations(self):
+        mine = self._send('Integration by parts tomorrow')
+        self._send('Integration homework', conversation=self.other_conversation)
+
+        response = self.client.get(self.url, {'q': 'integration'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], mine.id)
+
+    def test_search_matches_every_term_and_file_names(self):
+        self._send('Limits and series')
+        self._send('Only limits here')
+        attachment = self._send('', message_type='file', file_name='series_notes.pdf')
+
+        response = self.client.get(self.url, {'q': 'limits series'})
+        self.assertEqual(response.data['count'], 1)
+
+        response = self.client.get(self.url, {'q': 'notes'})
+        self.assertEqual([hit['id'] for hit in response.data['results']], [attachment.id])
+
+    def test_edits_are_reindexed(self):
+        message = self._send('Meet at the library')
+        message.content = 'Meet at the cafe'
+        message.save(update_fields=['content'])
+
+        self.assertEqual(self.client.get(self.url, {'q': 'library'}).data['count'], 0)
+        self.assertEqual(self.client.get(self.url, {'q': 'cafe'}).data['count'], 1)
+
+    def test_pagination_reports_total_and_next_offset(self):
+        for i in range(5):
+            self._send(f'Chapter {i} summary')
+
+        response = self.client.get(self.url, {'q': 'summary', 'limit': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['next_offset'], 2)
+
+        response = self.client.get(self.url, {'q': 'summary', 'limit': 2, 'offset': 4})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next_offset'])
+
+    def test_short_query_is_rejected(self):
+        response = self.client.get(self.url, {'q': 'a'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_context_cursor_returns_surrounding_messages(self):
+        messages = [self._send(f'Message {i}') for i in range(7)]
+        hit = self._send('Needle in the haystack')
+        later = [self._send(f'Reply {i}') for i in range(3)]
+
+        response = self.client.get(self.url, {'q': 'needle'})
+        cursor = response.data['results'][0]['context_cursor']
+
+        response = self.client.get(cursor, {'before': 5, 'after': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message']['id'], hit.id)
+        self.assertEqual(
+            [m['id'] for m in response.data['before']], [m.id for m in messages[-5:]]
+        )
+        self.assertEqual([m['id'] for m in response.data['after']], [m.id for m in later])
+        self.assertTrue(response.data['has_more_before'])
+        self.assertFalse(response.data['has_more_after'])
+
+    def test_context_is_not_available_outside_user_conversations(self):
+        message = self._send('Private', conversation=self.other_conversation)
+        response = self.client.get(reverse('message-context', args=[message.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
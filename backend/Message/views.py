@@ -1,13 +1,17 @@
 # messages/views.py
 
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.db.models import Q, Count, Max
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+import logging
 
 from .models import Message, Conversation, ConversationMember
+from .search import MessageSearch
 from group.models import StudyGroup, GroupMember
 from .serializers import (
     MessageCreateSerializer,
@@ -19,8 +23,23 @@ from .serializers import (
 
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from common.pagination import StreamingExportMixin
+from common.signals import conversation_members_bulk_created, messages_marked_read
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+CONTEXT_DEFAULT_SIZE = 10
+CONTEXT_MAX_SIZE = 50
+
+
+def _clamped_int(value, default, minimum, maximum):
+    try:
+        return min(max(int(value), minimum), maximum)
+    except (TypeError, ValueError):
+        return default
 
 
 class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
@@ -43,13 +62,18 @@ class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
             Conversation.objects.filter(
                 Q(members__user=user) | Q(group__members__user=user)
             )
+            .select_related('group')
+            .prefetch_related(ConversationListSerializer.members_prefetch())
             .distinct()
             .annotate(
+                # The membership joins repeat each message, so count it once
                 unread_count=Count(
                     'messages',
-                    filter=Q(messages__is_read=False) & ~Q(messages__sender=user)
+                    filter=Q(messages__is_read=False) & ~Q(messages__sender=user),
+                    distinct=True
                 ),
-                last_message_time=Max('messages__timestamp')
+                # Empty conversations sort by creation so cursors never hold NULL
+                last_message_time=Coalesce(Max('messages__timestamp'), 'created_at')
             )
             .order_by('-last_message_time')
         )
@@ -63,6 +87,7 @@ class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
                 type='individual',
                 members__user=user
             )
+            .prefetch_related(ConversationListSerializer.members_prefetch())
             .distinct()
             .annotate(
                 unread_count=Count(
@@ -86,6 +111,7 @@ class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
                 type='group',
                 group__members__user=user
             )
+            .select_related('group')
             .distinct()
             .annotate(
                 unread_count=Count(
@@ -141,25 +167,32 @@ class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
         )
 
         # Add group members as conversation members
-        members = GroupMember.objects.filter(group=group, is_active=True)
-        for member in members:
-            ConversationMember.objects.get_or_create(
-                conversation=conversation,
-                user=member.user
-            )
+        member_ids = list(
+            GroupMember.objects.filter(group=group, is_active=True).values_list('user_id', flat=True)
+        )
+        ConversationMember.objects.bulk_create(
+            [ConversationMember(conversation=conversation, user_id=user_id) for user_id in member_ids],
+            ignore_conflicts=True
+        )
+        conversation_members_bulk_created(member_ids)
 
         serializer = self.get_serializer(conversation)
         return Response(serializer.data, status=201)
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """
     Endpoints:
     - GET  /api/messages/?conversation_id=ID   → list messages
     - POST /api/messages/                      → send message
+    - GET  /api/messages/search/?q=...         → ranked search across the user's conversations
+    - GET  /api/messages/ID/context/           → messages surrounding a search hit
+    - GET  /api/messages/export/?conversation_id=ID → the whole history, streamed
     """
     queryset = Message.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    # Newest page first; clients follow `next` back through the history
+    cursor_ordering = '-timestamp'
 
     def get_serializer_class(self):
         return MessageCreateSerializer if self.action == "create" else ChatMessageSerializer
@@ -168,7 +201,9 @@ class MessageViewSet(viewsets.ModelViewSet):
         user = self.request.user
         conversation_id = self.request.query_params.get("conversation_id")
 
-        qs = Message.objects.filter(conversation__members__user=user)
+        qs = Message.objects.filter(
+            conversation__members__user=user
+        ).select_related('sender', 'conversation')
 
         if conversation_id:
             qs = qs.filter(conversation_id=conversation_id)
@@ -182,8 +217,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         room_name = f"chat_{message.conversation.id}"  
 
         payload = ChatMessageSerializer(message, context={'request': self.request}).data
-        print("authenticated user: ", self.request.user , self.request.user.is_authenticated)
-        
+
         async_to_sync(channel_layer.group_send)(
             room_name,
             {
@@ -201,19 +235,21 @@ class MessageViewSet(viewsets.ModelViewSet):
         if not conversation_id:
             return Response({"error": "conversation_id is required"}, status=400)
 
-        # Get the IDs of messages being marked as read
-        unread_ids = list(
+        # Get the IDs (and senders, for live counters) of messages being marked as read
+        unread = list(
             Message.objects.filter(
                 conversation_id=conversation_id,
                 is_read=False,
-            ).exclude(sender=request.user).values_list('id', flat=True)
+            ).exclude(sender=request.user).values_list('id', 'sender_id')
         )
+        unread_ids = [message_id for message_id, _ in unread]
 
         if not unread_ids:
             return Response({"marked": 0})
 
         # Update in DB
         updated = Message.objects.filter(id__in=unread_ids).update(is_read=True)
+        messages_marked_read(conversation_id, [sender_id for _, sender_id in unread])
 
         # Broadcast read receipt to the conversation via WebSocket
         try:
@@ -229,10 +265,75 @@ class MessageViewSet(viewsets.ModelViewSet):
             )
         except Exception as e:
             # Log but don't fail the request
-            print(f"Failed to broadcast read receipt: {e}")
+            logger.warning(f"Failed to broadcast read receipt: {e}")
 
         return Response({"marked": updated})
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Search messages in the conversations the user belongs to. Each hit
+        carries a context cursor for loading the messages around it.
+        """
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            return Response(
+                {"error": "Query parameter 'q' with at least 2 characters is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        conversation_id = request.query_params.get('conversation_id')
+        if conversation_id and not conversation_id.isdigit():
+            return Response({"error": "conversation_id must be an integer"}, status=400)
+
+        limit = _clamped_int(
+            request.query_params.get('limit'), SEARCH_DEFAULT_LIMIT, 1, SEARCH_MAX_LIMIT
+        )
+        offset = _clamped_int(request.query_params.get('offset'), 0, 0, 10_000)
+
+        messages, total = MessageSearch.search(
+            request.user, query,
+            conversation_id=conversation_id, limit=limit, offset=offset
+        )
+        data = ChatMessageSerializer(messages, many=True, context={'request': request}).data
+        for hit, message in zip(data, messages):
+            hit['rank'] = message.rank
+            hit['context_cursor'] = reverse('message-context', args=[message.pk])
+
+        next_offset = offset + limit
+        return Response({
+            "query": query,
+            "count": total,
+            "results": data,
+            "next_offset": next_offset if next_offset < total else None,
+        })
+
+    @action(detail=True, methods=['get'])
+    def context(self, request, pk=None):
+        """
+        Return up to `before` older and `after` newer messages around a message.
+        The first and last messages' context cursors continue in either direction.
+        """
+        message = self.get_object()
+        before = _clamped_int(
+            request.query_params.get('before'), CONTEXT_DEFAULT_SIZE, 0, CONTEXT_MAX_SIZE
+        )
+        after = _clamped_int(
+            request.query_params.get('after'), CONTEXT_DEFAULT_SIZE, 0, CONTEXT_MAX_SIZE
+        )
+
+        older, newer, has_more_before, has_more_after = MessageSearch.context(
+            message, before=before, after=after
+        )
+        serializer_context = {'request': request}
+        return Response({
+            "message": ChatMessageSerializer(message, context=serializer_context).data,
+            "before": ChatMessageSerializer(older, many=True, context=serializer_context).data,
+            "after": ChatMessageSerializer(newer, many=True, context=serializer_context).data,
+            "has_more_before": has_more_before,
+            "has_more_after": has_more_after,
+        })
+
 
 # Optional Template-Based HTML Chat View (if needed)
 def chat_room(request, conversation_id):
@@ -19,12 +19,15 @@ from jwt import decode as jwt_decode, InvalidTokenError
 from django.conf import settings
 
 from .models import Notification
+from common.snapshots import DashboardSnapshot
+from common.live_counters import LiveCounters
+from common.metrics import ConsumerMetricsMixin
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+class NotificationConsumer(ConsumerMetricsMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time notification delivery.
     
@@ -33,6 +36,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     - Personal notification channel per user
     - Delivers unread notifications on connect
     - Handles mark as read actions
+    - Pushes dashboard live counter deltas (see common.live_counters)
     """
     
     async def connect(self):
@@ -97,6 +101,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                     'count': count
                 }))
             
+            elif action == 'get_live_counters':
+                counters = await self._get_live_counters()
+                await self.send(text_data=json.dumps({
+                    'type': 'live_counters',
+                    'counters': counters
+                }))
+            
             elif action == 'get_unread_count':
                 count = await self._get_unread_count()
                 await self.send(text_data=json.dumps({
@@ -117,6 +128,15 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'notification': event['notification']
         }))
 
+    async def counters_update(self, event):
+        """Handle counters.update event: dashboard live counter deltas."""
+        await self.send(text_data=json.dumps({
+            'type': 'live_counters',
+            'delta': event['delta'],
+            'reset': event['reset'],
+            'timestamp': event['timestamp'],
+        }))
+
     # ─────────────────────────────────────────────────────────────────────────
     # Authentication
     # ─────────────────────────────────────────────────────────────────────────
@@ -212,9 +232,17 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         
         cache_key = f"unread_notifications_{self.user.id}"
         cache.set(cache_key, 0, timeout=3600)
+        # update() skips model signals, so refresh the dashboard explicitly
+        if count:
+            DashboardSnapshot.invalidate(self.user.id)
         
         return count
 
+    @database_sync_to_async
+    def _get_live_counters(self) -> dict:
+        """Get the dashboard live counters (seeded on first use)."""
+        return LiveCounters.get(self.user)
+
     @database_sync_to_async
     def _get_unread_count(self) -> int:
         """Get unread notification count."""
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Notifications', '0002_initial'),
+        ('Tasks', '0005_open_tasks_due_date_index'),
+        ('planner', '0002_remove_studysession_subject_studysession_study_group'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('message', 'New Message'), ('task', 'Task Assignment'), ('group', 'Group Update'), ('system', 'System Notification'), ('pomodoro_start', 'Pomodoro Started'), ('focus_end', 'Focus Session Ended'), ('break_start', 'Break Started'), ('break_end', 'Break Ended'), ('cycle_complete', 'Pomodoro Cycle Complete'), ('reminder', 'Reminder')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Reminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset_minutes', models.PositiveIntegerField()),
+                ('fire_at', models.DateTimeField()),
+                ('bucket', models.BigIntegerField()),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='planner.studysession')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='Tasks.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reminders',
+                'indexes': [models.Index(fields=['bucket'], name='reminders_bucket_3586e0_idx')],
+            },
+        ),
+    ]
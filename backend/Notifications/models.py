@@ -16,6 +16,7 @@ class Notification(models.Model):
         BREAK_START = 'break_start', 'Break Started'
         BREAK_END = 'break_end', 'Break Ended'
         CYCLE_COMPLETE = 'cycle_complete', 'Pomodoro Cycle Complete'
+        REMINDER = 'reminder', 'Reminder'
     
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -36,4 +37,41 @@ class Notification(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.user.email} - {self.title}"
\ No newline at end of file
+        return f"{self.user.email} - {self.title}"
+
+
+class Reminder(models.Model):
+    """
+    A pending reminder for a task due date or a study session start,
+    scheduled by Notifications.reminders. Rows are deleted once sent or
+    cancelled, so the table only ever holds pending reminders.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminders')
+    task = models.ForeignKey(
+        'Tasks.Task',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='reminders'
+    )
+    session = models.ForeignKey(
+        'planner.StudySession',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='reminders'
+    )
+    offset_minutes = models.PositiveIntegerField()
+    fire_at = models.DateTimeField()
+    # fire_at in whole scheduler buckets since the epoch
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'reminders'
+        indexes = [
+            models.Index(fields=['bucket']),
+        ]
+
+    def __str__(self):
+        target = self.task or self.session
+        return f"{self.user_id} - {target} @ {self.fire_at:%Y-%m-%d %H:%M}"
@@ -16,6 +16,7 @@ from django.core.cache import cache
 
 from .models import Notification
 from group.models import StudyGroup
+from common.snapshots import DashboardSnapshot
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -224,5 +225,8 @@ class NotificationService:
         # Clear cache
         cache_key = f"unread_notifications_{user.id}"
         cache.set(cache_key, 0, timeout=3600)
+        # update() skips model signals, so refresh the dashboard explicitly
+        if count:
+            DashboardSnapshot.invalidate(user.id)
         
         return count
@@ -0,0 +1,178 @@
+"""
+Reminder scheduling for task due dates and study session starts.
+
+Each reminder is a row keyed by the minute bucket it fires in. A tick
+reads only buckets up to the current one, and because sent reminders are
+deleted, that range holds nothing but due reminders. Rescheduling or
+completing a task, or cancelling a session, deletes its reminders by
+foreign key (a constant number of rows per object) before new ones are
+written.
+
+Offsets come from settings.REMINDER_OFFSET_MINUTES. The scheduler takes
+a `clock` callable so tests can drive it with a fake clock.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, Reminder
+from .notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OFFSET_MINUTES = {
+    'task': [24 * 60, 60],
+    'session': [60, 10],
+}
+
+
+def _describe_offset(minutes):
+    for unit, size in (('day', 24 * 60), ('hour', 60), ('minute', 1)):
+        if minutes % size == 0:
+            count = minutes // size
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+
+
+class ReminderScheduler:
+    BUCKET_SECONDS = 60
+    TICK_BATCH_SIZE = 1000
+
+    def __init__(self, clock=timezone.now):
+        self.clock = clock
+
+    @classmethod
+    def bucket_for(cls, when):
+        return int(when.timestamp() // cls.BUCKET_SECONDS)
+
+    @staticmethod
+    def offsets(kind):
+        configured = getattr(settings, 'REMINDER_OFFSET_MINUTES', DEFAULT_OFFSET_MINUTES)
+        return configured.get(kind, DEFAULT_OFFSET_MINUTES[kind])
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Scheduling
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _build(self, user_ids, starts_at, kind, **target):
+        now = self.clock()
+        reminders = []
+        for minutes in self.offsets(kind):
+            fire_at = starts_at - timedelta(minutes=minutes)
+            if fire_at <= now:
+                continue  # Too late for this one
+            reminders.extend(
+                Reminder(
+                    user_id=user_id,
+                    offset_minutes=minutes,
+                    fire_at=fire_at,
+                    bucket=self.bucket_for(fire_at),
+                    **target
+                )
+                for user_id in user_ids if user_id
+            )
+        return reminders
+
+    def schedule_tasks(self, tasks):
+        """Replace the reminders of several tasks; open tasks get one per offset."""
+        from Tasks.models import Task
+
+        self.cancel_tasks([task.pk for task in tasks])
+        return Reminder.objects.bulk_create([
+            reminder
+            for task in tasks if task.status in Task.OPEN_STATUSES
+            for reminder in self._build([task.assigned_to_id], task.due_date, 'task', task=task)
+        ])
+
+    def schedule_task(self, task):
+        return self.schedule_tasks([task])
+
+    def schedule_session(self, session):
+        """Replace a session's reminders; scheduled sessions remind host and participant."""
+        self.cancel_session(session.pk)
+        if session.status != session.SessionStatus.SCHEDULED:
+            return []
+        return Reminder.objects.bulk_create(self._build(
+            {session.host_id, session.participant_id}, session.start_time, 'session',
+            session=session
+        ))
+
+    @staticmethod
+    def cancel_tasks(task_ids):
+        Reminder.objects.filter(task_id__in=task_ids).delete()
+
+    @staticmethod
+    def cancel_session(session_id):
+        Reminder.objects.filter(session_id=session_id).delete()
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Delivery
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _notification(reminder):
+        when = _describe_offset(reminder.offset_minutes)
+        if reminder.task_id:
+            task = reminder.task
+            return Notification(
+                user_id=reminder.user_id,
+                notification_type=Notification.NotificationTypes.REMINDER,
+                title=f"Reminder: {task.title}"[:200],
+                message=f"\"{task.title}\" is due in {when}.",
+                related_group_id=task.group_id,
+            )
+        session = reminder.session
+        return Notification(
+            user_id=reminder.user_id,
+            notification_type=Notification.NotificationTypes.REMINDER,
+            title=f"Reminder: {session.title}"[:200],
+            message=f"\"{session.title}\" starts in {when}.",
+            related_group_id=session.study_group_id,
+        )
+
+    def tick(self):
+        """Send every reminder that is due by the clock. Returns how many were sent."""
+        from common.signals import notifications_bulk_created
+
+        now = self.clock()
+        sent = 0
+        while True:
+            with transaction.atomic():
+                reminders = list(
+                    Reminder.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(bucket__lte=self.bucket_for(now), fire_at__lte=now)
+                    .select_related('user', 'task', 'session')
+                    .order_by('bucket')[:self.TICK_BATCH_SIZE]
+                )
+                if not reminders:
+                    break
+
+                notifications = Notification.objects.bulk_create(
+                    [self._notification(reminder) for reminder in reminders]
+                )
+                Reminder.objects.filter(pk__in=[r.pk for r in reminders]).delete()
+                notifications_bulk_created(notifications)
+
+                users = {reminder.user_id: reminder.user for reminder in reminders}
+
+                def _push(notifications=notifications, users=users):
+                    for notification in notifications:
+                        NotificationService.send_realtime_notification(
+                            users[notification.user_id], notification
+                        )
+
+                transaction.on_commit(_push)
+
+            sent += len(reminders)
+            if len(reminders) < self.TICK_BATCH_SIZE:
+                break
+
+        if sent:
+            logger.info(f"Sent {sent} reminders")
+        return sent
+
+
+reminders = ReminderScheduler()
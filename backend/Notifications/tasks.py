@@ -0,0 +1,11 @@
+from celery import shared_task
+import logging
+
+from .reminders import reminders
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def send_due_reminders():
+    return reminders.tick()
@@ -1,3 +1,128 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from group.models import StudyGroup
+from planner.models import StudySession
+from Tasks.models import Task
+from .models import Notification, Reminder
+from .reminders import ReminderScheduler
+
+User = get_user_model()
+
+
+class FakeClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+@override_settings(REMINDER_OFFSET_MINUTES={'task': [24 * 60, 60], 'session': [10]})
+class ReminderSchedulerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.friend = User.objects.create_user(
+            email='friend@test.com',
+            username='friend',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        self.clock = FakeClock(timezone.now())
+        self.scheduler = ReminderScheduler(clock=self.clock)
+
+    def _create_task(self, due_in, **kwargs):
+        return Task.objects.create(
+            title='Essay',
+            assigned_to=self.user,
+            created_by=self.user,
+            group=self.group,
+            due_date=self.clock.now + due_in,
+            **kwargs
+        )
+
+    def test_task_gets_one_reminder_per_future_offset(self):
+        task = self._create_task(timedelta(days=2))
+        self.assertEqual(
+            sorted(task.reminders.values_list('offset_minutes', flat=True)), [60, 24 * 60]
+        )
+
+        # The 24 hour reminder would already be in the past
+        soon = self._create_task(timedelta(hours=3))
+        self.assertEqual(list(soon.reminders.values_list('offset_minutes', flat=True)), [60])
+
+    def test_tick_sends_only_due_reminders(self):
+        self._create_task(timedelta(days=2))
+
+        self.assertEqual(self.scheduler.tick(), 0)
+
+        self.clock.advance(days=1, minutes=1)
+        self.assertEqual(self.scheduler.tick(), 1)
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.notification_type, 'reminder')
+        self.assertEqual(notification.message, '"Essay" is due in 1 day.')
+
+        # Sent reminders are gone, so the same tick sends nothing again
+        self.assertEqual(self.scheduler.tick(), 0)
+        self.assertEqual(Reminder.objects.count(), 1)
+
+    def test_reschedule_and_completion_replace_reminders(self):
+        task = self._create_task(timedelta(days=2))
+
+        task.due_date = self.clock.now + timedelta(days=5)
+        task.save()
+        fire_times = sorted(task.reminders.values_list('fire_at', flat=True))
+        self.assertEqual(fire_times[-1], task.due_date - timedelta(hours=1))
+
+        task.status = 'completed'
+        task.save()
+        self.assertFalse(task.reminders.exists())
+
+    def test_unrelated_task_edit_keeps_reminders(self):
+        task = self._create_task(timedelta(days=2))
+        reminder_ids = set(task.reminders.values_list('pk', flat=True))
+
+        task.description = 'Five paragraphs'
+        task.save()
+        self.assertEqual(set(task.reminders.values_list('pk', flat=True)), reminder_ids)
+
+    def test_session_reminds_host_and_participant_until_cancelled(self):
+        session = StudySession.objects.create(
+            title='Exam prep',
+            start_time=self.clock.now + timedelta(hours=2),
+            end_time=self.clock.now + timedelta(hours=3),
+            host=self.user,
+            participant=self.friend,
+        )
+        self.assertEqual(
+            set(session.reminders.values_list('user_id', flat=True)),
+            {self.user.id, self.friend.id}
+        )
+
+        self.clock.advance(hours=1, minutes=55)
+        self.assertEqual(self.scheduler.tick(), 2)
+        self.assertEqual(
+            Notification.objects.filter(notification_type='reminder').count(), 2
+        )
+
+        later = StudySession.objects.create(
+            title='Review',
+            start_time=self.clock.now + timedelta(hours=2),
+            end_time=self.clock.now + timedelta(hours=3),
+            host=self.user,
+        )
+        later.status = StudySession.SessionStatus.CANCELLED
+        later.save()
+        self.assertFalse(later.reminders.exists())
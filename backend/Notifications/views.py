@@ -1,7 +1,7 @@
 from django.shortcuts import render
 
 # Create your views here.
-from rest_framework import generics, status, pagination
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import Notification
@@ -11,18 +11,16 @@ from .serializers import NotificationSerializer, NotificationUpdateSerializer
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = pagination.PageNumberPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.filter(user=self.request.user).select_related('related_group')
 
 class UnreadNotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = pagination.PageNumberPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user, is_read=False)
+        return Notification.objects.filter(user=self.request.user, is_read=False).select_related('related_group')
 
 class NotificationMarkReadView(generics.UpdateAPIView):
     queryset = Notification.objects.all()
@@ -0,0 +1,140 @@
+"""
+Versioned cache for task list responses.
+
+A user's task list depends on the tasks assigned to or created by them and
+on the tasks of every group they are an active member of. Each of those
+scopes has a version number in the cache, and a list is cached under a key
+built from the user's version plus the versions of their groups. Task
+mutations bump the versions they touch (see common.signals), so old
+entries are never read again and simply expire. So do renames of a group
+and profile edits, whose names the rows embed. The fields measured
+against the current time (is_overdue, is_overdue_calculated,
+days_until_due) are recomputed on every read. That lets lists live for
+a day instead of a few minutes.
+
+Versions start from a nanosecond timestamp, so a version key that gets
+evicted never restarts at a number an older entry was stored under.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from group.models import GroupMember
+from .models import Task
+
+
+class TaskListCache:
+    CACHE_TTL = 60 * 60 * 24
+    # Versions must outlive every entry keyed by them
+    VERSION_TTL = CACHE_TTL * 7
+
+    @staticmethod
+    def user_version_key(user_id):
+        return f"task_list_version_user_{user_id}"
+
+    @staticmethod
+    def group_version_key(group_id):
+        return f"task_list_version_group_{group_id}"
+
+    @staticmethod
+    def groups_key(user_id, user_version):
+        return f"task_list_groups_{user_id}_{user_version}"
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Versions
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def _versions(cls, keys):
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                cache.add(key, time.time_ns(), timeout=cls.VERSION_TTL)
+                versions[key] = cache.get(key)
+        return versions
+
+    @classmethod
+    def _bump(cls, keys):
+        # After commit, so a concurrent read cannot cache the old rows
+        # under the new version
+        def _incr():
+            for key in keys:
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    pass  # Never read yet; the next read starts a fresh version
+
+        transaction.on_commit(_incr)
+
+    @classmethod
+    def bump_users(cls, user_ids):
+        cls._bump({cls.user_version_key(uid) for uid in user_ids if uid})
+
+    @classmethod
+    def bump_groups(cls, group_ids):
+        cls._bump({cls.group_version_key(gid) for gid in group_ids if gid})
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Entries
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def _group_ids(cls, user, user_version):
+        # Membership changes bump the user version, so this list is keyed by it
+        key = cls.groups_key(user.id, user_version)
+        group_ids = cache.get(key)
+        if group_ids is None:
+            group_ids = sorted(GroupMember.objects.filter(
+                user=user, is_active=True
+            ).values_list('group_id', flat=True))
+            cache.set(key, group_ids, timeout=cls.CACHE_TTL)
+        return group_ids
+
+    @classmethod
+    def cache_key(cls, user, query):
+        user_key = cls.user_version_key(user.id)
+        user_version = cls._versions([user_key])[user_key]
+
+        group_keys = [cls.group_version_key(gid) for gid in cls._group_ids(user, user_version)]
+        group_versions = cls._versions(group_keys)
+        digest = hashlib.md5(
+            ','.join(str(group_versions[key]) for key in group_keys).encode()
+        ).hexdigest()
+
+        return f"user_tasks_{user.id}_{user_version}_{digest}_{query}"
+
+    @classmethod
+    def get(cls, key):
+        data = cache.get(key)
+        if data is not None:
+            cls.refresh_relative_fields(data)
+        return data
+
+    @staticmethod
+    def refresh_relative_fields(data, now=None):
+        """Recompute, in place, the fields of task rows that depend on the current time."""
+        now = now or timezone.now()
+        duration = serializers.DurationField()
+        rows = data['results'] if isinstance(data, dict) else data
+        for row in rows:
+            due_date = parse_datetime(row['due_date']) if row.get('due_date') else None
+            past_due = due_date is not None and due_date < now
+            if 'is_overdue' in row:
+                row['is_overdue'] = past_due and row['status'] != Task.TaskStatus.completed
+            if 'is_overdue_calculated' in row:
+                row['is_overdue_calculated'] = row['status'] == Task.TaskStatus.overdue or (
+                    past_due and row['status'] in Task.OPEN_STATUSES
+                )
+            if 'days_until_due' in row:
+                row['days_until_due'] = duration.to_representation(due_date - now) if due_date else None
+        return data
+
+    @classmethod
+    def set(cls, key, data):
+        cache.set(key, data, timeout=cls.CACHE_TTL)
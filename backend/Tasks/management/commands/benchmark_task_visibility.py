@@ -0,0 +1,146 @@
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from group.models import GroupMember, StudyGroup
+from Tasks.models import Task
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic groups, members and tasks inside a transaction, compare '
+        'the plans and timings of the old OR + DISTINCT task visibility query '
+        'with Task.objects.visible_to(), and roll everything back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000)
+        parser.add_argument('--groups', type=int, default=10_000)
+        parser.add_argument('--users', type=int, default=20_000)
+        parser.add_argument('--members-per-group', type=int, default=8)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Benchmark data rolled back")
+
+    def _bulk_create(self, model, objects, batch_size, owner_filter):
+        created = model.objects.bulk_create(objects, batch_size=batch_size)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            created = list(model.objects.filter(**owner_filter).order_by('pk'))
+        return created
+
+    def _seed(self, options):
+        batch_size = options['batch_size']
+        rng = random.Random(42)
+        prefix = 'visibility-benchmark'
+
+        start = time.perf_counter()
+        users = self._bulk_create(User, [
+            User(email=f"{prefix}-{i}@example.com", username=f"{prefix}-{i}", password='!')
+            for i in range(options['users'])
+        ], batch_size, {'username__startswith': prefix})
+
+        groups = self._bulk_create(StudyGroup, [
+            StudyGroup(group_name=f"Benchmark group {i}", created_by=users[i % len(users)])
+            for i in range(options['groups'])
+        ], batch_size, {'group_name__startswith': 'Benchmark group '})
+
+        members = {}
+        membership_counts = Counter()
+        memberships = []
+        for group in groups:
+            picked = rng.sample(users, options['members_per_group'])
+            members[group.pk] = [user.pk for user in picked]
+            membership_counts.update(members[group.pk])
+            memberships.extend(
+                GroupMember(user=user, group=group, is_active=rng.random() > 0.1)
+                for user in picked
+            )
+        GroupMember.objects.bulk_create(memberships, batch_size=batch_size)
+        self.stdout.write(
+            f"Seeded {len(users)} users, {len(groups)} groups and "
+            f"{len(memberships)} memberships in {time.perf_counter() - start:.1f}s"
+        )
+
+        start = time.perf_counter()
+        now = timezone.now()
+        statuses = [choice for choice, _ in Task.TaskStatus.choices]
+        for offset in range(0, options['tasks'], batch_size):
+            batch = []
+            for _ in range(min(batch_size, options['tasks'] - offset)):
+                group = groups[rng.randrange(len(groups))]
+                group_members = members[group.pk]
+                batch.append(Task(
+                    title='Benchmark task',
+                    assigned_to_id=rng.choice(group_members),
+                    created_by_id=rng.choice(group_members),
+                    group=group,
+                    status=rng.choice(statuses),
+                    due_date=now + timedelta(hours=rng.randint(-720, 720)),
+                ))
+            Task.objects.bulk_create(batch)
+        self.stdout.write(f"Seeded {options['tasks']} tasks in {time.perf_counter() - start:.1f}s")
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for table in ('tasks', 'group_members', 'study_groups'):
+                    cursor.execute(f"ANALYZE {table}")
+
+        # The busiest member is the worst case for the visibility query
+        busiest_pk, _ = membership_counts.most_common(1)[0]
+        return User.objects.get(pk=busiest_pk)
+
+    def _time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            rows = list(queryset[:20])
+            timings.append((time.perf_counter() - begin) * 1000)
+        timings.sort()
+        return len(rows), statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+    def _run(self, options):
+        user = self._seed(options)
+
+        queries = {
+            'or + distinct': Task.objects.select_related(
+                'assigned_to', 'group', 'created_by'
+            ).filter(
+                Q(assigned_to=user)
+                | Q(group__members__user=user, group__members__is_active=True)
+                | Q(created_by=user)
+            ).distinct(),
+            'union visible_to': Task.objects.visible_to(user).select_related(
+                'assigned_to', 'group', 'created_by'
+            ),
+        }
+
+        explain_options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+        for label, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+            self.stdout.write(queryset[:20].explain(**explain_options))
+            count = queryset.count()
+            rows, p50, p95 = self._time(queryset, options['repeat'])
+            self.stdout.write(
+                f"visible={count} page={rows} p50={p50:.1f}ms p95={p95:.1f}ms"
+            )
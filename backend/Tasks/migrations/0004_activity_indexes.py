@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0003_delete_studysession'),
+        ('group', '0003_remove_groupmember_role'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studyresource',
+            index=models.Index(fields=['uploaded_by', 'uploaded_at'], name='study_resou_uploade_3b4dbd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'completed_at'], name='tasks_assigne_bf7804_idx'),
+        ),
+    ]
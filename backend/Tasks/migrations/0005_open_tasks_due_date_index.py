@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0004_activity_indexes'),
+        ('group', '0004_groupmember_active_groups_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_progress'])), fields=['due_date'], name='tasks_open_due_date_idx'),
+        ),
+    ]
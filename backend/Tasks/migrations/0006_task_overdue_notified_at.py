@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_swept_tasks_notified(apps, schema_editor):
+    # Tasks already swept were notified when they last changed
+    Task = apps.get_model('Tasks', 'Task')
+    Task.objects.filter(status='overdue').update(overdue_notified_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0005_open_tasks_due_date_index'),
+        ('group', '0007_group_ranking'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_open_due_date_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='overdue_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_swept_tasks_notified, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_progress']), models.Q(('overdue_notified_at__isnull', True), ('overdue_notified_at__lt', models.F('due_date')), _connector='OR')), fields=['due_date'], name='tasks_unnotified_due_date_idx'),
+        ),
+    ]
@@ -1,9 +1,29 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from group.models import StudyGroup
+from group.models import StudyGroup, GroupMember
 from django.utils import timezone
 User = get_user_model()
 
+class TaskManager(models.Manager):
+    def visible_to(self, user):
+        """
+        Tasks assigned to, created by, or in an active group of `user`.
+
+        Each arm is answered from its own index and the UNION dedupes task
+        ids only, instead of OR-ing over a join on group members and
+        running DISTINCT over whole task rows.
+        """
+        base = self.get_queryset().order_by()
+        visible_ids = base.filter(assigned_to=user).values('pk').union(
+            base.filter(created_by=user).values('pk'),
+            base.filter(
+                group_id__in=GroupMember.objects.filter(
+                    user=user, is_active=True
+                ).values('group_id')
+            ).values('pk'),
+        )
+        return self.get_queryset().filter(pk__in=visible_ids)
+
 class Task(models.Model):
     class PriorityLevels(models.TextChoices):
         low = 'low', 'Low'
@@ -26,19 +46,71 @@ class Task(models.Model):
     status = models.CharField(max_length=15, choices=TaskStatus.choices, default=TaskStatus.pending)
     due_date = models.DateTimeField()
     completed_at = models.DateTimeField(blank=True, null=True)
+    # When the sweeper last notified the assignee this task was overdue
+    overdue_notified_at = models.DateTimeField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskManager()
+
+    # Statuses the overdue sweeper moves to `overdue` once due_date passes
+    OPEN_STATUSES = ('pending', 'in_progress')
+
     class Meta:
         db_table = 'tasks'
         ordering = ['-due_date', 'priority']
         indexes = [
             models.Index(fields=['assigned_to', 'status']),
-            models.Index(fields=['group', 'due_date'])
-
+            models.Index(fields=['group', 'due_date']),
+            models.Index(fields=['assigned_to', 'completed_at']),
+            models.Index(
+                fields=['due_date'],
+                condition=models.Q(status__in=['pending', 'in_progress'])
+                & (
+                    models.Q(overdue_notified_at__isnull=True)
+                    | models.Q(overdue_notified_at__lt=models.F('due_date'))
+                ),
+                name='tasks_unnotified_due_date_idx',
+            ),
         ]
     def __str__(self):
         return self.title
+
+    @classmethod
+    def overdue_q(cls, now=None):
+        """
+        Tasks marked overdue, plus open tasks past their due date, whether
+        the sweeper hasn't reached them yet or they were started late.
+        """
+        return models.Q(status=cls.TaskStatus.overdue) | models.Q(
+            status__in=cls.OPEN_STATUSES, due_date__lt=now or timezone.now()
+        )
+
+    @classmethod
+    def sweepable_q(cls, now=None):
+        """
+        Open tasks past due whose assignee hasn't been told about the
+        current due date. A task started after it went overdue keeps its
+        marker and isn't swept again; moving the due date past the marker
+        makes it sweepable once the new date passes.
+        """
+        return models.Q(
+            status__in=cls.OPEN_STATUSES, due_date__lt=now or timezone.now()
+        ) & (
+            models.Q(overdue_notified_at__isnull=True)
+            | models.Q(overdue_notified_at__lt=models.F('due_date'))
+        )
+
+    @classmethod
+    def status_for_due_date(cls, status, due_date, now=None):
+        """
+        The status of a task rescheduled to `due_date` without an explicit
+        status: an overdue task whose due date moved into the future goes
+        back to pending.
+        """
+        if status == cls.TaskStatus.overdue and (due_date is None or due_date >= (now or timezone.now())):
+            return cls.TaskStatus.pending
+        return status
     
     @property
     def is_overdue(self):
@@ -65,6 +137,9 @@ class StudyResource(models.Model):
     class Meta:
         db_table = 'study_resources'
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['uploaded_by', 'uploaded_at']),
+        ]
     
     def __str__(self):
         return self.title
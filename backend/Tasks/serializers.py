@@ -31,6 +31,88 @@ class TaskCreateSerializer(serializers.ModelSerializer):
                 })
         return attrs
 
+BULK_MAX_TASKS = 500
+
+
+def active_memberships(group_ids, user_ids):
+    """(group_id, user_id) pairs of active memberships, fetched in one query."""
+    return set(GroupMember.objects.filter(
+        group_id__in=group_ids, user_id__in=user_ids, is_active=True
+    ).values_list('group_id', 'user_id'))
+
+
+class TaskBulkItemSerializer(serializers.ModelSerializer):
+    # Plain ids; TaskBulkCreateSerializer checks membership (and with it,
+    # existence) for the whole batch at once
+    assigned_to = serializers.IntegerField(source='assigned_to_id')
+    group = serializers.IntegerField(source='group_id')
+
+    class Meta:
+        model = Task
+        fields = ('title', 'description', 'assigned_to', 'group', 'priority', 'status', 'due_date')
+
+    def validate_due_date(self, value):
+        if value < timezone.now():
+            raise serializers.ValidationError('Due date cannot be in the past.')
+        return value
+
+
+class TaskBulkCreateSerializer(serializers.Serializer):
+    tasks = TaskBulkItemSerializer(many=True, allow_empty=False, max_length=BULK_MAX_TASKS)
+
+    def validate_tasks(self, tasks):
+        user = self.context['request'].user
+        memberships = active_memberships(
+            {task['group_id'] for task in tasks},
+            {task['assigned_to_id'] for task in tasks} | {user.id}
+        )
+
+        errors = []
+        for task in tasks:
+            if (task['group_id'], user.id) not in memberships:
+                errors.append({'group': "You must be a member of the group to create tasks in it."})
+            elif (task['group_id'], task['assigned_to_id']) not in memberships:
+                errors.append({'assigned_to': "User must be a member of the group to be assigned tasks."})
+            else:
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return tasks
+
+
+class TaskBulkUpdateItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField(max_length=200, required=False)
+    description = serializers.CharField(allow_blank=True, required=False)
+    priority = serializers.ChoiceField(choices=Task.PriorityLevels.choices, required=False)
+    status = serializers.ChoiceField(choices=Task.TaskStatus.choices, required=False)
+    due_date = serializers.DateTimeField(required=False)
+
+
+class TaskBulkUpdateSerializer(serializers.Serializer):
+    tasks = TaskBulkUpdateItemSerializer(many=True, allow_empty=False, max_length=BULK_MAX_TASKS)
+
+    def validate_tasks(self, tasks):
+        ids = [task['id'] for task in tasks]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each task may only appear once.")
+        return tasks
+
+
+class TaskBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BULK_MAX_TASKS
+    )
+    status = serializers.ChoiceField(choices=Task.TaskStatus.choices)
+
+
+class TaskBulkReassignSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BULK_MAX_TASKS
+    )
+    assigned_to = serializers.IntegerField()
+
+
 class TaskBasicSerializer(serializers.ModelSerializer):
     assigned_to = UserBasicSerializer(read_only=True)
     created_by = UserBasicSerializer(read_only=True)
@@ -60,6 +142,10 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
         fields = ('title', 'description', 'priority', 'status', 'due_date')
     
     def update(self, instance, validated_data):
+        if 'due_date' in validated_data and 'status' not in validated_data:
+            validated_data['status'] = Task.status_for_due_date(
+                instance.status, validated_data['due_date']
+            )
         if validated_data.get('status') =='completed' and instance.status != 'completed':
             validated_data['completed_at'] = timezone.now()
         elif validated_data.get('status') != 'completed':
@@ -0,0 +1,88 @@
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+import logging
+
+from common.signals import notifications_bulk_created, tasks_bulk_updated
+from Notifications.models import Notification
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+OVERDUE_BATCH_SIZE = 1000
+
+
+def _overdue_notifications(rows):
+    """One notification per assignee for the tasks that just went overdue."""
+    by_assignee = {}
+    for row in rows:
+        by_assignee.setdefault(row['assigned_to_id'], []).append(row)
+
+    notifications = []
+    for user_id, tasks in by_assignee.items():
+        if len(tasks) == 1:
+            title = f"Task overdue: {tasks[0]['title']}"
+            message = f"\"{tasks[0]['title']}\" is past its due date."
+            group_id = tasks[0]['group_id']
+        else:
+            title = f"{len(tasks)} tasks are overdue"
+            message = "Past their due date: " + ", ".join(task['title'] for task in tasks)
+            group_ids = {task['group_id'] for task in tasks}
+            group_id = group_ids.pop() if len(group_ids) == 1 else None
+        notifications.append(Notification(
+            user_id=user_id,
+            notification_type=Notification.NotificationTypes.TASK,
+            title=title[:200],
+            message=message,
+            related_group_id=group_id,
+        ))
+    return notifications
+
+
+@shared_task(ignore_result=True)
+def mark_overdue_tasks(batch_size=OVERDUE_BATCH_SIZE):
+    """
+    Move open tasks past their due date to `overdue`, one batch of ids per
+    transaction, and notify each assignee once per batch. A task is swept
+    once per due date (see Task.sweepable_q), read from the matching
+    partial index.
+    """
+    now = timezone.now()
+    marked = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(Task.sweepable_q(now))
+                .order_by('due_date')
+                .values('id', 'title', 'assigned_to_id', 'created_by_id', 'group_id', 'status')
+                [:batch_size]
+            )
+            if not rows:
+                break
+
+            Task.objects.filter(
+                pk__in=[row['id'] for row in rows]
+            ).update(
+                status=Task.TaskStatus.overdue, overdue_notified_at=now, updated_at=now
+            )
+            tasks_bulk_updated(
+                [
+                    (row['assigned_to_id'], row['created_by_id'], row['group_id'], row['status'])
+                    for row in rows
+                ],
+                Task.TaskStatus.overdue,
+                task_ids=[row['id'] for row in rows],
+            )
+
+            notifications = Notification.objects.bulk_create(_overdue_notifications(rows))
+            notifications_bulk_created(notifications)
+
+        marked += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    if marked:
+        logger.info(f"Marked {marked} tasks overdue")
+    return marked
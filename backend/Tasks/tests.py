@@ -1,3 +1,473 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from group.models import GroupMember, StudyGroup
+from Notifications.models import Notification
+from .models import Task
+
+User = get_user_model()
+
+
+def create_task(user, group, title='Task', due_in=timedelta(days=1), **fields):
+    """Create a task in `group` assigned to and created by `user`, due `due_in` from now."""
+    fields.setdefault('assigned_to', user)
+    fields.setdefault('created_by', user)
+    return Task.objects.create(
+        title=title, group=group, due_date=timezone.now() + due_in, **fields
+    )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskListCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.teammate = User.objects.create_user(
+            email='teammate@test.com',
+            username='teammate',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        GroupMember.objects.create(user=self.user, group=self.group)
+        GroupMember.objects.create(user=self.teammate, group=self.group)
+        self.url = reverse('task-list')
+        self.client.force_authenticate(user=self.user)
+
+    def _titles(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(task['title'] for task in response.data['results'])
+
+    def _post(self, url, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data or {})
+
+    def test_repeated_list_is_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_task(self.user, self.group, 'Homework 1')
+        self._titles()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._titles(), ['Homework 1'])
+
+    def test_cached_list_recomputes_time_relative_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = create_task(self.user, self.group, 'Homework 1')
+        self._titles()
+
+        with mock.patch('Tasks.cache.timezone.now', return_value=task.due_date + timedelta(hours=1)):
+            with self.assertNumQueries(0):  # still served from the cache
+                row = self.client.get(self.url).data['results'][0]
+        self.assertTrue(row['is_overdue'])
+        self.assertTrue(row['is_overdue_calculated'])
+        self.assertTrue(row['days_until_due'].startswith('-1 '))
+
+    def test_group_rename_and_profile_edit_invalidate_list(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_task(self.user, self.group, 'Homework 1', created_by=self.teammate)
+        self._titles()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.group_name = 'Linear algebra'
+            self.group.save()
+            self.teammate.username = 'teammate2'
+            self.teammate.save()
+
+        row = self.client.get(self.url).data['results'][0]
+        self.assertEqual(row['group_name'], 'Linear algebra')
+        self.assertEqual(row['created_by']['username'], 'teammate2')
+
+    def test_task_created_in_group_invalidates_member_lists(self):
+        self.assertEqual(self._titles(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_task(self.teammate, self.group, 'Team task')
+        self.assertEqual(self._titles(), ['Team task'])
+
+    def test_mark_complete_and_in_progress_invalidate_list(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = create_task(self.user, self.group, 'Homework 1')
+        self._titles()
+
+        response = self._post(reverse('task-mark-in-progress', args=[task.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url).data['results'][0]['status'], 'in_progress')
+
+        response = self._post(reverse('task-mark-complete', args=[task.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url).data['results'][0]['status'], 'completed')
+
+    def test_reassign_invalidates_new_assignee_list(self):
+        outsider_group = StudyGroup.objects.create(group_name='Physics', created_by=self.user)
+        GroupMember.objects.create(user=self.user, group=outsider_group)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = create_task(self.user, outsider_group, 'Lab report')
+
+        self.client.force_authenticate(user=self.teammate)
+        self.assertEqual(self._titles(), [])
+
+        GroupMember.objects.create(user=self.teammate, group=outsider_group)
+        self.client.force_authenticate(user=self.user)
+        response = self._post(
+            reverse('task-reassign', args=[task.id]), {'assigned_to': self.teammate.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.teammate)
+        self.assertEqual(self._titles(), ['Lab report'])
+
+    def test_joining_group_invalidates_list(self):
+        other_group = StudyGroup.objects.create(group_name='Physics', created_by=self.teammate)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_task(self.teammate, other_group, 'Physics task')
+        self.assertEqual(self._titles(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupMember.objects.create(user=self.user, group=other_group)
+        self.assertEqual(self._titles(), ['Physics task'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskVisibilityTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            email='other@test.com',
+            username='other',
+            password='password123'
+        )
+        self.member_group = StudyGroup.objects.create(group_name='Algebra', created_by=self.other)
+        self.left_group = StudyGroup.objects.create(group_name='Physics', created_by=self.other)
+        self.other_group = StudyGroup.objects.create(group_name='Biology', created_by=self.other)
+        GroupMember.objects.create(user=self.user, group=self.member_group)
+        GroupMember.objects.create(user=self.user, group=self.left_group, is_active=False)
+
+    def test_visible_to_unions_assigned_created_and_group_tasks(self):
+        create_task(self.other, self.other_group, 'Assigned', assigned_to=self.user)
+        create_task(self.other, self.other_group, 'Created', created_by=self.user)
+        create_task(self.other, self.member_group, 'Group')
+        # Matches all three arms, but must only appear once
+        create_task(self.user, self.member_group, 'Everything')
+        create_task(self.other, self.left_group, 'Left group')
+        create_task(self.other, self.other_group, 'Unrelated')
+
+        titles = list(Task.objects.visible_to(self.user).values_list('title', flat=True))
+        self.assertEqual(sorted(titles), ['Assigned', 'Created', 'Everything', 'Group'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskStatisticsTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.algebra = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        self.physics = StudyGroup.objects.create(group_name='Physics', created_by=self.user)
+        self.url = reverse('task-statistics')
+        self.client.force_authenticate(user=self.user)
+
+    def test_statistics_are_one_query_with_breakdowns(self):
+        create_task(self.user, self.algebra, due_in=timedelta(days=3), status='completed', priority='high')
+        create_task(self.user, self.algebra, due_in=timedelta(days=3), status='in_progress', priority='high')
+        create_task(self.user, self.algebra, due_in=timedelta(days=-2))
+        create_task(self.user, self.physics, due_in=timedelta(days=5), priority='low')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.data
+        self.assertEqual(data['total_tasks'], 4)
+        self.assertEqual(data['completed_tasks'], 1)
+        self.assertEqual(data['in_progress_tasks'], 1)
+        self.assertEqual(data['pending_tasks'], 2)
+        self.assertEqual(data['overdue_tasks'], 1)
+        self.assertEqual(data['completion_rate'], 25.0)
+
+        algebra, physics = data['by_group']
+        self.assertEqual((algebra['group_name'], algebra['total']), ('Algebra', 3))
+        self.assertEqual(algebra['completion_rate'], 33.33)
+        self.assertEqual((physics['group_name'], physics['total']), ('Physics', 1))
+
+        self.assertEqual(data['by_priority']['high']['total'], 2)
+        self.assertEqual(data['by_priority']['high']['completed'], 1)
+        self.assertEqual(data['by_priority']['urgent']['total'], 0)
+
+    def test_statistics_time_range_filters_by_due_date(self):
+        create_task(self.user, self.algebra, due_in=timedelta(days=1))
+        create_task(self.user, self.algebra, due_in=timedelta(days=10))
+
+        end = (timezone.now() + timedelta(days=2)).date().isoformat()
+        response = self.client.get(self.url, {'end': end})
+        self.assertEqual(response.data['total_tasks'], 1)
+
+        response = self.client.get(self.url, {'start': 'not-a-date'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class OverdueSweepTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            email='other@test.com',
+            username='other',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+
+    def test_sweep_marks_only_open_past_due_tasks(self):
+        from .tasks import mark_overdue_tasks
+
+        create_task(self.user, self.group, 'Late', timedelta(hours=-2))
+        create_task(self.user, self.group, 'Started', timedelta(hours=-1), status='in_progress')
+        create_task(self.user, self.group, 'Done', timedelta(hours=-3), status='completed')
+        create_task(self.user, self.group, 'Upcoming', timedelta(hours=5))
+
+        self.assertEqual(mark_overdue_tasks(batch_size=1), 2)
+
+        statuses = dict(Task.objects.values_list('title', 'status'))
+        self.assertEqual(statuses, {
+            'Late': 'overdue', 'Started': 'overdue', 'Done': 'completed', 'Upcoming': 'pending',
+        })
+        self.assertEqual(mark_overdue_tasks(), 0)
+
+    def test_sweep_sends_one_notification_per_assignee_per_batch(self):
+        from .tasks import mark_overdue_tasks
+
+        create_task(self.user, self.group, 'Essay', timedelta(hours=-2))
+        create_task(self.user, self.group, 'Lab', timedelta(hours=-1))
+        create_task(self.user, self.group, 'Quiz', timedelta(hours=-1), assigned_to=self.other)
+
+        mark_overdue_tasks()
+
+        mine = Notification.objects.get(user=self.user)
+        self.assertEqual(mine.title, '2 tasks are overdue')
+        self.assertEqual(mine.related_group, self.group)
+        theirs = Notification.objects.get(user=self.other)
+        self.assertEqual(theirs.title, 'Task overdue: Quiz')
+
+    def test_overdue_list_includes_swept_and_unswept_tasks(self):
+        from .tasks import mark_overdue_tasks
+
+        create_task(self.user, self.group, 'Swept', timedelta(hours=-2))
+        mark_overdue_tasks()
+        create_task(self.user, self.group, 'Not yet swept', timedelta(hours=-1))
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('task-overdue'))
+        self.assertEqual(
+            sorted(task['title'] for task in response.data), ['Not yet swept', 'Swept']
+        )
+
+    def test_moving_due_date_forward_reopens_overdue_task(self):
+        from .tasks import mark_overdue_tasks
+
+        single = create_task(self.user, self.group, 'Essay', timedelta(hours=-2))
+        bulk = create_task(self.user, self.group, 'Lab', timedelta(hours=-2))
+        mark_overdue_tasks()
+        GroupMember.objects.create(user=self.user, group=self.group)
+        self.client.force_authenticate(user=self.user)
+        later = (timezone.now() + timedelta(days=3)).isoformat()
+
+        response = self.client.patch(
+            reverse('task-detail', args=[single.id]), {'due_date': later}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(reverse('task-bulk-update'), {
+            'tasks': [{'id': bulk.id, 'due_date': later, 'status': 'in_progress'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        statuses = dict(Task.objects.values_list('title', 'status'))
+        self.assertEqual(statuses, {'Essay': 'pending', 'Lab': 'in_progress'})
+        self.assertEqual(mark_overdue_tasks(), 0)
+
+    def test_starting_past_due_task_is_not_swept_again(self):
+        from .tasks import mark_overdue_tasks
+
+        single = create_task(self.user, self.group, 'Essay', timedelta(hours=-2))
+        bulk = create_task(self.user, self.group, 'Lab', timedelta(hours=-2))
+        mark_overdue_tasks()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(reverse('task-mark-in-progress', args=[single.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'in_progress')
+        response = self.client.post(
+            reverse('task-bulk-status'), {'ids': [bulk.id], 'status': 'pending'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        statuses = dict(Task.objects.values_list('title', 'status'))
+        self.assertEqual(statuses, {'Essay': 'in_progress', 'Lab': 'pending'})
+        self.assertEqual(mark_overdue_tasks(), 0)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+
+    def test_rescheduled_task_is_swept_when_new_due_date_passes(self):
+        from .tasks import mark_overdue_tasks
+
+        task = create_task(self.user, self.group, 'Essay', timedelta(hours=-2), status='in_progress')
+        Task.objects.filter(pk=task.pk).update(overdue_notified_at=timezone.now() - timedelta(hours=3))
+
+        self.assertEqual(mark_overdue_tasks(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'overdue')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkTaskTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='teacher@test.com',
+            username='teacher',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        GroupMember.objects.create(user=self.user, group=self.group)
+        self.members = User.objects.bulk_create([
+            User(email=f'student{i}@test.com', username=f'student{i}', password='!')
+            for i in range(20)
+        ])
+        GroupMember.objects.bulk_create([
+            GroupMember(user=member, group=self.group) for member in self.members
+        ])
+        self.outsider = User.objects.create_user(
+            email='outsider@test.com',
+            username='outsider',
+            password='password123'
+        )
+        self.due_date = (timezone.now() + timedelta(days=3)).isoformat()
+        self.client.force_authenticate(user=self.user)
+
+    def _bulk_create(self, assignees):
+        return self.client.post(reverse('task-bulk-create'), {
+            'tasks': [
+                {
+                    'title': 'Chapter 3 exercises',
+                    'assigned_to': assignee.id,
+                    'group': self.group.id,
+                    'due_date': self.due_date,
+                }
+                for assignee in assignees
+            ]
+        }, format='json')
+
+    def test_bulk_create_query_count_does_not_grow_with_tasks(self):
+        # Includes creating the group's activity row for today (update,
+        # then savepoint, insert and release)
+        with self.assertNumQueries(12):
+            response = self._bulk_create(self.members)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(Task.objects.filter(created_by=self.user).count(), 20)
+        self.assertEqual(Notification.objects.filter(notification_type='task_assigned').count(), 20)
+        # Signals were replayed, so reminders exist for the new tasks
+        self.assertEqual(
+            Task.objects.filter(reminders__isnull=False).distinct().count(), 20
+        )
+
+    def test_bulk_create_rejects_non_members_per_item(self):
+        response = self._bulk_create([self.members[0], self.outsider])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['tasks'][0], {})
+        self.assertIn('assigned_to', response.data['tasks'][1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_status_completes_and_notifies_creator_once_per_task(self):
+        self._bulk_create(self.members[:3])
+        ids = list(Task.objects.values_list('pk', flat=True))
+
+        self.client.force_authenticate(user=self.members[0])
+        response = self.client.post(
+            reverse('task-bulk-status'), {'ids': ids, 'status': 'completed'}, format='json'
+        )
+        # Only the task assigned to this member may be changed
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse('task-bulk-status'), {'ids': ids, 'status': 'completed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(Task.objects.values_list('status', flat=True)), {'completed'}
+        )
+        self.assertFalse(Task.objects.filter(completed_at__isnull=True).exists())
+        self.assertFalse(Task.objects.filter(reminders__isnull=False).exists())
+
+    def test_bulk_update_applies_per_task_changes(self):
+        self._bulk_create(self.members[:2])
+        first, second = Task.objects.order_by('pk')
+
+        response = self.client.patch(reverse('task-bulk-update'), {
+            'tasks': [
+                {'id': first.id, 'priority': 'urgent'},
+                {'id': second.id, 'title': 'Chapter 4 exercises', 'status': 'in_progress'},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.priority, first.title), ('urgent', 'Chapter 3 exercises'))
+        self.assertEqual((second.title, second.status), ('Chapter 4 exercises', 'in_progress'))
+
+    def test_bulk_reassign_requires_membership_and_notifies_both_sides(self):
+        self._bulk_create(self.members[:2])
+        ids = list(Task.objects.values_list('pk', flat=True))
+
+        response = self.client.post(
+            reverse('task-bulk-reassign'),
+            {'ids': ids, 'assigned_to': self.outsider.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        new_assignee = self.members[5]
+        response = self.client.post(
+            reverse('task-bulk-reassign'),
+            {'ids': ids, 'assigned_to': new_assignee.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(Task.objects.values_list('assigned_to_id', flat=True)), {new_assignee.id}
+        )
+        self.assertEqual(
+            Notification.objects.filter(notification_type='task_unassigned').count(), 2
+        )
+
+    def test_bulk_endpoints_report_missing_tasks(self):
+        response = self.client.post(
+            reverse('task-bulk-status'), {'ids': [999], 'status': 'completed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['ids'], [999])
@@ -10,11 +10,12 @@ from django.db.models import (
 )
 from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.core.cache import cache
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, timedelta
 import logging
 from django.db.models.functions import Now
 
+from .cache import TaskListCache
 from .models import Task, StudyResource
 from .serializers import (
     TaskBasicSerializer, 
@@ -24,10 +25,17 @@ from .serializers import (
     StudyResourceCreateSerializer,
     StudyResourceSerializer,
     StudyResourceDownloadSerializer,
-    
+    TaskBulkCreateSerializer,
+    TaskBulkUpdateSerializer,
+    TaskBulkStatusSerializer,
+    TaskBulkReassignSerializer,
+    active_memberships,
 )
 from Notifications.models import Notification
-from group.models import StudyGroup
+from group.models import StudyGroup, GroupMember
+from common.pagination import StreamingExportMixin
+from common.signals import notifications_bulk_created, tasks_bulk_saved
+from django.db import transaction
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -36,13 +44,41 @@ User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
+TASK_COUNT_FIELDS = ('total', 'completed', 'in_progress', 'pending', 'overdue')
+
+
+def _empty_task_counts():
+    return dict.fromkeys(TASK_COUNT_FIELDS, 0)
+
+
+def _completion_rate(counts):
+    return round(counts['completed'] / counts['total'] * 100, 2) if counts['total'] else 0
+
 
+def _parse_range_bound(value, end=False):
+    """
+    Parse an ISO date or datetime query parameter. A bare date used as the
+    end of a range includes that whole day.
+    """
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value!r}")
+        if end:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
-class TaskViewSet(viewsets.ModelViewSet):
+
+class TaskViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     permission_classes = [permissions.IsAuthenticated]
-
-    CACHE_TIMEOUT = 300
+    export_serializer_class = TaskBasicSerializer
 
     def get_serializer_class(self): 
         serializer_map = {
@@ -61,23 +97,17 @@ class TaskViewSet(viewsets.ModelViewSet):
  
         user = self.request.user
         
-        queryset = Task.objects.select_related(
+        queryset = Task.objects.visible_to(user).select_related(
             'assigned_to', 
             'group', 
             'created_by'
-        ).filter(
-            Q(assigned_to=user) |
-            Q(group__members__user=user, group__members__is_active=True) |
-            Q(created_by=user) 
-        ).distinct()  
-        
-        
+        )
+
 
         queryset = queryset.annotate(
             is_overdue_calculated=Case(
             When(
-                due_date__lt=timezone.now(), 
-                status__in=['pending', 'in_progress'],
+                Task.overdue_q(),
                 then=Value(True)
             ),
             default=Value(False),
@@ -104,7 +134,6 @@ class TaskViewSet(viewsets.ModelViewSet):
             'user': self.request.user,
 
         })
-        print(context)
         return context
     def perform_create(self, serializer):
         try:
@@ -128,6 +157,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             # Notify NEW assignee
             self._create_task_notification(
                 user=new_task.assigned_to,
+                task=new_task,
                 notification_type='task_assigned',
                 message=f"Task assigned to you: {new_task.title}"
             )
@@ -135,6 +165,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             if old_task.assigned_to:
                 self._create_task_notification(
                     user=old_task.assigned_to,
+                    task=new_task,
                     notification_type='task_unassigned', 
                     message=f"Task unassigned from you: {new_task.title}"
                 )
@@ -147,11 +178,13 @@ class TaskViewSet(viewsets.ModelViewSet):
                 message=f'Task completed: {new_task.title}'
             )
     def list(self, request, *args, **kwargs):
-        cache_key = f"user_tasks_{request.user.id}_{request.query_params.urlencode()}"
+        # Keyed by the user's and their groups' task versions, which every
+        # task mutation bumps, so entries never go stale (see Tasks.cache)
+        cache_key = TaskListCache.cache_key(request.user, request.query_params.urlencode())
 
-        cached_response = cache.get(cache_key)
+        cached_response = TaskListCache.get(cache_key)
 
-        if cached_response: 
+        if cached_response is not None: 
             return Response(cached_response)
         
         queryset = self.filter_queryset(self.get_queryset())
@@ -161,18 +194,17 @@ class TaskViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(page, many=True)
             response = self.get_paginated_response(serializer.data)
         
-            cache.set(cache_key, response.data, self.CACHE_TIMEOUT)
+            TaskListCache.set(cache_key, response.data)
             return response
         serializer = self.get_serializer(queryset, many=True)
         response = Response(serializer.data)
         
-        cache.set(cache_key, serializer.data, self.CACHE_TIMEOUT)
+        TaskListCache.set(cache_key, serializer.data)
         return response
     
     @action(detail=True, methods=['post'])
     def mark_complete(self, request, pk=None):
         task = self.get_object()
-        print(task, " the new task is -----")
         if task.assigned_to != request.user and task.created_by != request.user:
             return Response(
                 {
@@ -215,7 +247,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         task.save()
 
         serializer = self.get_serializer(task)
-        return Response
+        return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def reassign(self, request, pk=None):
@@ -237,7 +269,6 @@ class TaskViewSet(viewsets.ModelViewSet):
                 },
                 status=status.HTTP_400_BAD_REQUEST)
             old_assignee = task.assigned_to
-            print("======== ", new_assignee, old_assignee)
             task.assigned_to = new_assignee
             task.save()
 
@@ -263,6 +294,195 @@ class TaskViewSet(viewsets.ModelViewSet):
             status=status.HTTP_404_NOT_FOUND
             )
     
+    # ─────────────────────────────────────────────────────────────────────────
+    # Bulk endpoints: one query to load and validate, one write, and one
+    # bulk_create for notifications, however many tasks are involved
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        serializer = TaskBulkCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create([
+                Task(created_by=request.user, **item)
+                for item in serializer.validated_data['tasks']
+            ])
+            tasks_bulk_saved(tasks, created=True)
+            self._bulk_task_notifications([
+                (task.assigned_to_id, task, 'task_assigned', f"New task assigned: {task.title}")
+                for task in tasks
+            ])
+
+        logger.info(f"{len(tasks)} tasks bulk created by {request.user}")
+        return self._bulk_response(tasks, status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['patch'])
+    def bulk_update(self, request):
+        serializer = TaskBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = {item.pop('id'): item for item in serializer.validated_data['tasks']}
+
+        with transaction.atomic():
+            tasks, error = self._load_for_bulk(request, changes.keys())
+            if error:
+                return error
+
+            fields = set()
+            completed = []
+            now = timezone.now()
+            for task in tasks:
+                values = changes[task.pk]
+                if 'due_date' in values and 'status' not in values:
+                    values['status'] = Task.status_for_due_date(task.status, values['due_date'], now)
+                if 'status' in values:
+                    if values['status'] == 'completed' and task.status != 'completed':
+                        values['completed_at'] = now
+                        completed.append(task)
+                    elif values['status'] != 'completed':
+                        values['completed_at'] = None
+                for field, value in values.items():
+                    setattr(task, field, value)
+                fields.update(values)
+
+            if fields:
+                Task.objects.bulk_update(tasks, fields | {'updated_at'})
+                tasks_bulk_saved(tasks)
+            self._bulk_task_notifications([
+                (task.created_by_id, task, 'task_completed', f"Task completed: {task.title}")
+                for task in completed
+            ])
+
+        return self._bulk_response(tasks)
+
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        serializer = TaskBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+
+        with transaction.atomic():
+            tasks, error = self._load_for_bulk(
+                request, serializer.validated_data['ids'],
+                allowed=lambda task: request.user.id in (task.assigned_to_id, task.created_by_id),
+                denied_message="You can only change the status of tasks assigned to or created by you."
+            )
+            if error:
+                return error
+
+            now = timezone.now()
+            completed = []
+            for task in tasks:
+                if new_status == 'completed' and task.status != 'completed':
+                    task.completed_at = now
+                    completed.append(task)
+                elif new_status != 'completed':
+                    task.completed_at = None
+                task.status = new_status
+
+            Task.objects.bulk_update(tasks, ['status', 'completed_at', 'updated_at'])
+            tasks_bulk_saved(tasks)
+            self._bulk_task_notifications([
+                (task.created_by_id, task, 'task_completed', f"Task completed: {task.title}")
+                for task in completed if task.created_by_id != request.user.id
+            ])
+
+        return self._bulk_response(tasks)
+
+    @action(detail=False, methods=['post'])
+    def bulk_reassign(self, request):
+        serializer = TaskBulkReassignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_assignee_id = serializer.validated_data['assigned_to']
+
+        with transaction.atomic():
+            tasks, error = self._load_for_bulk(
+                request, serializer.validated_data['ids'],
+                allowed=lambda task: self._can_reassign_task(task, request.user),
+                denied_message="You don't have permission to reassign these tasks."
+            )
+            if error:
+                return error
+
+            memberships = active_memberships({task.group_id for task in tasks}, [new_assignee_id])
+            if len(memberships) != len({task.group_id for task in tasks}):
+                return Response(
+                    {"error": "New assignee must be a member of every task's group."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            notifications = []
+            for task in tasks:
+                old_assignee_id = task.assigned_to_id
+                if old_assignee_id == new_assignee_id:
+                    continue
+                task.assigned_to_id = new_assignee_id
+                notifications.append(
+                    (new_assignee_id, task, 'task_assigned', f"Task assigned to you: {task.title}")
+                )
+                if old_assignee_id:
+                    notifications.append(
+                        (old_assignee_id, task, 'task_unassigned', f"Task unassigned: {task.title}")
+                    )
+
+            Task.objects.bulk_update(tasks, ['assigned_to', 'updated_at'])
+            tasks_bulk_saved(tasks)
+            self._bulk_task_notifications(notifications)
+
+        return self._bulk_response(tasks)
+
+    def _load_for_bulk(self, request, ids, allowed=None, denied_message=None):
+        """
+        Lock and load the requested tasks the user can see. Returns
+        (tasks, None), or (None, error response) if any are missing or
+        `allowed` rejects them.
+        """
+        ids = set(ids)
+        tasks = list(
+            Task.objects.visible_to(request.user).filter(pk__in=ids)
+            .select_related('group').select_for_update(of=('self',))
+        )
+        missing = ids - {task.pk for task in tasks}
+        if missing:
+            return None, Response(
+                {"error": "Tasks not found.", "ids": sorted(missing)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if allowed:
+            denied = [task.pk for task in tasks if not allowed(task)]
+            if denied:
+                return None, Response(
+                    {"error": denied_message, "ids": sorted(denied)},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        now = timezone.now()
+        for task in tasks:
+            task.updated_at = now
+        return tasks, None
+
+    def _bulk_response(self, tasks, status_code=status.HTTP_200_OK):
+        queryset = self.get_queryset().filter(pk__in=[task.pk for task in tasks])
+        serializer = TaskBasicSerializer(queryset, many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status_code)
+
+    def _bulk_task_notifications(self, entries):
+        """Create (user_id, task, notification_type, message) notifications in one query."""
+        try:
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    user_id=user_id,
+                    notification_type=notification_type,
+                    title=f"Task Update: {task.title}",
+                    message=message,
+                    related_group_id=task.group_id,
+                )
+                for user_id, task, notification_type, message in entries if user_id
+            ])
+            notifications_bulk_created(notifications)
+        except Exception as e:
+            logger.error(f"Failed to create notifications: {str(e)}")
+
     @action(detail=False, methods=['get'])
     def my_tasks(self, request):
         status_filter = request.query_params.get('status')
@@ -270,7 +490,9 @@ class TaskViewSet(viewsets.ModelViewSet):
         group_filter = request.query_params.get('group')
         due_date_filter = request.query_params.get('due_date')
 
-        tasks = Task.objects.filter(assigned_to=request.user)
+        tasks = Task.objects.filter(assigned_to=request.user).select_related(
+            'assigned_to', 'group', 'created_by'
+        )
 
         if status_filter:
             tasks = tasks.filter(status=status_filter)
@@ -301,10 +523,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                 'completed': tasks.filter(status='completed').count(),
                 'pending': tasks.filter(status='pending').count(),
                 'in_progress': tasks.filter(status='in_progress').count(),
-                'overdue': tasks.filter(
-                    due_date__lt=timezone.now(), 
-                    status__in=['pending', 'in_progress']
-                ).count()
+                'overdue': tasks.filter(Task.overdue_q()).count()
             }
         }
         
@@ -313,10 +532,9 @@ class TaskViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         overdue_tasks = Task.objects.filter(
+            Task.overdue_q(),
             assigned_to=request.user,
-            due_date__lt=timezone.now(),
-            status__in=['pending', 'in_progress']
-        ).order_by('priority', 'due_date')
+        ).select_related('assigned_to', 'group', 'created_by').order_by('priority', 'due_date')
         
         serializer = self.get_serializer(overdue_tasks, many=True)
         return Response(serializer.data)
@@ -330,7 +548,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                 timezone.now() + timedelta(days=7)
             ],
             status__in=['pending', 'in_progress']
-        ).order_by('due_date', 'priority')
+        ).select_related('assigned_to', 'group', 'created_by').order_by('due_date', 'priority')
         
         serializer = self.get_serializer(upcoming_tasks, many=True)
         return Response(serializer.data)
@@ -338,32 +556,80 @@ class TaskViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def team_tasks(self, request):
         team_tasks = Task.objects.filter(
-            group__members__user=request.user,
-            group__members__is_active=True
-        ).exclude(assigned_to=request.user).distinct()
+            group_id__in=GroupMember.objects.filter(
+                user=request.user, is_active=True
+            ).values('group_id')
+        ).exclude(assigned_to=request.user).select_related('assigned_to', 'group', 'created_by')
         
-        serializer = self.get_serializer(team_tasks, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(team_tasks)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
+        """
+        Task statistics for the current user, with per-group and per-priority
+        breakdowns. Optional `start`/`end` (ISO date or datetime) limit the
+        tasks by due date. Every figure comes from one grouped query.
+        """
+        try:
+            start = _parse_range_bound(request.query_params.get('start'))
+            end = _parse_range_bound(request.query_params.get('end'), end=True)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         user_tasks = Task.objects.filter(assigned_to=request.user)
-        
+        if start:
+            user_tasks = user_tasks.filter(due_date__gte=start)
+        if end:
+            user_tasks = user_tasks.filter(due_date__lt=end)
+
+        now = timezone.now()
+        rows = user_tasks.values('group_id', 'group__group_name', 'priority').annotate(
+            total=Count('pk'),
+            completed=Count('pk', filter=Q(status='completed')),
+            in_progress=Count('pk', filter=Q(status='in_progress')),
+            pending=Count('pk', filter=Q(status='pending')),
+            overdue=Count('pk', filter=Task.overdue_q(now)),
+        ).order_by()
+
+        # Roll the (group, priority) cells up into totals and both breakdowns
+        totals = _empty_task_counts()
+        by_group = {}
+        by_priority = {
+            priority: _empty_task_counts() for priority, _ in Task.PriorityLevels.choices
+        }
+        for row in rows:
+            group = by_group.setdefault(row['group_id'], {
+                'group_id': row['group_id'],
+                'group_name': row['group__group_name'],
+                **_empty_task_counts(),
+            })
+            for counts in (totals, group, by_priority[row['priority']]):
+                for field in TASK_COUNT_FIELDS:
+                    counts[field] += row[field]
+
         stats = {
-            'total_tasks': user_tasks.count(),
-            'completed_tasks': user_tasks.filter(status='completed').count(),
-            'in_progress_tasks': user_tasks.filter(status='in_progress').count(),
-            'pending_tasks': user_tasks.filter(status='pending').count(),
-            'overdue_tasks': user_tasks.filter(
-                due_date__lt=timezone.now(),
-                status__in=['pending', 'in_progress']
-            ).count(),
-            'completion_rate': round(
-                (user_tasks.filter(status='completed').count() / 
-                 max(user_tasks.count(), 1)) * 100, 2
-            ) if user_tasks.exists() else 0
+            'total_tasks': totals['total'],
+            'completed_tasks': totals['completed'],
+            'in_progress_tasks': totals['in_progress'],
+            'pending_tasks': totals['pending'],
+            'overdue_tasks': totals['overdue'],
+            'completion_rate': _completion_rate(totals),
+            'by_group': [
+                {**counts, 'completion_rate': _completion_rate(counts)}
+                for counts in sorted(by_group.values(), key=lambda c: c['group_name'])
+            ],
+            'by_priority': {
+                priority: {**counts, 'completion_rate': _completion_rate(counts)}
+                for priority, counts in by_priority.items()
+            },
+            'range': {
+                'start': start.isoformat() if start else None,
+                'end': end.isoformat() if end else None,
+            },
         }
-        
+
         return Response(stats)
 
     def _create_task_notification(self, user, task, notification_type, message):
@@ -379,8 +645,8 @@ class TaskViewSet(viewsets.ModelViewSet):
             logger.error(f"Failed to create notification: {str(e)}")
 
     def _can_reassign_task(self, task, user):
-        return (task.created_by == user or 
-                (task.group and task.group.created_by == user))
+        return (task.created_by_id == user.id or 
+                (task.group and task.group.created_by_id == user.id))
 
 class StudyResourceViewSet(viewsets.ModelViewSet):
     queryset = StudyResource.objects.all()
@@ -441,7 +707,7 @@ class StudyResourceViewSet(viewsets.ModelViewSet):
         popular_resources = StudyResource.objects.filter(
             group__members__user=request.user,
             group__members__is_active=True
-        ).order_by('-download_count')[:10]
+        ).select_related('uploaded_by', 'group').order_by('-download_count')[:10]
 
         serializer = self.get_serializer(popular_resources, many=True)
         return Response(serializer.data)
@@ -475,8 +741,9 @@ class StudyResourceViewSet(viewsets.ModelViewSet):
                         related_group = resource.group
                     )
                 )
-                if notifications:
-                    Notification.objects.bulk_create(notifications)
+            if notifications:
+                Notification.objects.bulk_create(notifications)
+                notifications_bulk_created(notifications)
         
         except Exception as e:
             logger.error(f"Failed to create resource notifications: {str(e)}")
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'common'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import instrumentation, metrics
+        instrumentation.install()
+        metrics.install()
@@ -1,15 +1,17 @@
 from django.core.cache import cache
-from django.db.models import Count, Max, Q
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.decorators import method_decorator
 from rest_framework import status, permissions
-from django.views.decorators.cache import cache_page
 from rest_framework.response import Response
 from Message.models import Message
 from rest_framework.decorators import api_view, permission_classes
 from Tasks.models import Task, StudyResource
 from accounts.models import CustomUser
-from group.models import StudyGroup
-from .serializers import UserDashboardSerilizer
+from group.models import StudyGroup, GroupMember
+from .snapshots import DashboardSnapshot
+from .live_counters import LiveCounters
+from .search import SearchIndex
 from Notifications.models import Notification
 from accounts.serializers import UserProfileSerializer
 from group.serializers import StudyGroupListSerializer
@@ -17,15 +19,16 @@ from Tasks.serializers import StudyResourceSerializer
 from django.utils import timezone
 from datetime import timedelta
 
+ANALYTICS_DEFAULT_DAYS = 7
+ANALYTICS_MAX_DAYS = 365
+SEARCH_MAX_LIMIT = 50
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-@cache_page(60 * 2)  # Cache for 2 minutes
 def user_dashboard(request):
     try:
-        user = request.user
-        
-        dashboard_data = UserDashboardSerilizer(user, context={'request': request})
-        return Response(dashboard_data.data)
+        # Served from the per-user snapshot, see common.snapshots
+        return Response(DashboardSnapshot.get(request.user))
         
     except Exception as e:
         return Response(
@@ -34,46 +37,70 @@ def user_dashboard(request):
         )
 
 
+def _user_subquery(queryset, user_field, aggregate):
+    # Correlated scalar subquery on the outer user row, e.g. COUNT(*) or MAX(ts)
+    return Subquery(
+        queryset.filter(**{user_field: OuterRef('pk')})
+        .order_by()
+        .values(user_field)
+        .annotate(value=aggregate)
+        .values('value')[:1]
+    )
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_activity_analytics(request):
     try:
-        user = request.user
-        week_ago = timezone.now() - timedelta(days=7)
-
-        activity_data = {
-            'messages_sent': Message.objects.filter(
-                sender=user, timestamp__gte=week_ago
-            ).count(),
-            'tasks_completed': Task.objects.filter(
-                assigned_to=user, status='completed', completed_at__gte=week_ago
-            ).count(),
-            'files_uploaded': StudyResource.objects.filter(
-                uploaded_by=user, uploaded_at__gte=week_ago
-            ).count(),
-            'groups_joined': user.group_memberships.filter(is_active=True).count(),
-        }
+        days = int(request.query_params.get('days', ANALYTICS_DEFAULT_DAYS))
+    except ValueError:
+        return Response(
+            {"error": "Query parameter 'days' must be an integer"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 1 <= days <= ANALYTICS_MAX_DAYS:
+        return Response(
+            {"error": f"Query parameter 'days' must be between 1 and {ANALYTICS_MAX_DAYS}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-        last_activities = []
-        for model, filters in [
-            (Message, {'sender': user}),
-            (Task, {'assigned_to': user}),
-            (StudyResource, {'uploaded_by': user}),
-        ]:
-            order_field = (
-                '-timestamp' if hasattr(model, 'timestamp')
-                else '-uploaded_at' if hasattr(model, 'uploaded_at')
-                else None
-            )
-            if order_field:
-                last_obj = model.objects.filter(**filters).order_by(order_field).first()
-                if last_obj:
-                    last_time = getattr(last_obj, 'timestamp', None) or getattr(last_obj, 'uploaded_at', None)
-                    if last_time:
-                        last_activities.append(last_time)
+    try:
+        user = request.user
+        since = timezone.now() - timedelta(days=days)
+
+        # Every figure is a scalar subquery on the user row, so the whole
+        # payload is one SQL statement backed by the (user, time) indexes.
+        activity_data = CustomUser.objects.filter(pk=user.pk).annotate(
+            messages_sent=Coalesce(_user_subquery(
+                Message.objects.filter(timestamp__gte=since), 'sender', Count('pk')
+            ), 0),
+            tasks_completed=Coalesce(_user_subquery(
+                Task.objects.filter(status='completed', completed_at__gte=since),
+                'assigned_to', Count('pk')
+            ), 0),
+            files_uploaded=Coalesce(_user_subquery(
+                StudyResource.objects.filter(uploaded_at__gte=since), 'uploaded_by', Count('pk')
+            ), 0),
+            groups_joined=Coalesce(_user_subquery(
+                GroupMember.objects.filter(is_active=True), 'user', Count('pk')
+            ), 0),
+            last_message_at=_user_subquery(Message.objects.all(), 'sender', Max('timestamp')),
+            last_task_completed_at=_user_subquery(Task.objects.all(), 'assigned_to', Max('completed_at')),
+            last_upload_at=_user_subquery(StudyResource.objects.all(), 'uploaded_by', Max('uploaded_at')),
+        ).values(
+            'messages_sent', 'tasks_completed', 'files_uploaded', 'groups_joined',
+            'last_message_at', 'last_task_completed_at', 'last_upload_at',
+        ).get()
+
+        last_activities = [
+            activity_data.pop(field)
+            for field in ('last_message_at', 'last_task_completed_at', 'last_upload_at')
+        ]
+        last_activities = [ts for ts in last_activities if ts]
         activity_data['last_active'] = max(last_activities) if last_activities else user.last_login
-        activity_data['user_id'] = getattr(user, 'user_id', user.id)
-        activity_data['full_name'] = user.get_full_name() if hasattr(user, 'get_full_name') else user.full_name
+        activity_data['user_id'] = user.id
+        activity_data['full_name'] = user.full_name
+        activity_data['window_days'] = days
 
         return Response(activity_data)
 
@@ -88,34 +115,10 @@ def user_activity_analytics(request):
 @permission_classes([permissions.IsAuthenticated])
 def live_updates(request):
     try:
-        user = request.user
-        now = timezone.now()
-
-        user_group_ids = user.group_memberships.values_list('group_id', flat=True)
-        updates = {
-            'unread_messages': Message.objects.filter(
-                group_id__in=user_group_ids, is_read=False
-            ).exclude(sender=user).count(),
-
-            'pending_tasks': Task.objects.filter(
-                assigned_to=user, status__in=['pending', 'in_progress']
-            ).count(),
-
-            'recent_notifications': Notification.objects.filter(
-                user=user, created_at__gte=now - timedelta(hours=24)
-            ).count(),
-
-            # # Friends active in the last 5 minutes
-            # # 'online_friends': CustomUser.objects.filter(
-            # #     friends=user, last_seen__gte=now - timedelta(minutes=5)
-            # # ).count(),
-            # 'online_users': CustomUser.objects.filter(
-            #     last_seen__gte=now - timedelta(minutes=5)
-            # ).exclude(id=user.id).count(),
-
-            # # Current server time
-            'timestamp': now.isoformat()
-        }
+        # Same maintained counters that are pushed over ws/notifications/,
+        # so polling clients no longer trigger aggregate queries.
+        updates = LiveCounters.get(request.user)
+        updates['timestamp'] = timezone.now().isoformat()
 
         return Response([updates])
 
@@ -133,7 +136,7 @@ def global_search(request):
     try:
         query = request.query_params.get('q', '').strip()
         search_type = request.query_params.get('type', 'all')
-        limit = int(request.query_params.get('limit', 10))
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), SEARCH_MAX_LIMIT)
         
         if not query or len(query) < 2:
             return Response(
@@ -144,41 +147,36 @@ def global_search(request):
         results = {}
         user = request.user
         
+        # Each category is one ranked query against the search index (see
+        # common.search) that also returns the total number of matches.
         if search_type in ['all', 'users']:
-            users = CustomUser.objects.filter(
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query) |
-                Q(email__icontains=query) |
-                Q(username__icontains=query)
-            ).exclude(id=user.id)[:limit] 
-            
+            users, total = SearchIndex.search(
+                CustomUser.objects.exclude(id=user.id), query, limit
+            )
             results['users'] = {
-                'count': users.count(),
+                'count': total,
                 'results': UserProfileSerializer(users, many=True).data
             }
         
         if search_type in ['all', 'groups']:
-            groups = StudyGroup.objects.filter(
-                Q(group_name__icontains=query) |
-                Q(group_description__icontains=query),
-                Q(is_public=True) | Q(members__user=user, members__is_active=True)
-            ).distinct()[:limit]
-            
+            groups, total = SearchIndex.search(
+                StudyGroup.objects.with_member_info(user)
+                .filter(SearchIndex.visible_groups_filter(user)),
+                query, limit
+            )
             results['groups'] = {
-                'count': groups.count(),
+                'count': total,
                 'results': StudyGroupListSerializer(groups, many=True, context={'request': request}).data
             }
         
         if search_type in ['all', 'resources']:
-            resources = StudyResource.objects.filter(
-                Q(title__icontains=query) | 
-                Q(description__icontains=query),
-                Q(group__members__user=user, group__members__is_active=True) |
-                Q(is_public=True)
-            ).distinct()[:limit]
-            
+            resources, total = SearchIndex.search(
+                StudyResource.objects.filter(SearchIndex.visible_resources_filter(user))
+                .select_related('uploaded_by', 'group'),
+                query, limit
+            )
             results['resources'] = {
-                'count': resources.count(),
+                'count': total,
                 'results': StudyResourceSerializer(resources, many=True).data
             }
         
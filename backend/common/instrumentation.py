@@ -0,0 +1,140 @@
+"""
+Sampled request instrumentation.
+
+RequestInstrumentationMiddleware logs one structured record per sampled
+request to the `studybuddy.requests` logger. Each record carries the
+resolved view, status, wall time, query count, time spent in the
+database and time spent producing serializer output. The fields are in
+the message as key=value pairs and in the record's `extra` for
+structured handlers.
+
+A REQUEST_INSTRUMENTATION_SAMPLE_RATE share of requests is sampled.
+Requests slower than REQUEST_INSTRUMENTATION_SLOW_MS are always logged,
+with timing only, at WARNING. Unsampled requests pay for a clock read
+and nothing else.
+"""
+
+import contextvars
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger('studybuddy.requests')
+
+_current = contextvars.ContextVar('request_instrumentation', default=None)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+
+def _timed_serializer_data(data_property):
+    getter = data_property.fget
+
+    @wraps(getter)
+    def data(self):
+        metrics = _current.get()
+        if metrics is None:
+            return getter(self)
+        # Serializers built inside another's output are part of its time
+        metrics._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return getter(self)
+        finally:
+            metrics._serializer_depth -= 1
+            if metrics._serializer_depth == 0:
+                metrics.serializer_seconds += time.perf_counter() - start
+
+    return property(data)
+
+
+def install():
+    """Time serializer output; every DRF serializer's .data goes through BaseSerializer.data."""
+    if not getattr(BaseSerializer.data.fget, '_instrumented', False):
+        BaseSerializer.data = _timed_serializer_data(BaseSerializer.data)
+        BaseSerializer.data.fget._instrumented = True
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return match.view_name or match._func_path
+
+
+class RequestInstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        sample_rate = getattr(settings, 'REQUEST_INSTRUMENTATION_SAMPLE_RATE', 0.0)
+        slow_ms = getattr(settings, 'REQUEST_INSTRUMENTATION_SLOW_MS', None)
+        if sample_rate and random.random() < sample_rate:
+            return self._sampled(request, start, slow_ms)
+
+        response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if slow_ms is not None and duration_ms >= slow_ms:
+            self._log(logging.WARNING, request, response, duration_ms)
+        return response
+
+    def _sampled(self, request, start, slow_ms):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+                # Lazily rendered responses serialize here
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+        finally:
+            _current.reset(token)
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        slow = slow_ms is not None and duration_ms >= slow_ms
+        self._log(logging.WARNING if slow else logging.INFO, request, response, duration_ms, metrics)
+        return response
+
+    def _log(self, level, request, response, duration_ms, metrics=None):
+        user = getattr(request, 'user', None)
+        fields = {
+            'view': _view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user_id': user.id if user is not None and user.is_authenticated else None,
+            'duration_ms': round(duration_ms, 2),
+        }
+        if metrics is not None:
+            fields.update({
+                'db_queries': metrics.db_queries,
+                'db_ms': round(metrics.db_seconds * 1000, 2),
+                'serializer_ms': round(metrics.serializer_seconds * 1000, 2),
+            })
+        logger.log(
+            level,
+            ' '.join(f"{key}={value}" for key, value in fields.items()),
+            extra={'request_metrics': fields}
+        )
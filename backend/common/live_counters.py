@@ -0,0 +1,170 @@
+"""
+Maintained per-user counters for dashboard live updates.
+
+Counters are seeded from the database the first time they are read and
+then kept current by applying deltas from message, task and notification
+events. Every delta is also pushed to the user's notifications WebSocket,
+so connected dashboards update without polling.
+
+Recent notifications are kept in hourly buckets; the "last 24 hours"
+figure is the sum of the current bucket and the 23 before it.
+"""
+
+import logging
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class LiveCounters:
+    CACHE_TTL = 60 * 60 * 24
+    BUCKET_SECONDS = 60 * 60
+    WINDOW_BUCKETS = 24
+
+    UNREAD_MESSAGES = 'unread_messages'
+    PENDING_TASKS = 'pending_tasks'
+    RECENT_NOTIFICATIONS = 'recent_notifications'
+
+    PENDING_STATUSES = ('pending', 'in_progress')
+
+    @staticmethod
+    def cache_key(user_id, name):
+        return f"live_{name}_{user_id}"
+
+    @classmethod
+    def _bucket(cls, timestamp=None):
+        return int((timestamp if timestamp is not None else time.time()) // cls.BUCKET_SECONDS)
+
+    @classmethod
+    def _bucket_key(cls, user_id, bucket):
+        return f"live_notifications_{user_id}_{bucket}"
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Reads
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def get(cls, user):
+        """Return all counters for a user, seeding any that are missing."""
+        keys = {
+            cls.UNREAD_MESSAGES: cls.cache_key(user.id, cls.UNREAD_MESSAGES),
+            cls.PENDING_TASKS: cls.cache_key(user.id, cls.PENDING_TASKS),
+        }
+        cached = cache.get_many(keys.values())
+
+        counters = {}
+        for name, key in keys.items():
+            value = cached.get(key)
+            if value is None:
+                value = cls._seed(user, name)
+            counters[name] = value
+        counters[cls.RECENT_NOTIFICATIONS] = cls._recent_notifications(user)
+        return counters
+
+    @classmethod
+    def _seed(cls, user, name):
+        from Message.models import Message
+        from Tasks.models import Task
+
+        if name == cls.UNREAD_MESSAGES:
+            value = Message.objects.filter(
+                conversation__members__user=user, is_read=False
+            ).exclude(sender=user).count()
+        else:
+            value = Task.objects.filter(
+                assigned_to=user, status__in=cls.PENDING_STATUSES
+            ).count()
+        cache.set(cls.cache_key(user.id, name), value, timeout=cls.CACHE_TTL)
+        return value
+
+    @classmethod
+    def _recent_notifications(cls, user):
+        from Notifications.models import Notification
+
+        current = cls._bucket()
+        buckets = range(current - cls.WINDOW_BUCKETS + 1, current + 1)
+        seeded_key = cls.cache_key(user.id, cls.RECENT_NOTIFICATIONS)
+
+        if cache.get(seeded_key) is None:
+            since = timezone.now() - timedelta(seconds=cls.BUCKET_SECONDS * cls.WINDOW_BUCKETS)
+            counts = {}
+            for created_at in Notification.objects.filter(
+                user=user, created_at__gte=since
+            ).values_list('created_at', flat=True):
+                bucket = cls._bucket(created_at.timestamp())
+                counts[bucket] = counts.get(bucket, 0) + 1
+            cache.set_many(
+                {cls._bucket_key(user.id, b): counts.get(b, 0) for b in buckets},
+                timeout=cls.CACHE_TTL + cls.BUCKET_SECONDS
+            )
+            cache.set(seeded_key, True, timeout=cls.CACHE_TTL)
+            return sum(counts.values())
+
+        values = cache.get_many([cls._bucket_key(user.id, b) for b in buckets])
+        return sum(values.values())
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Writes
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def adjust(cls, user_id, name, delta):
+        """Apply a delta to a seeded counter and push it to the user."""
+        if not user_id or not delta:
+            return
+        try:
+            cache.incr(cls.cache_key(user_id, name), delta)
+        except ValueError:
+            pass  # Not seeded yet; the next read computes it from the database
+        cls.push(user_id, {name: delta})
+
+    @classmethod
+    def adjust_many(cls, name, deltas):
+        for user_id, delta in deltas.items():
+            cls.adjust(user_id, name, delta)
+
+    @classmethod
+    def record_notifications(cls, user_ids):
+        """Count newly created notifications into the current hourly bucket."""
+        bucket = cls._bucket()
+        for user_id in user_ids:
+            if cache.get(cls.cache_key(user_id, cls.RECENT_NOTIFICATIONS)) is not None:
+                key = cls._bucket_key(user_id, bucket)
+                cache.add(key, 0, timeout=cls.CACHE_TTL + cls.BUCKET_SECONDS)
+                cache.incr(key)
+            cls.push(user_id, {cls.RECENT_NOTIFICATIONS: 1})
+
+    @classmethod
+    def reset(cls, user_id, name):
+        """Forget a counter whose delta cannot be derived cheaply."""
+        cache.delete(cls.cache_key(user_id, name))
+        cls.push(user_id, {}, reset=[name])
+
+    @classmethod
+    def push(cls, user_id, delta, reset=None):
+        """Send a counters delta to the user's notifications WebSocket after commit."""
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            return
+
+        event = {
+            'type': 'counters.update',
+            'delta': delta,
+            'reset': reset or [],
+            'timestamp': timezone.now().isoformat(),
+        }
+
+        def _send():
+            try:
+                async_to_sync(channel_layer.group_send)(f"notifications_{user_id}", event)
+            except Exception as e:
+                logger.error(f"Failed to push live counters to user {user_id}: {e}")
+
+        transaction.on_commit(_send)
@@ -0,0 +1,90 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from common.search import SearchIndex
+from group.models import StudyGroup, GroupMember
+
+User = get_user_model()
+
+WORDS = [
+    'algebra', 'biology', 'calculus', 'chemistry', 'databases', 'economics',
+    'french', 'geometry', 'history', 'java', 'literature', 'networks',
+    'physics', 'python', 'statistics', 'thermodynamics',
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed N synthetic groups into the search index inside a transaction, '
+        'time global search queries against them and roll everything back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Benchmark data rolled back")
+
+    def _run(self, options):
+        rows, batch_size = options['rows'], options['batch_size']
+        owner = User.objects.create_user(
+            email='search-benchmark@example.com', username='search-benchmark'
+        )
+
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            groups = StudyGroup.objects.bulk_create([
+                StudyGroup(
+                    group_name=f"{WORDS[i % len(WORDS)]} study {i}",
+                    group_description=f"{WORDS[(i * 7) % len(WORDS)]} revision group",
+                    created_by=owner,
+                    is_public=i % 3 != 0,
+                )
+                for i in range(offset, min(offset + batch_size, rows))
+            ])
+            if not connection.features.can_return_rows_from_bulk_insert:
+                groups = list(StudyGroup.objects.filter(created_by=owner).order_by('-pk')[:len(groups)])
+            SearchIndex.bulk_index(groups)
+        self.stdout.write(f"Seeded {rows} groups in {time.perf_counter() - start:.1f}s")
+
+        user = User.objects.create_user(
+            email='search-benchmark-reader@example.com', username='search-benchmark-reader'
+        )
+        GroupMember.objects.bulk_create([
+            GroupMember(user=user, group=group)
+            for group in StudyGroup.objects.filter(created_by=owner, is_public=False)[:500]
+        ])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE search_entries")
+                cursor.execute("ANALYZE study_groups")
+
+        for query in ('algebra', 'calc', 'physics revision', 'python study 4242'):
+            timings = []
+            for _ in range(options['repeat']):
+                begin = time.perf_counter()
+                results, total = SearchIndex.search(
+                    StudyGroup.objects.filter(SearchIndex.visible_groups_filter(user)),
+                    query, 10
+                )
+                timings.append((time.perf_counter() - begin) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{query!r}: total={total} p50={statistics.median(timings):.1f}ms "
+                f"p95={timings[int(len(timings) * 0.95) - 1]:.1f}ms"
+            )
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from common.search import SearchIndex
+from group.models import StudyGroup
+from Tasks.models import StudyResource
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the global search index in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for label, queryset in (
+            ('users', User.objects.order_by('pk')),
+            ('groups', StudyGroup.objects.order_by('pk')),
+            ('resources', StudyResource.objects.order_by('pk')),
+        ):
+            indexed = 0
+            batch = []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    indexed += SearchIndex.bulk_index(batch)
+                    batch = []
+            indexed += SearchIndex.bulk_index(batch)
+            self.stdout.write(f"Indexed {indexed} {label}")
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
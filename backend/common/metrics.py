@@ -0,0 +1,365 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Counters, gauges and histograms live in this process's memory and are
+served by metrics_view at /internal/metrics/. They are fed from four
+places:
+
+- MetricsMiddleware: request count, latency and DB queries per request,
+  labelled by the resolved URL name so ids in paths don't explode the
+  label set.
+- record_query, an execute wrapper added to every new DB connection:
+  query count and latency by statement type, for HTTP, Celery and
+  consumer code alike.
+- The configured channel layer's group_send, wrapped at startup: publish
+  count and latency by group prefix ("chat" for "chat_12").
+- ConsumerMetricsMixin on the WebSocket consumers: open connections,
+  connects and received frames with handler time, per consumer class.
+
+Each process keeps its own numbers, so with several workers every worker
+has to be scraped separately; the series restart from zero with the process.
+
+The endpoint answers requests bearing METRICS_TOKEN as a bearer token or,
+without a token configured, requests from METRICS_ALLOWED_IPS; with
+neither configured it refuses everyone. The address list trusts
+REMOTE_ADDR, which behind a local reverse proxy is the proxy's own
+address for every client, so deployments behind one need the token.
+"""
+
+import bisect
+import contextvars
+import hmac
+import re
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.module_loading import import_string
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_metrics = []
+
+_request_queries = contextvars.ContextVar('metrics_request_queries', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self):
+        """(suffix, label values, extra label pairs, value) for every series."""
+        with self._lock:
+            return [('', labels, (), value) for labels, value in sorted(self._values.items())]
+
+    def value(self, *labels):
+        return self._values.get(self._key(labels), 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for suffix, labels, extra, value in self.samples():
+            lines.append(
+                f'{self.name}{suffix}{_format_labels(self.labelnames, labels, extra)} {_format_value(value)}'
+            )
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        # A value equal to a bound belongs in that bound's bucket (le)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            series['counts'][index] += 1
+            series['sum'] += value
+
+    def value(self, *labels):
+        series = self._values.get(self._key(labels))
+        return sum(series['counts']) if series else 0
+
+    def samples(self):
+        with self._lock:
+            snapshot = [
+                (labels, list(series['counts']), series['sum'])
+                for labels, series in sorted(self._values.items())
+            ]
+        samples = []
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', labels, (('le', _format_value(bound)),), cumulative))
+            samples.append(('_sum', labels, (), total))
+            samples.append(('_count', labels, (), cumulative))
+        return samples
+
+
+def render():
+    return '\n'.join(metric.render() for metric in _metrics) + '\n'
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics
+# ─────────────────────────────────────────────────────────────────────────────
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests served.', ('view', 'method', 'status')
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce the HTTP response.', ('view', 'method')
+)
+HTTP_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries run per HTTP request.', ('view',),
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_QUERIES = Counter(
+    'db_queries_total', 'Database queries executed.', ('alias', 'statement')
+)
+DB_LATENCY = Histogram(
+    'db_query_duration_seconds', 'Database query execution time.', ('alias', 'statement'),
+    buckets=QUERY_LATENCY_BUCKETS
+)
+CHANNEL_PUBLISHES = Counter(
+    'channel_layer_publishes_total', 'Channel layer group_send calls.', ('group',)
+)
+CHANNEL_PUBLISH_LATENCY = Histogram(
+    'channel_layer_publish_duration_seconds', 'Channel layer group_send time.', ('group',),
+    buckets=QUERY_LATENCY_BUCKETS
+)
+WS_CONNECTIONS = Gauge(
+    'websocket_connections', 'Open WebSocket connections.', ('consumer',)
+)
+WS_CONNECTS = Counter(
+    'websocket_connects_total', 'WebSocket connections accepted.', ('consumer',)
+)
+WS_MESSAGES = Counter(
+    'websocket_messages_received_total', 'WebSocket frames received.', ('consumer',)
+)
+WS_HANDLER_LATENCY = Histogram(
+    'websocket_message_duration_seconds', 'Time to handle a received WebSocket frame.', ('consumer',)
+)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Database
+# ─────────────────────────────────────────────────────────────────────────────
+
+STATEMENTS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE'})
+
+
+def _statement(sql):
+    verb = sql.lstrip()[:6].upper()
+    return verb if verb in STATEMENTS else 'OTHER'
+
+
+def record_query(execute, sql, params, many, context):
+    # connection.execute_wrappers hook
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        labels = (context['connection'].alias, _statement(sql))
+        DB_QUERIES.inc(*labels)
+        DB_LATENCY.observe(elapsed, *labels)
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+def _wrap_connection(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Channel layer
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _group_prefix(group):
+    # "chat_12" -> "chat", "notifications_5" -> "notifications"
+    return re.split(r'[_.-]?\d', group, maxsplit=1)[0] or 'other'
+
+
+def _instrumented_group_send(group_send):
+
+    @wraps(group_send)
+    async def wrapper(self, group, message):
+        start = time.perf_counter()
+        try:
+            return await group_send(self, group, message)
+        finally:
+            label = _group_prefix(group)
+            CHANNEL_PUBLISHES.inc(label)
+            CHANNEL_PUBLISH_LATENCY.observe(time.perf_counter() - start, label)
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _instrument_channel_layers():
+    for config in getattr(settings, 'CHANNEL_LAYERS', {}).values():
+        try:
+            layer_class = import_string(config['BACKEND'])
+        except ImportError:
+            continue
+        if not getattr(layer_class.group_send, '_instrumented', False):
+            layer_class.group_send = _instrumented_group_send(layer_class.group_send)
+
+
+def install():
+    """Count queries on every new connection and wrap the channel layers' group_send."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    connection_created.connect(_wrap_connection, dispatch_uid='common.metrics')
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(None, connection)
+    _instrument_channel_layers()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HTTP
+# ─────────────────────────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        queries = [0]
+        token = _request_queries.set(queries)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+
+        match = getattr(request, 'resolver_match', None)
+        # Unresolved paths share one label so 404 probes can't grow the series
+        view = (match.view_name or match._func_path) if match is not None else 'unmatched'
+        HTTP_REQUESTS.inc(view, request.method, response.status_code)
+        HTTP_LATENCY.observe(time.perf_counter() - start, view, request.method)
+        HTTP_QUERIES.observe(queries[0], view)
+        return response
+
+
+def _allowed(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+
+
+def metrics_view(request):
+    if not _allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# WebSocket consumers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ConsumerMetricsMixin:
+    """
+    Counts a consumer's connections and received frames. List it before
+    the Channels consumer base class so its handlers wrap the base ones.
+    """
+
+    _metrics_open = False
+
+    @property
+    def _metrics_label(self):
+        return type(self).__name__
+
+    async def accept(self, *args, **kwargs):
+        await super().accept(*args, **kwargs)
+        if not self._metrics_open:
+            self._metrics_open = True
+            WS_CONNECTIONS.inc(self._metrics_label)
+            WS_CONNECTS.inc(self._metrics_label)
+
+    async def websocket_receive(self, message):
+        start = time.perf_counter()
+        try:
+            return await super().websocket_receive(message)
+        finally:
+            WS_MESSAGES.inc(self._metrics_label)
+            WS_HANDLER_LATENCY.observe(time.perf_counter() - start, self._metrics_label)
+
+    async def websocket_disconnect(self, message):
+        # The base handler ends by raising StopConsumer
+        if self._metrics_open:
+            self._metrics_open = False
+            WS_CONNECTIONS.dec(self._metrics_label)
+        return await super().websocket_disconnect(message)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:41
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('Tasks', '0004_activity_indexes'),
+        ('group', '0003_remove_groupmember_role'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('user', 'User'), ('group', 'Group'), ('resource', 'Resource')], max_length=10)),
+                ('title', models.CharField(max_length=255)),
+                ('document', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='group.studygroup')),
+                ('resource', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='Tasks.studyresource')),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'search_entries',
+                'indexes': [models.Index(fields=['category'], name='search_entr_categor_9a94b0_idx')],
+            },
+        ),
+    ]
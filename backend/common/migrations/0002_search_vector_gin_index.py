@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_gin_index(apps, schema_editor):
+    # tsvector GIN indexes only exist on PostgreSQL; other backends use the
+    # document fallback in common.search
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS search_entries_vector_gin "
+        "ON search_entries USING gin (search_vector)"
+    )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS search_entries_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_search_entry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
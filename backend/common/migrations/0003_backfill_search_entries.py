@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import migrations
+
+from common.search import entry_text, search_vector
+
+BATCH_SIZE = 2000
+
+
+def backfill_search_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('common', 'SearchEntry')
+
+    def flush(category, batch):
+        SearchEntry.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=[category],
+            update_fields=['title', 'document'],
+        )
+
+    for category, model in (
+        ('user', apps.get_model(settings.AUTH_USER_MODEL)),
+        ('group', apps.get_model('group', 'StudyGroup')),
+        ('resource', apps.get_model('Tasks', 'StudyResource')),
+    ):
+        batch = []
+        for obj in model.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            title, document = entry_text(category, obj)
+            batch.append(SearchEntry(
+                category=category, title=title, document=document, **{f'{category}_id': obj.pk}
+            ))
+            if len(batch) >= BATCH_SIZE:
+                flush(category, batch)
+                batch = []
+        if batch:
+            flush(category, batch)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        SearchEntry.objects.update(search_vector=search_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_search_vector_gin_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_entries, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,53 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-# Create your models here.
+
+class SearchEntry(models.Model):
+    """
+    One row per searchable object, maintained by common.signals.
+
+    On PostgreSQL `search_vector` carries a GIN-indexed tsvector; other
+    databases fall back to matching terms against the lowercased `document`.
+    """
+
+    class Category(models.TextChoices):
+        USER = 'user', 'User'
+        GROUP = 'group', 'Group'
+        RESOURCE = 'resource', 'Resource'
+
+    category = models.CharField(max_length=10, choices=Category.choices)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='search_entry'
+    )
+    group = models.OneToOneField(
+        'group.StudyGroup',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='search_entry'
+    )
+    resource = models.OneToOneField(
+        'Tasks.StudyResource',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='search_entry'
+    )
+    title = models.CharField(max_length=255)
+    document = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'search_entries'
+        indexes = [
+            models.Index(fields=['category']),
+        ]
+
+    def __str__(self):
+        return f"{self.category}: {self.title}"
@@ -0,0 +1,171 @@
+"""
+Global search index.
+
+Users, groups and study resources are mirrored into SearchEntry rows as
+they change. On PostgreSQL, searches run against a GIN-indexed tsvector
+with prefix matching and ts_rank ordering. Other databases (SQLite in
+tests and local development) fall back to term matching on the
+lowercased document.
+
+Each category is answered by one query. It joins the model to its entry,
+applies permission filters, ranks the rows, and carries the true match
+count in a window aggregate.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When, Window
+
+from group.models import GroupMember, StudyGroup
+from Tasks.models import StudyResource
+from .models import SearchEntry
+
+SEARCH_CONFIG = 'simple'
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def prefix_query(terms):
+    """tsquery matching documents that contain every term as a prefix."""
+    return SearchQuery(
+        ' & '.join(f"{term}:*" for term in terms),
+        search_type='raw',
+        config=SEARCH_CONFIG
+    )
+
+
+def _document(*parts):
+    return ' '.join(part for part in parts if part).lower()
+
+
+def entry_text(category, obj):
+    """The title and document of `obj`'s entry; works on historical models too."""
+    if category == SearchEntry.Category.GROUP:
+        title, body = obj.group_name, obj.group_description
+    elif category == SearchEntry.Category.RESOURCE:
+        title, body = obj.title, obj.description
+    else:
+        title = f"{obj.first_name} {obj.last_name}".strip() or obj.username
+        body = _document(obj.username, obj.email)
+    return title[:255], _document(title, body)
+
+
+def search_vector():
+    # Title terms weigh more than the rest of the document
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('document', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class SearchIndex:
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Indexing
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def build_entry(obj):
+        """Return an unsaved SearchEntry for a user, group or resource."""
+        if isinstance(obj, StudyGroup):
+            category = SearchEntry.Category.GROUP
+        elif isinstance(obj, StudyResource):
+            category = SearchEntry.Category.RESOURCE
+        else:
+            category = SearchEntry.Category.USER
+
+        title, document = entry_text(category, obj)
+        return SearchEntry(category=category, title=title, document=document, **{category: obj})
+
+    @classmethod
+    def index(cls, obj):
+        entry = cls.build_entry(obj)
+        entry, _ = SearchEntry.objects.update_or_create(
+            **{entry.category: obj},
+            defaults={
+                'category': entry.category,
+                'title': entry.title,
+                'document': entry.document,
+            }
+        )
+        if is_postgres():
+            SearchEntry.objects.filter(pk=entry.pk).update(search_vector=search_vector())
+        return entry
+
+    @classmethod
+    def bulk_index(cls, objects):
+        """Upsert entries for a batch of objects of the same category."""
+        entries = [cls.build_entry(obj) for obj in objects]
+        if not entries:
+            return 0
+        category = entries[0].category
+        SearchEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=[category],
+            update_fields=['title', 'document'],
+        )
+        if is_postgres():
+            SearchEntry.objects.filter(
+                **{f'{category}__in': objects}
+            ).update(search_vector=search_vector())
+        return len(entries)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Querying
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def search(cls, queryset, query, limit):
+        """
+        Rank `queryset` (a model with a `search_entry` relation) against the
+        query. Returns (results, total) from a single SQL statement.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return [], 0
+
+        if is_postgres():
+            ts_query = prefix_query(terms)
+            queryset = queryset.filter(search_entry__search_vector=ts_query).annotate(
+                rank=SearchRank(F('search_entry__search_vector'), ts_query)
+            )
+        else:
+            for term in terms:
+                queryset = queryset.filter(search_entry__document__contains=term)
+            # Rank by how many terms hit the title
+            queryset = queryset.annotate(rank=sum(
+                (Case(When(search_entry__title__icontains=term, then=Value(1)),
+                      default=Value(0), output_field=IntegerField())
+                 for term in terms),
+                Value(0)
+            ))
+
+        rows = list(
+            queryset.annotate(search_total=Window(Count('pk')))
+            .order_by('-rank', '-pk')[:limit]
+        )
+        total = rows[0].search_total if rows else 0
+        return rows, total
+
+    @staticmethod
+    def member_group_ids(user):
+        return GroupMember.objects.filter(
+            user=user, is_active=True
+        ).values('group_id')
+
+    @classmethod
+    def visible_groups_filter(cls, user):
+        return Q(is_public=True) | Q(pk__in=cls.member_group_ids(user))
+
+    @classmethod
+    def visible_resources_filter(cls, user):
+        return Q(group_id__in=cls.member_group_ids(user))
@@ -15,7 +15,7 @@ class UserDashboardSerilizer(serializers.Serializer):
     unread_notifications = serializers.SerializerMethodField()
 
     def get_recent_groups(self, obj):
-        recent_groups = StudyGroup.objects.filter(
+        recent_groups = StudyGroup.objects.with_member_info(obj).filter(
             members__user = obj,
             members__is_active=True
         ).order_by('members__joined_at')[:5]
@@ -25,14 +25,14 @@ class UserDashboardSerilizer(serializers.Serializer):
         pending_tasks = Task.objects.filter(
             assigned_to=obj,
             status__in=['pending', 'in_progress']
-        ).order_by('due_date')[:5]
+        ).select_related('assigned_to', 'created_by', 'group').order_by('due_date')[:5]
         return TaskBasicSerializer(pending_tasks, many=True).data
     
     def get_unread_notifications(self, obj):
         unread_notifications = Notification.objects.filter(
             user=obj,
             is_read=False
-        ).order_by('-created_at')[:5]
+        ).select_related('related_group').order_by('-created_at')[:5]
         return NotificationSerializer(unread_notifications,many=True).data
 
 # analytics Serilizers
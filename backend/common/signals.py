@@ -0,0 +1,328 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from group.analytics import GroupAnalytics
+from group.models import GroupActivityDay, GroupMember, StudyGroup
+from Message.models import ConversationMember, Message
+from Message.search import MessageSearch
+from Notifications.models import Notification
+from Notifications.reminders import reminders
+from planner.models import StudySession
+from subscriptions.entitlements import Entitlement
+from subscriptions.models import UserSubscription
+from Tasks.cache import TaskListCache
+from Tasks.models import StudyResource, Task
+from .live_counters import LiveCounters
+from .search import SearchIndex
+from .snapshots import DashboardSnapshot
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tasks
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _is_pending(status):
+    return status in LiveCounters.PENDING_STATUSES
+
+
+@receiver(post_init, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    # Keep the loaded assignee, group and status so saves can derive deltas
+    instance._loaded_assignee_id = instance.assigned_to_id
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_status = instance.status
+    instance._loaded_due_date = instance.due_date
+
+
+def _is_completed(status):
+    return status == Task.TaskStatus.completed
+
+
+def _bump_task_lists(task, old_assignee_id=None, old_group_id=None):
+    TaskListCache.bump_users([task.assigned_to_id, task.created_by_id, old_assignee_id])
+    TaskListCache.bump_groups([task.group_id, old_group_id])
+
+
+def tasks_bulk_saved(tasks, created=False):
+    """
+    Apply the effects of saving `tasks`. This is the post_save receiver's
+    body, and bulk_create()/bulk_update() callers replay it for a batch.
+    """
+    assignees = set()
+    deltas = {}
+    rescheduled = []
+    activity = []
+    for task in tasks:
+        old_assignee_id = None if created else task._loaded_assignee_id
+        old_group_id = None if created else task._loaded_group_id
+        old_pending = not created and _is_pending(task._loaded_status)
+        new_pending = _is_pending(task.status)
+        activity.append((
+            old_group_id, not created and _is_completed(task._loaded_status),
+            task.group_id, _is_completed(task.status)
+        ))
+
+        _bump_task_lists(task, old_assignee_id, old_group_id)
+        assignees.update(uid for uid in (task.assigned_to_id, old_assignee_id) if uid)
+
+        if old_pending:
+            deltas[old_assignee_id] = deltas.get(old_assignee_id, 0) - 1
+        if new_pending:
+            deltas[task.assigned_to_id] = deltas.get(task.assigned_to_id, 0) + 1
+
+        if created or (
+            task.assigned_to_id != task._loaded_assignee_id
+            or task.status != task._loaded_status
+            or task.due_date != task._loaded_due_date
+        ):
+            rescheduled.append(task)
+
+        task._loaded_assignee_id = task.assigned_to_id
+        task._loaded_group_id = task.group_id
+        task._loaded_status = task.status
+        task._loaded_due_date = task.due_date
+
+    DashboardSnapshot.invalidate_many(assignees)
+    LiveCounters.adjust_many(LiveCounters.PENDING_TASKS, deltas)
+    GroupAnalytics.record_tasks(activity)
+    if rescheduled:
+        reminders.schedule_tasks(rescheduled)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    tasks_bulk_saved([instance], created=created)
+
+
+def _deleting_group(origin):
+    # A group's delete reaches its tasks and messages after its rollup rows
+    return isinstance(origin, StudyGroup) or getattr(origin, 'model', None) is StudyGroup
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    _bump_task_lists(instance)
+    DashboardSnapshot.invalidate(instance.assigned_to_id)
+    if _is_pending(instance._loaded_status):
+        LiveCounters.adjust(instance.assigned_to_id, LiveCounters.PENDING_TASKS, -1)
+    if _deleting_group(origin):
+        return
+    GroupAnalytics.record_tasks([
+        (instance._loaded_group_id, _is_completed(instance._loaded_status), None, False)
+    ])
+
+
+def tasks_bulk_updated(rows, new_status, task_ids=None):
+    """
+    Replay task signals for a queryset update(), which skips them. `rows`
+    are (assigned_to_id, created_by_id, group_id, old_status) tuples for
+    the updated tasks; pass `task_ids` to cancel their reminders when the
+    new status closes them.
+    """
+    if task_ids and new_status not in Task.OPEN_STATUSES:
+        reminders.cancel_tasks(task_ids)
+    deltas = {}
+    for assigned_to_id, _, _, old_status in rows:
+        delta = int(_is_pending(new_status)) - int(_is_pending(old_status))
+        if delta:
+            deltas[assigned_to_id] = deltas.get(assigned_to_id, 0) + delta
+    TaskListCache.bump_users({uid for row in rows for uid in row[:2]})
+    TaskListCache.bump_groups({row[2] for row in rows})
+    DashboardSnapshot.invalidate_many(row[0] for row in rows)
+    LiveCounters.adjust_many(LiveCounters.PENDING_TASKS, deltas)
+    GroupAnalytics.record_tasks(
+        (group_id, _is_completed(old_status), group_id, _is_completed(new_status))
+        for _, _, group_id, old_status in rows
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Messages
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _conversation_member_ids(conversation_id):
+    return ConversationMember.objects.filter(
+        conversation_id=conversation_id
+    ).values_list('user_id', flat=True)
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, update_fields=None, **kwargs):
+    if MessageSearch.needs_index(created, update_fields):
+        MessageSearch.index([instance.pk])
+    if created:
+        GroupAnalytics.record_message(instance)
+
+    if not created or instance.is_read:
+        return
+    LiveCounters.adjust_many(LiveCounters.UNREAD_MESSAGES, {
+        user_id: 1
+        for user_id in _conversation_member_ids(instance.conversation_id)
+        if user_id != instance.sender_id
+    })
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleting_group(origin):
+        GroupAnalytics.record_message(instance, delta=-1)
+    if instance.is_read:
+        return
+    LiveCounters.adjust_many(LiveCounters.UNREAD_MESSAGES, {
+        user_id: -1
+        for user_id in _conversation_member_ids(instance.conversation_id)
+        if user_id != instance.sender_id
+    })
+
+
+def messages_marked_read(conversation_id, sender_ids):
+    """
+    Replay message signals for a bulk mark-as-read. `sender_ids` holds the
+    sender of every message that flipped to read.
+    """
+    deltas = {}
+    for user_id in _conversation_member_ids(conversation_id):
+        delta = sum(1 for sender_id in sender_ids if sender_id != user_id)
+        if delta:
+            deltas[user_id] = -delta
+    LiveCounters.adjust_many(LiveCounters.UNREAD_MESSAGES, deltas)
+
+
+@receiver(post_save, sender=ConversationMember)
+def conversation_member_saved(sender, instance, created, **kwargs):
+    # Joining brings a whole history of messages, so recount
+    if created:
+        LiveCounters.reset(instance.user_id, LiveCounters.UNREAD_MESSAGES)
+
+
+@receiver(post_delete, sender=ConversationMember)
+def conversation_member_deleted(sender, instance, **kwargs):
+    LiveCounters.reset(instance.user_id, LiveCounters.UNREAD_MESSAGES)
+
+
+def conversation_members_bulk_created(user_ids):
+    """Replay conversation member signals for bulk_create(), which skips them."""
+    for user_id in set(user_ids):
+        LiveCounters.reset(user_id, LiveCounters.UNREAD_MESSAGES)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Notifications
+# ─────────────────────────────────────────────────────────────────────────────
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def notification_changed(sender, instance, created=False, **kwargs):
+    DashboardSnapshot.invalidate(instance.user_id)
+    if created:
+        LiveCounters.record_notifications([instance.user_id])
+
+
+def notifications_bulk_created(notifications):
+    """Replay notification signals for bulk_create(), which skips them."""
+    user_ids = [n.user_id for n in notifications]
+    DashboardSnapshot.invalidate_many(user_ids)
+    LiveCounters.record_notifications(user_ids)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Groups
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _invalidate_member_dashboards(group_id, user_ids):
+    # Every member's dashboard shows the group's member count
+    DashboardSnapshot.invalidate_many(set(user_ids).union(
+        GroupMember.objects.filter(group_id=group_id, is_active=True).values_list('user_id', flat=True)
+    ))
+
+
+@receiver(post_save, sender=GroupMember)
+@receiver(post_delete, sender=GroupMember)
+def membership_changed(sender, instance, **kwargs):
+    # Group membership decides which tasks the user can list
+    TaskListCache.bump_users([instance.user_id])
+    _invalidate_member_dashboards(instance.group_id, [instance.user_id])
+
+
+def memberships_bulk_changed(group_id, user_ids):
+    """Replay membership signals for a queryset update() or bulk_create()."""
+    user_ids = set(user_ids)
+    TaskListCache.bump_users(user_ids)
+    _invalidate_member_dashboards(group_id, user_ids)
+
+
+def _bump_task_lists_showing(tasks):
+    # Rows embed group names and user profiles, which no task version covers
+    rows = list(tasks.order_by().values_list('assigned_to_id', 'created_by_id', 'group_id').distinct())
+    TaskListCache.bump_users({uid for row in rows for uid in row[:2]})
+    TaskListCache.bump_groups({row[2] for row in rows})
+
+
+@receiver(post_save, sender=StudyGroup)
+def group_saved(sender, instance, created, **kwargs):
+    SearchIndex.index(instance)
+    if created:
+        return
+    _bump_task_lists_showing(Task.objects.filter(group=instance))
+    DashboardSnapshot.invalidate_many(
+        instance.members.filter(is_active=True).values_list('user_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=StudyGroup)
+def group_deleted(sender, instance, **kwargs):
+    # Cascades from elsewhere, like a deleted owner, still record their
+    # tasks and messages after the rollup rows went; drop those before commit
+    GroupActivityDay.objects.filter(group_id=instance.pk).delete()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Resources
+# ─────────────────────────────────────────────────────────────────────────────
+
+@receiver(post_save, sender=StudyResource)
+def resource_saved(sender, instance, **kwargs):
+    SearchIndex.index(instance)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Profile
+# ─────────────────────────────────────────────────────────────────────────────
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which neither the dashboard nor search show
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    SearchIndex.index(instance)
+    if not created:
+        DashboardSnapshot.invalidate(instance.id)
+        _bump_task_lists_showing(
+            Task.objects.filter(Q(assigned_to=instance) | Q(created_by=instance))
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Study sessions
+# ─────────────────────────────────────────────────────────────────────────────
+
+@receiver(post_save, sender=StudySession)
+def session_saved(sender, instance, **kwargs):
+    # Reschedules, cancellations and completions all replace the reminders
+    reminders.schedule_session(instance)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Subscriptions
+# ─────────────────────────────────────────────────────────────────────────────
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def subscription_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: Entitlement.invalidate(user_id))
@@ -0,0 +1,93 @@
+"""
+Per-user dashboard snapshots.
+
+The dashboard payload is built once and kept in the cache. Task,
+notification and group membership changes mark the snapshot dirty and
+queue a background rebuild, so reads are a single cache hit. Membership
+changes mark every active member of the group, whose snapshots show its
+member count. A dirty
+snapshot is still served until it is MAX_STALENESS seconds old, after
+which the next read rebuilds it inline.
+"""
+
+import logging
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .utils import enqueue_task
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+class DashboardSnapshot:
+    # Hard upper bound on how long a snapshot lives in the cache
+    CACHE_TTL = 60 * 60
+    # How long a dirty snapshot may still be served while a rebuild is pending
+    MAX_STALENESS = 30
+
+    @staticmethod
+    def cache_key(user_id):
+        return f"dashboard_snapshot_{user_id}"
+
+    @staticmethod
+    def dirty_key(user_id):
+        return f"dashboard_snapshot_dirty_{user_id}"
+
+    @classmethod
+    def build(cls, user):
+        """Serialize the dashboard for a user and store it in the cache."""
+        from .serializers import UserDashboardSerilizer
+
+        dirty_before = cache.get(cls.dirty_key(user.id))
+        data = UserDashboardSerilizer(user, context={'user': user}).data
+        snapshot = {'built_at': time.time(), 'data': data}
+        cache.set(cls.cache_key(user.id), snapshot, timeout=cls.CACHE_TTL)
+
+        # Keep the dirty marker if another change landed while we were building
+        if cache.get(cls.dirty_key(user.id)) == dirty_before:
+            cache.delete(cls.dirty_key(user.id))
+        return data
+
+    @classmethod
+    def get(cls, user):
+        """Return the dashboard payload, rebuilding only when missing or too stale."""
+        snapshot = cache.get(cls.cache_key(user.id))
+        if snapshot is not None:
+            dirty = cache.get(cls.dirty_key(user.id))
+            if dirty is None or time.time() - dirty[0] < cls.MAX_STALENESS:
+                return snapshot['data']
+        return cls.build(user)
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """Mark a user's snapshot stale and queue a background rebuild."""
+        if not user_id:
+            return
+        # Keep the first dirty timestamp so staleness stays bounded, and
+        # record the latest one so in-flight rebuilds notice new changes
+        now = time.time()
+        dirty = cache.get(cls.dirty_key(user_id))
+        first_dirty_at = dirty[0] if dirty else now
+        cache.set(cls.dirty_key(user_id), (first_dirty_at, now), timeout=cls.CACHE_TTL)
+
+        from .tasks import rebuild_dashboard_snapshot
+        if not enqueue_task(rebuild_dashboard_snapshot, user_id):
+            # No worker to rebuild it, so drop it and let the next read rebuild
+            cache.delete(cls.cache_key(user_id))
+
+    @classmethod
+    def invalidate_many(cls, user_ids):
+        for user_id in set(user_ids):
+            cls.invalidate(user_id)
+
+    @classmethod
+    def rebuild(cls, user_id):
+        try:
+            user = User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            cache.delete_many([cls.cache_key(user_id), cls.dirty_key(user_id)])
+            return None
+        return cls.build(user)
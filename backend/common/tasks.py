@@ -0,0 +1,12 @@
+from celery import shared_task
+import logging
+
+from .snapshots import DashboardSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def rebuild_dashboard_snapshot(user_id):
+    DashboardSnapshot.rebuild(user_id)
+    logger.debug(f"Rebuilt dashboard snapshot for user {user_id}")
@@ -1,3 +1,830 @@
-from django.test import TestCase
+import json
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from group.discovery import GroupDiscovery
+from group.models import StudyGroup, GroupMember
+from Message.models import Conversation, ConversationMember, Message
+from Notifications.models import Notification
+from Tasks.models import Task
+from . import metrics
+from .snapshots import DashboardSnapshot
+from .utils import absolute_url
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DashboardSnapshotTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        GroupMember.objects.create(user=self.user, group=self.group)
+        self.url = reverse('user-dashboard')
+        self.client.force_authenticate(user=self.user)
+
+    def _create_task(self, title):
+        return Task.objects.create(
+            title=title,
+            assigned_to=self.user,
+            created_by=self.user,
+            group=self.group,
+            due_date=timezone.now() + timedelta(days=1)
+        )
+
+    def test_second_read_is_served_from_snapshot(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.data, second.data)
+
+    def test_task_change_invalidates_snapshot(self):
+        self.client.get(self.url)
+        self._create_task('Homework 1')
+
+        response = self.client.get(self.url)
+        titles = [task['title'] for task in response.data['pending_tasks']]
+        self.assertEqual(titles, ['Homework 1'])
+
+    def test_leaving_group_invalidates_snapshot(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['recent_groups']), 1)
+
+        member = GroupMember.objects.get(user=self.user, group=self.group)
+        member.is_active = False
+        member.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['recent_groups'], [])
+
+    def test_join_refreshes_member_count_in_co_member_snapshots(self):
+        response = self.client.get(self.url)
+        before = response.data['recent_groups'][0]['member_count']
+
+        other = User.objects.create_user(email='other@test.com', username='other', password='password123')
+        self.client.force_authenticate(user=other)
+        self.client.post(reverse('studygroup-join', kwargs={'pk': self.group.pk}))
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['recent_groups'][0]['member_count'], before + 1)
+
+    @override_settings(BACKEND_URL='https://api.example.com')
+    def test_snapshot_urls_are_absolute_without_a_request(self):
+        self.assertEqual(
+            absolute_url('/media/groups/algebra.png'), 'https://api.example.com/media/groups/algebra.png'
+        )
+        self.assertEqual(
+            absolute_url('https://cdn.example.com/algebra.png'), 'https://cdn.example.com/algebra.png'
+        )
+
+    def test_dirty_snapshot_is_served_within_staleness_bound(self):
+        DashboardSnapshot.build(self.user)
+        cache.set(DashboardSnapshot.dirty_key(self.user.id), (timezone.now().timestamp(),) * 2)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        expired = timezone.now().timestamp() - DashboardSnapshot.MAX_STALENESS - 1
+        cache.set(DashboardSnapshot.dirty_key(self.user.id), (expired, expired))
+        self.client.get(self.url)
+        self.assertIsNone(cache.get(DashboardSnapshot.dirty_key(self.user.id)))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ActivityAnalyticsTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        GroupMember.objects.create(user=self.user, group=self.group)
+        self.url = reverse('user-analytics')
+        self.client.force_authenticate(user=self.user)
+
+    def test_analytics_is_a_single_query(self):
+        completed_at = timezone.now() - timedelta(days=2)
+        Task.objects.create(
+            title='Essay',
+            assigned_to=self.user,
+            created_by=self.user,
+            group=self.group,
+            status='completed',
+            completed_at=completed_at,
+            due_date=timezone.now() + timedelta(days=1)
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tasks_completed'], 1)
+        self.assertEqual(response.data['groups_joined'], 1)
+        self.assertEqual(response.data['messages_sent'], 0)
+        self.assertEqual(response.data['last_active'], completed_at)
+        self.assertEqual(response.data['window_days'], 7)
+
+    def test_window_excludes_older_activity(self):
+        Task.objects.create(
+            title='Old essay',
+            assigned_to=self.user,
+            created_by=self.user,
+            group=self.group,
+            status='completed',
+            completed_at=timezone.now() - timedelta(days=10),
+            due_date=timezone.now() + timedelta(days=1)
+        )
+        self.assertEqual(self.client.get(self.url).data['tasks_completed'], 0)
+        self.assertEqual(self.client.get(self.url, {'days': 30}).data['tasks_completed'], 1)
+
+    def test_invalid_window_is_rejected(self):
+        for days in ('abc', '0', '1000'):
+            response = self.client.get(self.url, {'days': days})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LiveUpdatesTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.peer = User.objects.create_user(
+            email='peer@test.com',
+            username='peer',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        GroupMember.objects.create(user=self.user, group=self.group)
+        GroupMember.objects.create(user=self.peer, group=self.group)
+        self.conversation = Conversation.objects.create(type='group', group=self.group)
+        ConversationMember.objects.create(conversation=self.conversation, user=self.user)
+        ConversationMember.objects.create(conversation=self.conversation, user=self.peer)
+        self.url = reverse('live-updates')
+        self.client.force_authenticate(user=self.user)
+
+    def _counters(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data[0]
+
+    def test_counters_follow_events_without_recounting(self):
+        counters = self._counters()
+        self.assertEqual(counters['unread_messages'], 0)
+        self.assertEqual(counters['pending_tasks'], 0)
+        self.assertEqual(counters['recent_notifications'], 0)
+
+        Message.objects.create(conversation=self.conversation, sender=self.peer, content='hi')
+        Message.objects.create(conversation=self.conversation, sender=self.user, content='hey')
+        task = Task.objects.create(
+            title='Essay',
+            assigned_to=self.user,
+            created_by=self.peer,
+            group=self.group,
+            due_date=timezone.now() + timedelta(days=1)
+        )
+        Notification.objects.create(user=self.user, notification_type='task', title='t', message='m')
+
+        with self.assertNumQueries(0):
+            counters = self._counters()
+        self.assertEqual(counters['unread_messages'], 1)
+        self.assertEqual(counters['pending_tasks'], 1)
+        self.assertEqual(counters['recent_notifications'], 1)
+
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(self._counters()['pending_tasks'], 0)
+
+    def test_mark_read_decrements_unread_messages(self):
+        Message.objects.create(conversation=self.conversation, sender=self.peer, content='hi')
+        self.assertEqual(self._counters()['unread_messages'], 1)
+
+        response = self.client.post(
+            reverse('message-mark-read'), {'conversation_id': self.conversation.id}
+        )
+        self.assertEqual(response.data['marked'], 1)
+        self.assertEqual(self._counters()['unread_messages'], 0)
+
+    def test_reassignment_moves_pending_task(self):
+        task = Task.objects.create(
+            title='Essay',
+            assigned_to=self.user,
+            created_by=self.peer,
+            group=self.group,
+            due_date=timezone.now() + timedelta(days=1)
+        )
+        self.assertEqual(self._counters()['pending_tasks'], 1)
+
+        task.assigned_to = self.peer
+        task.save()
+        self.assertEqual(self._counters()['pending_tasks'], 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class GlobalSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.other = User.objects.create_user(
+            email='ada@test.com',
+            username='ada',
+            first_name='Ada',
+            last_name='Lovelace',
+            password='password123'
+        )
+        self.public_group = StudyGroup.objects.create(
+            group_name='Calculus Club', group_description='Limits and series', created_by=self.other
+        )
+        self.private_group = StudyGroup.objects.create(
+            group_name='Calculus Secret', created_by=self.other, is_public=False
+        )
+        self.member_group = StudyGroup.objects.create(
+            group_name='Private Calculus Lab', created_by=self.other, is_public=False
+        )
+        GroupMember.objects.create(user=self.user, group=self.member_group)
+        self.url = reverse('global-search')
+        self.client.force_authenticate(user=self.user)
+
+    def test_index_follows_model_changes(self):
+        response = self.client.get(self.url, {'q': 'lovelace', 'type': 'users'})
+        self.assertEqual(response.data['users']['count'], 1)
+
+        self.other.last_name = 'Byron'
+        self.other.save()
+        response = self.client.get(self.url, {'q': 'lovelace', 'type': 'users'})
+        self.assertEqual(response.data['users']['count'], 0)
+
+    def test_groups_are_permission_filtered_and_ranked(self):
+        response = self.client.get(self.url, {'q': 'calc', 'type': 'groups'})
+        names = [group['group_name'] for group in response.data['groups']['results']]
+        self.assertEqual(set(names), {'Calculus Club', 'Private Calculus Lab'})
+
+        response = self.client.get(self.url, {'q': 'series', 'type': 'groups'})
+        self.assertEqual(response.data['groups']['count'], 1)
+
+    def test_count_is_total_matches_not_page_size(self):
+        for i in range(4):
+            StudyGroup.objects.create(group_name=f'Calculus {i}', created_by=self.other)
+
+        response = self.client.get(self.url, {'q': 'calculus', 'type': 'groups', 'limit': 2})
+        self.assertEqual(len(response.data['groups']['results']), 2)
+        self.assertEqual(response.data['groups']['count'], 6)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_INSTRUMENTATION_SLOW_MS=None)
+class RequestInstrumentationTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(REQUEST_INSTRUMENTATION_SAMPLE_RATE=1.0)
+    def test_sampled_request_logs_query_and_serializer_metrics(self):
+        with self.assertLogs('studybuddy.requests', level='INFO') as logs:
+            response = self.client.get(reverse('user-dashboard'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(logs.records), 1)
+        metrics = logs.records[0].request_metrics
+        self.assertEqual(metrics['view'], 'user-dashboard')
+        self.assertEqual(metrics['status'], 200)
+        self.assertEqual(metrics['user_id'], self.user.id)
+        self.assertGreater(metrics['db_queries'], 0)
+        self.assertIn('serializer_ms', metrics)
+        self.assertIn(f"db_queries={metrics['db_queries']}", logs.output[0])
+
+    @override_settings(REQUEST_INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_request_logs_nothing(self):
+        with self.assertNoLogs('studybuddy.requests'):
+            self.client.get(reverse('user-dashboard'))
+
+    @override_settings(REQUEST_INSTRUMENTATION_SAMPLE_RATE=0.0, REQUEST_INSTRUMENTATION_SLOW_MS=0)
+    def test_slow_request_is_logged_without_sampling(self):
+        with self.assertLogs('studybuddy.requests', level='WARNING') as logs:
+            self.client.get(reverse('user-dashboard'))
+
+        metrics = logs.records[0].request_metrics
+        self.assertNotIn('db_queries', metrics)
+        self.assertEqual(metrics['view'], 'user-dashboard')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.peer = User.objects.create_user(
+            email='peer@test.com',
+            username='peer',
+            password='password123'
+        )
+        self.group = StudyGroup.objects.create(group_name='Algebra', created_by=self.user)
+        GroupMember.objects.bulk_create([
+            GroupMember(group=self.group, user=self.user),
+            GroupMember(group=self.group, user=self.peer),
+        ])
+        self.client.force_authenticate(user=self.user)
+
+    def _create_tasks(self, count, assigned_to=None):
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                assigned_to=assigned_to or self.user,
+                created_by=self.user,
+                group=self.group,
+                due_date=timezone.now() + timedelta(days=1)
+            )
+            for i in range(count)
+        ])
+
+    def _follow(self, url, params=None):
+        titles = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles.extend(row['title'] for row in response.data['results'])
+            if not response.data['next']:
+                return titles
+            response = self.client.get(response.data['next'])
+
+    def test_list_is_cursor_paginated_by_default(self):
+        self._create_tasks(120)
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+        titles = self._follow(reverse('task-list'))
+        self.assertEqual(len(titles), 120)
+        self.assertEqual(len(set(titles)), 120)
+
+    def test_page_size_is_capped(self):
+        self._create_tasks(250)
+        response = self.client.get(reverse('task-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 200)
+
+    def test_team_tasks_are_paginated(self):
+        self._create_tasks(70, assigned_to=self.peer)
+        titles = self._follow(reverse('task-team-tasks'))
+        self.assertEqual(len(titles), 70)
+
+    def test_messages_page_newest_first(self):
+        conversation = Conversation.objects.create(type='group', group=self.group)
+        ConversationMember.objects.create(conversation=conversation, user=self.user)
+        Message.objects.bulk_create([
+            Message(
+                conversation=conversation,
+                sender=self.user,
+                content=f'message {i}',
+                timestamp=timezone.now() - timedelta(minutes=60 - i)
+            )
+            for i in range(60)
+        ])
+        response = self.client.get(reverse('message-list'), {'conversation_id': conversation.pk})
+        contents = [row['content'] for row in response.data['results']]
+        self.assertEqual(contents[0], 'message 59')
+        self.assertEqual(len(contents), 50)
+
+    def test_export_streams_every_row(self):
+        self._create_tasks(1100)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('task-export'))
+            self.assertTrue(response.streaming)
+            body = b''.join(response.streaming_content)
+        rows = json.loads(body)
+        self.assertEqual(len(rows), 1100)
+        self.assertEqual(len({row['id'] for row in rows}), 1100)
+        # One query per chunk of rows, not per row
+        self.assertLess(len(queries), 10)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_empty_export_is_an_empty_array(self):
+        response = self.client.get(reverse('task-export'))
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_TOKEN='', METRICS_ALLOWED_IPS=['127.0.0.1'])
+@override_settings(METRICS_TOKEN='', METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _scrape(self, **extra):
+        response = self.client.get(reverse('metrics'), **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_request_is_counted_by_view_with_its_queries(self):
+        requests = metrics.HTTP_REQUESTS.value('user-dashboard', 'GET', 200)
+        observed = metrics.HTTP_QUERIES.value('user-dashboard')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('user-dashboard'))
+
+        self.assertEqual(metrics.HTTP_REQUESTS.value('user-dashboard', 'GET', 200), requests + 1)
+        self.assertEqual(metrics.HTTP_QUERIES.value('user-dashboard'), observed + 1)
+        self.assertGreaterEqual(metrics.DB_QUERIES.value('default', 'SELECT'), len(queries))
+
+        body = self._scrape()
+        self.assertIn('http_requests_total{view="user-dashboard",method="GET",status="200"}', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="user-dashboard",method="GET",le="+Inf"}', body)
+        self.assertIn('# TYPE db_query_duration_seconds histogram', body)
+
+    def test_unresolved_paths_share_a_label(self):
+        before = metrics.HTTP_REQUESTS.value('unmatched', 'GET', 404)
+        self.client.get('/no-such-page/1/')
+        self.client.get('/no-such-page/2/')
+        self.assertEqual(metrics.HTTP_REQUESTS.value('unmatched', 'GET', 404), before + 2)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', ('kind',), buckets=(0.1, 1.0))
+        metrics._metrics.remove(histogram)
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, 'a')
+
+        lines = histogram.render().splitlines()
+        self.assertEqual(lines[2:], [
+            'test_seconds_bucket{kind="a",le="0.1"} 2.0',
+            'test_seconds_bucket{kind="a",le="1.0"} 3.0',
+            'test_seconds_bucket{kind="a",le="+Inf"} 4.0',
+            'test_seconds_sum{kind="a"} 3.65',
+            'test_seconds_count{kind="a"} 4.0',
+        ])
+
+    def test_channel_layer_publishes_are_counted_by_group_prefix(self):
+        before = metrics.CHANNEL_PUBLISHES.value('chat')
+        async_to_sync(get_channel_layer().group_send)('chat_42', {'type': 'chat.message'})
+        self.assertEqual(metrics.CHANNEL_PUBLISHES.value('chat'), before + 1)
+
+    def test_consumer_connections_and_frames(self):
+        class EchoConsumer(metrics.ConsumerMetricsMixin, AsyncWebsocketConsumer):
+            async def receive(self, text_data=None, bytes_data=None):
+                await self.send(text_data=text_data)
+
+        async def session():
+            communicator = WebsocketCommunicator(EchoConsumer.as_asgi(), '/ws/echo/')
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            open_connections = metrics.WS_CONNECTIONS.value('EchoConsumer')
+            await communicator.send_to(text_data='ping')
+            self.assertEqual(await communicator.receive_from(), 'ping')
+            await communicator.disconnect()
+            return open_connections
+
+        self.assertEqual(async_to_sync(session)(), 1)
+        self.assertEqual(metrics.WS_CONNECTIONS.value('EchoConsumer'), 0)
+        self.assertEqual(metrics.WS_CONNECTS.value('EchoConsumer'), 1)
+        self.assertEqual(metrics.WS_MESSAGES.value('EchoConsumer'), 1)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_endpoint_refuses_other_addresses(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_endpoint_refuses_everyone_without_token_or_addresses(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_endpoint_requires_the_token_when_set(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        self._scrape(HTTP_AUTHORIZATION='Bearer scrape-secret')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Query budgets
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Wall-clock ceiling per request against the seeded data. Generous on
+# purpose: query counts are the precise check, this one catches requests
+# that stay under their query budget but do far too much work per row.
+LATENCY_BUDGET_MS = 1500
+
+# (url name, kwargs, query params, max queries) per read endpoint. Each
+# endpoint is measured at one and at three seeded batches (see
+# QueryBudgetTests) and must run the same number of queries at both, so a
+# per-row query fails however small the fixture; the budget caps that
+# constant count.
+ENDPOINT_QUERY_BUDGETS = [
+    # accounts
+    ('customuser-profile', {}, {}, 1),
+    ('customuser-search', {}, {'q': 'peer'}, 1),
+    # common
+    ('user-dashboard', {}, {}, 3),
+    ('user-analytics', {}, {}, 1),
+    ('live-updates', {}, {}, 3),
+    ('global-search', {}, {'q': 'algebra'}, 3),
+    # groups
+    ('studygroup-list', {}, {}, 1),
+    ('studygroup-my-groups', {}, {}, 1),
+    ('studygroup-search', {}, {'q': 'group'}, 1),
+    ('studygroup-discover', {}, {}, 2),
+    ('studygroup-detail', {'pk': 'group'}, {}, 2),
+    ('studygroup-members', {'pk': 'group'}, {}, 2),
+    ('studygroup-analytics', {'pk': 'group'}, {}, 2),
+    ('groupmember-list', {}, {}, 1),
+    # messages
+    ('conversation-list', {}, {}, 2),
+    ('conversation-individual-list', {}, {}, 2),
+    ('conversation-group-list', {}, {}, 1),
+    ('message-list', {}, {'conversation_id': 'conversation'}, 1),
+    ('message-search', {}, {'q': 'hello'}, 1),
+    # notifications
+    ('notification-list', {}, {}, 1),
+    ('notification-unread', {}, {}, 1),
+    # tasks
+    ('task-list', {}, {}, 2),
+    ('task-my-tasks', {}, {}, 5),
+    ('task-team-tasks', {}, {}, 1),
+    ('task-upcoming', {}, {}, 1),
+    ('task-overdue', {}, {}, 1),
+    ('task-statistics', {}, {}, 1),
+    ('studyresource-list', {}, {}, 1),
+    ('studyresource-popular', {}, {}, 1),
+    # planner, files, pomodoro
+    ('session-list', {}, {}, 1),
+    ('session-upcoming', {}, {}, 1),
+    ('file-list', {}, {}, 1),
+    ('pomodoro-list', {}, {}, 1),
+    # subscriptions
+    ('subscription-plans-list', {}, {}, 1),
+    ('subscriptions-my-subscription', {}, {}, 1),
+    ('subscriptions-history', {}, {}, 1),
+    # study tracker
+    ('activity-heatmap', {}, {}, 1),
+    ('streak-dashboard', {}, {}, 7),
+]
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_INSTRUMENTATION_SAMPLE_RATE=0.0)
+class QueryBudgetTests(APITestCase):
+    """
+    Seeds an account batch by batch and asserts every read endpoint runs
+    the same queries whatever the volume, within its query and latency
+    budget, so N+1 regressions fail the suite. Batches stay under a page
+    so more rows always means more rows serialized.
+    """
+
+    BATCHES = 3
+    PEERS = 12
+    GROUPS = 6
+    JOINED_GROUPS = 4
+    MEMBERS_PER_GROUP = 4
+    DIRECT_CONVERSATIONS = 4
+    MESSAGES_PER_CONVERSATION = 3
+    TASKS = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        from subscriptions.models import SubscriptionPlan
+
+        cls.user = User.objects.create_user(
+            email='viewer@test.com',
+            username='viewer',
+            password='password123'
+        )
+        cls.plans = SubscriptionPlan.objects.bulk_create([
+            SubscriptionPlan(name=name, slug=name.lower(), price=price)
+            for name, price in (('Basic', 0), ('Pro', 100), ('Team', 300))
+        ])
+        cls.group = cls.conversation = None
+        cls._seed(0)
+
+    @classmethod
+    def _seed(cls, batch):
+        """Add one batch of rows of every kind the endpoints read."""
+        from planner.models import StudySession
+        from pomodoro.models import PomodoroSession
+        from resources.models import StudyFile
+        from studytracker.models import StudyActivity
+        from subscriptions.models import UserSubscription
+        from Tasks.models import StudyResource
+
+        now = timezone.now()
+        peers = User.objects.bulk_create([
+            User(email=f'peer{batch}-{i}@test.com', username=f'peer{batch}-{i}', password='!')
+            for i in range(cls.PEERS)
+        ])
+
+        groups = StudyGroup.objects.bulk_create([
+            StudyGroup(
+                group_name=f'Algebra group {batch}-{i}',
+                created_by=cls.user if i < cls.JOINED_GROUPS else peers[i],
+                max_members=50,
+            )
+            for i in range(cls.GROUPS)
+        ])
+        cls.group = cls.group or groups[0]
+        memberships = []
+        for i, group in enumerate(groups):
+            members = [peers[(i * 3 + j) % cls.PEERS] for j in range(cls.MEMBERS_PER_GROUP)]
+            # The viewer owns the joined groups and is a plain member of one more
+            if i <= cls.JOINED_GROUPS:
+                members[0] = cls.user
+            memberships.extend(GroupMember(group=group, user=member) for member in members)
+        if cls.group not in groups:
+            # The group read by the detail endpoints grows too
+            memberships.extend(GroupMember(group=cls.group, user=peer) for peer in peers[-2:])
+        GroupMember.objects.bulk_create(memberships)
+        StudyGroup.objects.reconcile_member_counts()
+        GroupDiscovery.refresh()
+
+        conversations = Conversation.objects.bulk_create(
+            [Conversation(type='group', group=group) for group in groups]
+            + [
+                Conversation(type='individual', private_key=f'{cls.user.id}:{peer.id}')
+                for peer in peers[:cls.DIRECT_CONVERSATIONS]
+            ]
+        )
+        cls.conversation = cls.conversation or conversations[0]
+        ConversationMember.objects.bulk_create(
+            [
+                ConversationMember(conversation_id=group_conversation.pk, user_id=member.user_id)
+                for group_conversation in Conversation.objects.filter(group__isnull=False)
+                for member in memberships if member.group_id == group_conversation.group_id
+            ]
+            + [
+                ConversationMember(conversation=conversation, user=user)
+                for conversation, peer in zip(conversations[cls.GROUPS:], peers)
+                for user in (cls.user, peer)
+            ]
+        )
+        Message.objects.bulk_create([
+            Message(
+                conversation=conversation,
+                sender=cls.user if j % 2 else peers[j],
+                content=f'hello number {j}',
+            )
+            for conversation in (
+                conversations[:cls.JOINED_GROUPS] + conversations[cls.GROUPS:] + [cls.conversation]
+            )
+            for j in range(cls.MESSAGES_PER_CONVERSATION)
+        ])
+
+        statuses = ['pending', 'in_progress', 'completed']
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {batch}-{i}',
+                assigned_to=cls.user if i % 2 else peers[i % cls.PEERS],
+                created_by=cls.user,
+                group=groups[i % cls.JOINED_GROUPS],
+                status=statuses[i % 3],
+                due_date=now + timedelta(days=i % 30 - 5),
+            )
+            for i in range(cls.TASKS)
+        ])
+        StudyResource.objects.bulk_create([
+            StudyResource(
+                title=f'Notes {batch}-{i}',
+                file=f'study_resources/notes{batch}-{i}.pdf',
+                uploaded_by=peers[i],
+                group=groups[i % cls.JOINED_GROUPS],
+            )
+            for i in range(5)
+        ])
+        StudyFile.objects.bulk_create([
+            StudyFile(
+                owner=peers[i],
+                # Left empty: building Cloudinary URLs needs a configured cloud
+                file='',
+                filename=f'file{batch}-{i}.pdf',
+                group=groups[i % cls.JOINED_GROUPS],
+            )
+            for i in range(4)
+        ])
+        Notification.objects.bulk_create([
+            Notification(
+                user=cls.user,
+                notification_type='task',
+                title=f'Notification {batch}-{i}',
+                message='Something happened',
+                related_group=groups[i % cls.JOINED_GROUPS],
+                is_read=i % 3 == 0,
+            )
+            for i in range(6)
+        ])
+        StudySession.objects.bulk_create([
+            StudySession(
+                title=f'Session {batch}-{i}',
+                start_time=now + timedelta(days=i - 1),
+                end_time=now + timedelta(days=i - 1, hours=1),
+                study_group=groups[i % cls.JOINED_GROUPS],
+                host=cls.user,
+                participant=peers[i],
+            )
+            for i in range(3)
+        ])
+        PomodoroSession.objects.bulk_create([
+            PomodoroSession(group=group, started_by=cls.user) for group in groups[:cls.JOINED_GROUPS + 1]
+        ])
+        StudyActivity.objects.bulk_create([
+            StudyActivity(
+                user=cls.user, date=(now - timedelta(days=batch * 10 + i)).date(), duration_minutes=30
+            )
+            for i in range(10)
+        ])
+        UserSubscription.objects.bulk_create([
+            UserSubscription(
+                user=cls.user, plan=cls.plans[1 + i], status='active', tx_ref=f'tx-{batch}-{i}',
+                start_date=now - timedelta(days=5 + 30 * (batch * 2 + i)),
+                end_date=now + timedelta(days=25 - 30 * (batch * 2 + i)),
+            )
+            for i in range(2)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def _url(self, name, kwargs, params):
+        targets = {'group': self.group.pk, 'conversation': self.conversation.pk}
+        url = reverse(name, kwargs={key: targets[value] for key, value in kwargs.items()})
+        return url, {key: targets.get(value, value) for key, value in params.items()}
+
+    def _measure(self):
+        """Query count of every endpoint, checking status and latency on the way."""
+        counts = {}
+        for name, kwargs, params, _ in ENDPOINT_QUERY_BUDGETS:
+            url, query = self._url(name, kwargs, params)
+            # Measure the cold path, not a cached response
+            cache.clear()
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, query)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self.subTest(endpoint=name):
+                self.assertEqual(response.status_code, status.HTTP_200_OK, response.content[:200])
+                self.assertLess(
+                    elapsed_ms, LATENCY_BUDGET_MS,
+                    f"{name} took {elapsed_ms:.0f}ms, budget is {LATENCY_BUDGET_MS}ms"
+                )
+            counts[name] = len(queries)
+        return counts
+
+    def test_read_endpoint_queries_do_not_grow_with_rows(self):
+        small = self._measure()
+        for batch in range(1, self.BATCHES):
+            self._seed(batch)
+        large = self._measure()
+
+        for name, _, _, max_queries in ENDPOINT_QUERY_BUDGETS:
+            with self.subTest(endpoint=name):
+                # First reads may create rows (e.g. a streak) and run fewer queries later
+                self.assertLessEqual(
+                    large[name], small[name],
+                    f"{name} ran {small[name]} queries for one batch and {large[name]} for {self.BATCHES}"
+                )
+                self.assertLessEqual(
+                    small[name], max_queries,
+                    f"{name} ran {small[name]} queries, budget is {max_queries}"
+                )
@@ -0,0 +1,39 @@
+import logging
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_task(task, *args, **kwargs):
+    """
+    Queue a Celery task once the current transaction commits.
+
+    Without a configured broker the task is skipped and callers fall back
+    to their lazy path, so local development and tests never block on a
+    missing Redis.
+    """
+    if not settings.CELERY_BROKER_URL and not settings.CELERY_TASK_ALWAYS_EAGER:
+        return False
+
+    def _send():
+        try:
+            task.delay(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Failed to enqueue {task.name}: {e}")
+
+    transaction.on_commit(_send)
+    return True
+
+
+def absolute_url(url, request=None):
+    """
+    `url` made absolute from the request, or from BACKEND_URL when there
+    is none, as in background jobs. Already absolute URLs pass through.
+    """
+    if request is not None:
+        return request.build_absolute_uri(url)
+    base = getattr(settings, 'BACKEND_URL', '')
+    return urljoin(f'{base}/', url) if base else url
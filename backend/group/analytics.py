@@ -0,0 +1,181 @@
+"""
+Group analytics from the GroupActivityDay rollup.
+
+Message, task and membership events add to the group's row for the day
+as they happen (see common.signals and StudyGroupManager.claim_seat), so
+the analytics endpoint never counts messages or tasks. It reads the
+group with its totals and weekly active members annotated, then the
+day rows of the requested window from the (group, day) unique index.
+
+Weekly active members are members whose latest group message falls in
+the last seven days. A message writes GroupMember.last_active_on only on
+the sender's first message of the day; later ones hit a cache marker.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import GroupActivityDay, GroupMember
+
+DEFAULT_DAYS = 30
+MIN_DAYS = 14
+MAX_DAYS = 90
+
+COUNTERS = ('messages', 'tasks_created', 'tasks_completed', 'members_joined', 'members_left')
+
+
+class GroupAnalytics:
+    # A conversation's group never changes, so the lookup can live long
+    CONVERSATION_TTL = 24 * 60 * 60
+    ACTIVE_TTL = 24 * 60 * 60
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Events
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def group_for_conversation(cls, conversation_id):
+        """The group id of a group conversation, None for a direct one."""
+        from Message.models import Conversation
+
+        key = f"conversation_group_{conversation_id}"
+        group_id = cache.get(key)
+        if group_id is None:
+            group_id = Conversation.objects.filter(
+                pk=conversation_id
+            ).values_list('group_id', flat=True).first() or 0
+            cache.set(key, group_id, timeout=cls.CONVERSATION_TTL)
+        return group_id or None
+
+    @classmethod
+    def record_message(cls, message, delta=1):
+        group_id = cls.group_for_conversation(message.conversation_id)
+        if group_id is None:
+            return
+        day = timezone.localdate(message.timestamp) if message.timestamp else timezone.localdate()
+        GroupActivityDay.objects.record(group_id, day, messages=delta)
+        if delta > 0:
+            cls._mark_active(group_id, message.sender_id, day)
+
+    @classmethod
+    def _mark_active(cls, group_id, user_id, day):
+        key = f"group_active_{group_id}_{user_id}_{day.isoformat()}"
+        if cache.get(key):
+            return
+        GroupMember.objects.filter(group_id=group_id, user_id=user_id).update(last_active_on=day)
+        transaction.on_commit(lambda: cache.set(key, True, timeout=cls.ACTIVE_TTL))
+
+    @staticmethod
+    def record_tasks(changes):
+        """
+        Record task changes given as (old_group_id, old_completed,
+        new_group_id, new_completed) tuples; None group ids stand for a
+        task that didn't exist before or doesn't any more.
+        """
+        deltas = {}
+        for old_group_id, old_completed, new_group_id, new_completed in changes:
+            if old_group_id == new_group_id and old_completed == new_completed:
+                continue
+            if old_group_id:
+                counters = deltas.setdefault(old_group_id, {'tasks_created': 0, 'tasks_completed': 0})
+                counters['tasks_created'] -= 1
+                counters['tasks_completed'] -= int(old_completed)
+            if new_group_id:
+                counters = deltas.setdefault(new_group_id, {'tasks_created': 0, 'tasks_completed': 0})
+                counters['tasks_created'] += 1
+                counters['tasks_completed'] += int(new_completed)
+        for group_id, counters in deltas.items():
+            GroupActivityDay.objects.record(group_id, **counters)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Reading
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def annotate(queryset, today=None):
+        """Annotate groups with their totals and active_members_this_week."""
+        today = today or timezone.localdate()
+
+        def total(field):
+            return Coalesce(
+                Subquery(
+                    GroupActivityDay.objects.filter(group=OuterRef('pk'))
+                    .order_by().values('group').annotate(total=Sum(field)).values('total'),
+                    output_field=IntegerField()
+                ),
+                Value(0)
+            )
+
+        return queryset.annotate(
+            total_messages=total('messages'),
+            total_tasks=total('tasks_created'),
+            completed_tasks=total('tasks_completed'),
+            active_members_this_week=Coalesce(
+                Subquery(
+                    GroupMember.objects.filter(
+                        group=OuterRef('pk'),
+                        is_active=True,
+                        last_active_on__gte=today - timedelta(days=6)
+                    ).order_by().values('group').annotate(total=Count('pk')).values('total')
+                ),
+                Value(0)
+            ),
+        )
+
+    @staticmethod
+    def series(group, days=DEFAULT_DAYS, today=None):
+        """One entry per day of the window, oldest first, zero-filled."""
+        today = today or timezone.localdate()
+        since = today - timedelta(days=days - 1)
+        rows = {
+            row['day']: row
+            for row in GroupActivityDay.objects.filter(group=group, day__gte=since)
+            .values('day', *COUNTERS)
+        }
+        return [
+            rows.get(day) or {'day': day, **dict.fromkeys(COUNTERS, 0)}
+            for day in (since + timedelta(days=offset) for offset in range(days))
+        ]
+
+    @classmethod
+    def report(cls, group, days=DEFAULT_DAYS):
+        """The analytics payload for a group loaded through annotate()."""
+        series = cls.series(group, days)
+        this_week, last_week = series[-7:], series[-14:-7]
+
+        def week_total(week, field):
+            return sum(day[field] for day in week)
+
+        total_tasks = group.total_tasks
+        completed_tasks = group.completed_tasks
+        return {
+            'group_id': group.id,
+            'group_name': group.group_name,
+            'total_members': group.active_member_count,
+            'total_messages': group.total_messages,
+            'total_asks': total_tasks,
+            'completed_tasks': completed_tasks,
+            'active_members_this_week': group.active_members_this_week,
+            'completion_rate': round((completed_tasks/total_tasks * 100) if total_tasks > 0 else 0, 2),
+            'trends': {
+                field: {
+                    'this_week': week_total(this_week, field),
+                    'last_week': week_total(last_week, field),
+                }
+                for field in COUNTERS
+            },
+            'daily': series,
+        }
+
+
+def clamp_days(value):
+    try:
+        return min(max(int(value), MIN_DAYS), MAX_DAYS)
+    except (TypeError, ValueError):
+        return DEFAULT_DAYS
+
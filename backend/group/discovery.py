@@ -0,0 +1,165 @@
+"""
+Ranked group discovery.
+
+GroupDiscovery.refresh scores every public group with a free seat and
+upserts the scores into GroupRanking; groups that turned private, filled
+up or were deleted drop out when the run removes rows it didn't write.
+A score combines recent activity from the GroupActivityDay rollup with
+the member count, weighted by group type:
+
+    type_weight * (2 * ln(1 + activity) + ln(1 + members))
+
+where activity is messages + 3 * tasks completed + 5 * members joined
+over the last ACTIVITY_WINDOW_DAYS days.
+
+The feed pages by keyset: an opaque cursor carries the (score, group)
+key of the row a page ends on, and the next page is the index range
+right after it. Each page reads at most one page of group ids from the
+(score, group) index, skipping groups the user already belongs to, and
+loads those groups in a second query, so its cost grows neither with
+the number of groups nor with how deep the user has scrolled.
+"""
+
+import base64
+import binascii
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import GroupActivityDay, GroupMember, GroupRanking, StudyGroup
+
+ACTIVITY_WINDOW_DAYS = 7
+
+DEFAULT_TYPE_WEIGHTS = {
+    'academic': 1.0,
+    'exam_prep': 1.1,
+    'project': 0.9,
+    'study_buddy': 1.0,
+}
+
+
+class GroupDiscovery:
+    REFRESH_BATCH_SIZE = 2000
+
+    @staticmethod
+    def type_weight(group_type):
+        weights = getattr(settings, 'GROUP_DISCOVERY_TYPE_WEIGHTS', DEFAULT_TYPE_WEIGHTS)
+        return weights.get(group_type, 1.0)
+
+    @classmethod
+    def score(cls, group_type, members, activity):
+        return cls.type_weight(group_type) * (
+            2 * math.log1p(max(activity, 0)) + math.log1p(max(members, 0))
+        )
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Refresh
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def refresh(cls, now=None, batch_size=None):
+        """Rescore every discoverable group. Returns how many are ranked."""
+        now = now or timezone.now()
+        batch_size = batch_size or cls.REFRESH_BATCH_SIZE
+        since = timezone.localdate(now) - timedelta(days=ACTIVITY_WINDOW_DAYS - 1)
+        activity = Coalesce(
+            Subquery(
+                GroupActivityDay.objects.filter(group=OuterRef('pk'), day__gte=since)
+                .order_by().values('group')
+                .annotate(total=Sum(
+                    F('messages') + 3 * F('tasks_completed') + 5 * F('members_joined')
+                ))
+                .values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+        groups = StudyGroup.objects.filter(
+            is_public=True, active_member_count__lt=F('max_members')
+        ).annotate(activity=activity).order_by('pk')
+
+        ranked = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                groups.filter(pk__gt=last_pk)
+                .values_list('pk', 'group_type', 'active_member_count', 'activity')[:batch_size]
+            )
+            if not batch:
+                break
+            GroupRanking.objects.bulk_create(
+                [
+                    GroupRanking(
+                        group_id=pk,
+                        group_type=group_type,
+                        score=cls.score(group_type, members, activity),
+                        computed_at=now,
+                    )
+                    for pk, group_type, members, activity in batch
+                ],
+                update_conflicts=True,
+                unique_fields=['group'],
+                update_fields=['group_type', 'score', 'computed_at'],
+            )
+            ranked += len(batch)
+            last_pk = batch[-1][0]
+            if len(batch) < batch_size:
+                break
+
+        GroupRanking.objects.filter(computed_at__lt=now).delete()
+        return ranked
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Feed
+    # ─────────────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def page(user, limit, position=None, reverse=False, group_type=None):
+        """
+        Up to `limit` groups for `user`, best first, annotated like
+        StudyGroupManager.with_member_info. They rank right after the
+        (score, group_id) `position`, or right before it with `reverse`.
+        Returns the groups, the (score, group_id) keys of the page and
+        whether more follow in the direction read.
+        """
+        rankings = GroupRanking.objects.filter(
+            ~Exists(GroupMember.objects.filter(group=OuterRef('group'), user=user, is_active=True))
+        )
+        if group_type:
+            rankings = rankings.filter(group_type=group_type)
+        if position is not None:
+            score, group_id = position
+            if reverse:
+                rankings = rankings.filter(Q(score__gt=score) | Q(score=score, group_id__lt=group_id))
+            else:
+                rankings = rankings.filter(Q(score__lt=score) | Q(score=score, group_id__gt=group_id))
+        ordering = ('score', '-group_id') if reverse else ('-score', 'group_id')
+        keys = list(rankings.order_by(*ordering).values_list('score', 'group_id')[:limit + 1])
+        has_more = len(keys) > limit
+        keys = keys[:limit]
+        if reverse:
+            keys.reverse()
+
+        # A group made private since the last refresh drops out right away
+        groups = StudyGroup.objects.with_member_info(user).filter(is_public=True).in_bulk(
+            [group_id for _, group_id in keys]
+        )
+        return [groups[group_id] for _, group_id in keys if group_id in groups], keys, has_more
+
+    @staticmethod
+    def encode_cursor(score, group_id, reverse=False):
+        raw = f"{score!r}:{group_id}:{int(reverse)}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """((score, group_id), reverse) from a cursor; raises ValueError if it is malformed."""
+        try:
+            score, group_id, reverse = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+            return (float(score), int(group_id)), reverse == '1'
+        except (binascii.Error, UnicodeError) as e:
+            raise ValueError(str(e))
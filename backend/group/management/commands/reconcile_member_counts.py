@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from group.models import StudyGroup
+
+
+class Command(BaseCommand):
+    help = 'Recount active members and repair drifted StudyGroup.active_member_count values'
+
+    def handle(self, *args, **options):
+        fixed = StudyGroup.objects.reconcile_member_counts()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} groups"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from group.discovery import GroupDiscovery
+
+
+class Command(BaseCommand):
+    help = 'Rescore public groups into the GroupRanking table behind the discovery feed'
+
+    def handle(self, *args, **options):
+        ranked = GroupDiscovery.refresh()
+        self.stdout.write(self.style.SUCCESS(f"Ranked {ranked} groups"))
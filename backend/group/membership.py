@@ -0,0 +1,264 @@
+"""
+Joining, adding and leaving group members.
+
+A join is a single transaction: one read of the group carrying the
+caller's membership state and the group conversation's id, the
+conditional seat claim (StudyGroupManager.claim_seat), the membership
+insert, an insert-or-ignore into the conversation and the notification.
+A refusal raises MembershipError inside the transaction, so a seat that
+was already claimed goes back with the rollback and a crowd joining from
+one invite link can neither overfill the group nor leave it miscounted.
+
+Leaving is a conditional UPDATE of the membership plus the seat release
+in one transaction; the ownership hand-over only runs for the owner.
+Removing or reactivating a member by id works the same way: only the
+request whose UPDATE flipped the row moves the seat count.
+
+Bulk imports lock the group row instead of claiming seats one by one.
+While it is held every other join waits in claim_seat, so the import can
+read who is already a member, write all new rows with a handful of
+multi-row statements and add the total to active_member_count once.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from rest_framework import status
+
+from common.signals import (
+    conversation_members_bulk_created,
+    memberships_bulk_changed,
+    notifications_bulk_created,
+)
+from Message.models import Conversation, ConversationMember
+from Notifications.models import Notification
+from .models import GroupActivityDay, GroupMember, StudyGroup
+
+User = get_user_model()
+
+# Most users one bulk import may name
+MAX_BULK_MEMBERS = 500
+
+
+class MembershipError(Exception):
+    """A join or leave that was refused; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _membership_state(user):
+    # None when the user was never a member, else their is_active flag
+    return Subquery(
+        GroupMember.objects.filter(group=OuterRef('pk'), user=user).values('is_active')[:1]
+    )
+
+
+def _admit(user, group, was_member):
+    """Take a seat and make `user` an active member. Call inside a transaction."""
+    if not StudyGroup.objects.claim_seat(group.pk):
+        raise MembershipError("This group is full.")
+
+    if was_member:
+        # Rejoining keeps the original membership row
+        member = GroupMember.objects.select_for_update().get(user=user, group=group)
+        if member.is_active:
+            raise MembershipError("You are already a member of this group.")
+        member.is_active = True
+        member.save(update_fields=['is_active'])
+    else:
+        member = GroupMember.objects.create(user=user, group=group)
+
+    conversation_id = getattr(group, 'conversation_id', None)
+    if conversation_id is None:
+        conversation_id = Conversation.objects.get_or_create(
+            group=group, defaults={'type': 'group'}
+        )[0].pk
+    ConversationMember.objects.bulk_create(
+        [ConversationMember(conversation_id=conversation_id, user=user)],
+        ignore_conflicts=True
+    )
+    conversation_members_bulk_created([user.pk])
+    return member
+
+
+def join_group(user, group_id, invitation_token=None):
+    """
+    Join `group_id` as `user`, with `invitation_token` for private groups.
+    Returns the membership or raises MembershipError.
+    """
+    group = StudyGroup.objects.annotate(
+        conversation_id=F('conversation__id'),
+        membership=_membership_state(user),
+    ).filter(pk=group_id).first()
+    if group is None:
+        raise MembershipError("Group not found.")
+    if group.membership:
+        raise MembershipError("You are already a member of this group.")
+
+    if not group.is_public:
+        # private group requires ivitation token
+        if not invitation_token:
+            raise MembershipError(
+                "This group is private. An invitation token is required to join.",
+                status.HTTP_403_FORBIDDEN
+            )
+        if str(group.invitation_token) != str(invitation_token):
+            raise MembershipError("Invalid invitation token.")
+
+    try:
+        with transaction.atomic():
+            member = _admit(user, group, was_member=group.membership is not None)
+            Notification.objects.create(
+                user=user,
+                notification_type='group',
+                title=f"Joined {group.group_name}",
+                message=f"You have successfully joined {group.group_name}",
+                related_group=group
+            )
+    except IntegrityError:
+        # A concurrent request from the same user inserted the membership first
+        raise MembershipError("You are already a member of this group.")
+    return member
+
+
+def add_member(user, group):
+    """Add `user` to `group` on a member's behalf. Returns the membership or raises MembershipError."""
+    state = GroupMember.objects.filter(user=user, group=group).values_list('is_active', flat=True).first()
+    if state:
+        raise MembershipError("User is already a member of this group.")
+    try:
+        with transaction.atomic():
+            return _admit(user, group, was_member=state is not None)
+    except IntegrityError:
+        raise MembershipError("User is already a member of this group.")
+
+
+def leave_group(user, group):
+    """
+    Remove `user` from `group`, handing ownership to the earliest remaining
+    member. Returns False when the owner was the last member and the group
+    was deleted instead.
+    """
+    with transaction.atomic():
+        left = GroupMember.objects.filter(
+            user=user, group=group, is_active=True
+        ).update(is_active=False)
+        if not left:
+            raise MembershipError("You are not a member of this group.")
+
+        if group.created_by_id == user.pk:
+            # Look for other active members to transfer ownership
+            successor_id = GroupMember.objects.filter(
+                group=group, is_active=True
+            ).order_by('joined_at').values_list('user_id', flat=True).first()
+            if successor_id is None:
+                group_id = group.pk
+                group.delete()
+                memberships_bulk_changed(group_id, [user.pk])
+                return False
+            group.created_by_id = successor_id
+            group.save(update_fields=['created_by', 'updated_at'])
+
+        StudyGroup.objects.release_seat(group.pk)
+        memberships_bulk_changed(group.pk, [user.pk])
+    return True
+
+
+def set_member_active(member, is_active):
+    """
+    Activate or deactivate `member`, claiming or releasing its seat. Returns
+    whether this call changed it; raises MembershipError when the group is full.
+    """
+    with transaction.atomic():
+        changed = GroupMember.objects.filter(
+            pk=member.pk, is_active=not is_active
+        ).update(is_active=is_active)
+        if changed:
+            if not is_active:
+                StudyGroup.objects.release_seat(member.group_id)
+            elif not StudyGroup.objects.claim_seat(member.group_id):
+                raise MembershipError("This group is full.")
+            memberships_bulk_changed(member.group_id, [member.user_id])
+    member.is_active = is_active
+    return bool(changed)
+
+
+def add_members(group, emails=(), user_ids=()):
+    """
+    Add every user named by `emails` or `user_ids` to `group` in one
+    transaction. Raises MembershipError, adding nobody, when the group
+    lacks a seat for each of them. Returns a report of the user ids added
+    (new or reactivated), the ids that already were members and the emails
+    and ids that matched no user.
+    """
+    emails = set(emails)
+    user_ids = set(user_ids)
+    users = dict(
+        User.objects.filter(Q(email__in=emails) | Q(pk__in=user_ids)).values_list('pk', 'email')
+    )
+    report = {
+        'added': [],
+        'already_members': [],
+        'not_found': sorted(emails - set(users.values()))
+                     + sorted(user_ids - users.keys()),
+    }
+    if not users:
+        return report
+
+    with transaction.atomic():
+        group = StudyGroup.objects.select_for_update(of=('self',)).annotate(
+            conversation_id=F('conversation__id')
+        ).get(pk=group.pk)
+        states = dict(
+            GroupMember.objects.filter(group=group, user_id__in=users)
+            .values_list('user_id', 'is_active')
+        )
+        new_ids = sorted(users.keys() - states.keys())
+        inactive_ids = sorted(user_id for user_id, active in states.items() if not active)
+        added = new_ids + inactive_ids
+
+        free = group.max_members - group.active_member_count
+        if len(added) > free:
+            raise MembershipError(
+                f"This group has {max(free, 0)} free seats; {len(added)} are needed."
+            )
+        if added:
+            GroupMember.objects.bulk_create(
+                [GroupMember(group=group, user_id=user_id) for user_id in new_ids],
+                ignore_conflicts=True
+            )
+            GroupMember.objects.filter(group=group, user_id__in=inactive_ids).update(is_active=True)
+            StudyGroup.objects.filter(pk=group.pk).update(
+                active_member_count=F('active_member_count') + len(added)
+            )
+            GroupActivityDay.objects.record(group.pk, members_joined=len(added))
+
+            conversation_id = group.conversation_id
+            if conversation_id is None:
+                conversation_id = Conversation.objects.get_or_create(
+                    group=group, defaults={'type': 'group'}
+                )[0].pk
+            ConversationMember.objects.bulk_create(
+                [ConversationMember(conversation_id=conversation_id, user_id=user_id) for user_id in added],
+                ignore_conflicts=True
+            )
+
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    user_id=user_id,
+                    notification_type='group',
+                    title=f"Added to {group.group_name}",
+                    message=f"You have been added to {group.group_name}",
+                    related_group=group
+                )
+                for user_id in added
+            ])
+            memberships_bulk_changed(group.pk, added)
+            conversation_members_bulk_created(added)
+            notifications_bulk_created(notifications)
+
+    report['added'] = added
+    report['already_members'] = sorted(user_id for user_id, active in states.items() if active)
+    return report
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group', '0003_remove_groupmember_role'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='groupmember',
+            index=models.Index(fields=['user', 'is_active', 'group'], name='group_membe_user_id_b54bcd_idx'),
+        ),
+    ]
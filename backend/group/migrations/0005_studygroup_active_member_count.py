@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_active_member_count(apps, schema_editor):
+    StudyGroup = apps.get_model('group', 'StudyGroup')
+    GroupMember = apps.get_model('group', 'GroupMember')
+    StudyGroup.objects.update(active_member_count=Coalesce(
+        Subquery(
+            GroupMember.objects.filter(group=OuterRef('pk'), is_active=True)
+            .order_by().values('group').annotate(total=Count('pk')).values('total')
+        ),
+        0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group', '0004_groupmember_active_groups_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studygroup',
+            name='active_member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_active_member_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_group_activity(apps, schema_editor):
+    GroupActivityDay = apps.get_model('group', 'GroupActivityDay')
+    GroupMember = apps.get_model('group', 'GroupMember')
+    Message = apps.get_model('Message', 'Message')
+    Task = apps.get_model('Tasks', 'Task')
+
+    days = {}
+
+    def add(rows, field):
+        for row in rows:
+            if row['group_id'] and row['day']:
+                counters = days.setdefault((row['group_id'], row['day']), {})
+                counters[field] = counters.get(field, 0) + row['total']
+
+    add(
+        Message.objects.filter(conversation__group__isnull=False)
+        .values(group_id=models.F('conversation__group'), day=TruncDate('timestamp'))
+        .annotate(total=Count('pk')).order_by(),
+        'messages'
+    )
+    add(
+        Task.objects.values('group_id', day=TruncDate('created_at'))
+        .annotate(total=Count('pk')).order_by(),
+        'tasks_created'
+    )
+    add(
+        Task.objects.filter(status='completed')
+        .values('group_id', day=TruncDate(Coalesce('completed_at', 'updated_at')))
+        .annotate(total=Count('pk')).order_by(),
+        'tasks_completed'
+    )
+    add(
+        GroupMember.objects.values('group_id', day=TruncDate('joined_at'))
+        .annotate(total=Count('pk')).order_by(),
+        'members_joined'
+    )
+    GroupActivityDay.objects.bulk_create(
+        [
+            GroupActivityDay(group_id=group_id, day=day, **counters)
+            for (group_id, day), counters in days.items()
+        ],
+        batch_size=1000
+    )
+
+    last_active = (
+        Message.objects.filter(conversation__group__isnull=False)
+        .values('sender_id', group_id=models.F('conversation__group'))
+        .annotate(latest=Max('timestamp')).order_by()
+    )
+    members = {
+        (member.group_id, member.user_id): member
+        for member in GroupMember.objects.only('id', 'group_id', 'user_id')
+    }
+    changed = []
+    for row in last_active:
+        member = members.get((row['group_id'], row['sender_id']))
+        if member is not None:
+            member.last_active_on = row['latest'].date()
+            changed.append(member)
+    GroupMember.objects.bulk_update(changed, ['last_active_on'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group', '0005_studygroup_active_member_count'),
+        ('Message', '0004_message_search_vector'),
+        ('Tasks', '0005_open_tasks_due_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupActivityDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('messages', models.IntegerField(default=0)),
+                ('tasks_created', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('members_joined', models.IntegerField(default=0)),
+                ('members_left', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'group_activity_days',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.AddField(
+            model_name='groupmember',
+            name='last_active_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='groupmember',
+            index=models.Index(fields=['group', 'last_active_on'], name='group_membe_group_i_8e88f4_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupactivityday',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_days', to='group.studygroup'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupactivityday',
+            constraint=models.UniqueConstraint(fields=('group', 'day'), name='unique_group_activity_day'),
+        ),
+        migrations.RunPython(backfill_group_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group', '0006_group_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupRanking',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='group.studygroup')),
+                ('group_type', models.CharField(choices=[('academic', 'Academic'), ('project', 'Project'), ('exam_prep', 'Exam Preparation'), ('study_buddy', 'Study Buddy')], max_length=20)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'group_rankings',
+                'indexes': [models.Index(fields=['-score', 'group'], name='group_ranking_score_idx'), models.Index(fields=['group_type', '-score', 'group'], name='group_ranking_type_score_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from cloudinary.models import CloudinaryField
 import uuid
@@ -8,6 +11,66 @@ User = get_user_model()
 
 
 
+class StudyGroupManager(models.Manager):
+    def with_member_info(self, user=None):
+        """
+        Groups annotated with `conversation_id` and, for an authenticated
+        `user`, `is_member`, with the creator joined in. Serializers read
+        these instead of querying once per group.
+        """
+        queryset = self.get_queryset().select_related('created_by').annotate(
+            conversation_id=F('conversation__id'),
+        )
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(is_member=Exists(
+                GroupMember.objects.filter(group=OuterRef('pk'), user=user, is_active=True)
+            ))
+        return queryset
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Active member count
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def claim_seat(self, group_id):
+        """
+        Count one more active member unless the group is at max_members.
+        A single conditional UPDATE, so concurrent joins cannot overfill a
+        group. Returns whether a seat was taken.
+        """
+        claimed = self.filter(
+            pk=group_id, active_member_count__lt=F('max_members')
+        ).update(active_member_count=F('active_member_count') + 1) == 1
+        if claimed:
+            GroupActivityDay.objects.record(group_id, members_joined=1)
+        return claimed
+
+    def release_seat(self, group_id):
+        if self.filter(pk=group_id, active_member_count__gt=0).update(
+            active_member_count=F('active_member_count') - 1
+        ):
+            GroupActivityDay.objects.record(group_id, members_left=1)
+
+    def reconcile_member_counts(self):
+        """Reset every drifted active_member_count to the real count. Returns how many changed."""
+        actual = Coalesce(
+            Subquery(
+                GroupMember.objects.filter(group=OuterRef('pk'), is_active=True)
+                .order_by().values('group').annotate(total=Count('pk')).values('total')
+            ),
+            0
+        )
+        return self.filter(~Q(active_member_count=actual)).update(active_member_count=actual)
+
+    @staticmethod
+    def active_members_prefetch():
+        """Prefetch for the detail serializer's member list, as `active_members`."""
+        return Prefetch(
+            'members',
+            queryset=GroupMember.objects.filter(is_active=True).select_related('user', 'group'),
+            to_attr='active_members'
+        )
+
+
 class StudyGroup(models.Model):
     class GroupType(models.TextChoices):
         academic = 'academic', 'Academic'
@@ -27,6 +90,9 @@ class StudyGroup(models.Model):
         related_name='created_groups'
     )
     max_members = models.PositiveIntegerField(default=10)
+    # Maintained with F() updates by StudyGroupManager.claim_seat/release_seat
+    # and repaired by the reconcile_member_counts command
+    active_member_count = models.PositiveIntegerField(default=0, editable=False)
     is_public = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -34,6 +100,8 @@ class StudyGroup(models.Model):
     
     invitation_token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
 
+    objects = StudyGroupManager()
+
     class Meta:
         db_table = 'study_groups'
         ordering = ['-created_at']
@@ -41,6 +109,16 @@ class StudyGroup(models.Model):
 
     def __str__(self):
         return self.group_name
+
+    def save(self, *args, **kwargs):
+        # Saving a loaded instance must not overwrite concurrent F() updates
+        # of the member count with the value read earlier
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'active_member_count'
+            ]
+        super().save(*args, **kwargs)
      
     @property
     def invitation_link(self):
@@ -48,19 +126,99 @@ class StudyGroup(models.Model):
     
     @property
     def member_count(self):
-        return self.members.filter(is_active=True).count()
+        return self.active_member_count
     
 class GroupMember(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_memberships')
     group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE, related_name='members')
     joined_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # Day of the member's latest message in the group conversation
+    last_active_on = models.DateField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'group_members' 
         unique_together = ['user', 'group']
         ordering = ['-joined_at']
+        indexes = [
+            # Covers "active group ids of a user" subqueries with an index-only scan
+            models.Index(fields=['user', 'is_active', 'group']),
+            # Weekly active member counts
+            models.Index(fields=['group', 'last_active_on']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.group.group_name}"
 
+
+class GroupActivityDayManager(models.Manager):
+    def record(self, group_id, day=None, **deltas):
+        """
+        Add `deltas` to the group's counters for `day` (today by default).
+        Usually one UPDATE; the day's first event inserts the row.
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not group_id or not deltas:
+            return
+        day = day or timezone.localdate()
+        increments = {field: F(field) + delta for field, delta in deltas.items()}
+        if self.filter(group_id=group_id, day=day).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                self.create(group_id=group_id, day=day, **deltas)
+        except IntegrityError:
+            # Another event created the day's row first
+            self.filter(group_id=group_id, day=day).update(**increments)
+
+
+class GroupActivityDay(models.Model):
+    """
+    One group's activity on one day, kept up to date from message, task and
+    membership events. Counters are net changes, so a task deleted or
+    reopened today counts against today, and a group's totals are the sums
+    over its rows.
+    """
+    group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE, related_name='activity_days')
+    day = models.DateField()
+    messages = models.IntegerField(default=0)
+    tasks_created = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    members_joined = models.IntegerField(default=0)
+    members_left = models.IntegerField(default=0)
+
+    objects = GroupActivityDayManager()
+
+    class Meta:
+        db_table = 'group_activity_days'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'day'], name='unique_group_activity_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.group_id} - {self.day}"
+
+
+class GroupRanking(models.Model):
+    """
+    A public group's precomputed discovery score, rewritten periodically by
+    group.discovery.GroupDiscovery.refresh. The discovery feed is a top-K
+    read of this table by score.
+    """
+    group = models.OneToOneField(
+        StudyGroup, on_delete=models.CASCADE, primary_key=True, related_name='ranking'
+    )
+    group_type = models.CharField(max_length=20, choices=StudyGroup.GroupType.choices)
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'group_rankings'
+        indexes = [
+            models.Index(fields=['-score', 'group'], name='group_ranking_score_idx'),
+            models.Index(fields=['group_type', '-score', 'group'], name='group_ranking_type_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.group_id} ({self.score:.2f})"
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from common.utils import absolute_url
+from .membership import MAX_BULK_MEMBERS, MembershipError, add_member, set_member_active
 from .models import StudyGroup, GroupMember
 from accounts.serializers import UserBasicSerializer
 from django.contrib.auth import get_user_model
@@ -36,18 +38,20 @@ class StudyGroupListSerializer(serializers.ModelSerializer):
         )
 
     def get_is_member(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
+        # Set on groups loaded through StudyGroup.objects.with_member_info(user)
+        if hasattr(obj, 'is_member'):
+            return obj.is_member
+        # Background jobs (e.g. dashboard snapshots) pass the user without a request
+        request = self.context.get('request')
+        user = request.user if request else self.context.get('user')
+        if user and user.is_authenticated:
             return obj.members.filter(user=user, is_active=True).exists()
         return False
 
 
     def get_profile_pic_url(self, obj):
         if obj.profile_pic:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_pic.url)
-            return obj.profile_pic.url
+            return absolute_url(obj.profile_pic.url, self.context.get('request'))
         return None
 
 
@@ -63,7 +67,10 @@ class StudyGroupDetailSerializer(StudyGroupListSerializer):
         )
 
     def get_members(self, obj):
-        active_members = obj.members.filter(is_active=True)
+        # Prefetched by StudyGroup.objects.active_members_prefetch()
+        active_members = getattr(obj, 'active_members', None)
+        if active_members is None:
+            active_members = obj.members.filter(is_active=True).select_related('user', 'group')
         return GroupMemberSerializer(active_members, many=True).data
 
     def get_invitation_link(self, obj):
@@ -76,12 +83,13 @@ class StudyGroupDetailSerializer(StudyGroupListSerializer):
             return obj.invitation_link
             
         # For private groups, only show to admins/moderators
-        membership = obj.members.filter(user=user, is_active=True).first()
-        if membership: # Simplified: allow all members for now or check if it was intended to stay restricted
+        if self.get_is_member(obj): # Simplified: allow all members for now or check if it was intended to stay restricted
             return obj.invitation_link
         return None
 
     def get_chat_id(self, obj):
+        if hasattr(obj, 'conversation_id'):
+            return obj.conversation_id
         try:
             return obj.conversation.id
         except:
@@ -117,10 +125,7 @@ class GroupMemberSerializer(serializers.ModelSerializer):
 
     def get_group_profile_pic_url(self, obj):
         if obj.group.profile_pic:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.group.profile_pic.url)
-            return obj.group.profile_pic.url
+            return absolute_url(obj.group.profile_pic.url, self.context.get('request'))
         return None
 
 
@@ -141,26 +146,40 @@ class GroupMemberCreateSerializer(serializers.ModelSerializer):
         except User.DoesNotExist:
             raise serializers.ValidationError({"user_email": "User with this email does not exist."})
 
-        if GroupMember.objects.filter(user=user, group=group, is_active=True).exists():
-            raise serializers.ValidationError({"user_email": "User is already a member of this group."})
+        try:
+            return add_member(user, group)
+        except MembershipError as e:
+            raise serializers.ValidationError({"user_email": str(e)})
 
-        member = GroupMember.objects.create(user=user, group=group)
 
-        # Ensure conversation exists and user is added for data consistency
-        from Message.models import Conversation, ConversationMember
-        conversation, _ = Conversation.objects.get_or_create(
-            group=group,
-            defaults={'type': 'group'}
-        )
-        ConversationMember.objects.get_or_create(
-            conversation=conversation,
-            user=user
-        )
+class GroupMemberBulkCreateSerializer(serializers.Serializer):
+    emails = serializers.ListField(
+        child=serializers.EmailField(), required=False, default=list, max_length=MAX_BULK_MEMBERS
+    )
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+        max_length=MAX_BULK_MEMBERS
+    )
 
-        return member
+    def validate(self, attrs):
+        if not attrs['emails'] and not attrs['user_ids']:
+            raise serializers.ValidationError("Provide emails or user_ids.")
+        if len(set(attrs['emails'])) + len(set(attrs['user_ids'])) > MAX_BULK_MEMBERS:
+            raise serializers.ValidationError(f"At most {MAX_BULK_MEMBERS} users can be added at once.")
+        return attrs
 
 
 class GroupMemberUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = GroupMember
         fields = ('is_active',)
+
+    def update(self, instance, validated_data):
+        if 'is_active' not in validated_data:
+            return instance
+        # Keep the group's active_member_count in step with the toggle
+        try:
+            set_member_active(instance, validated_data['is_active'])
+        except MembershipError as e:
+            raise serializers.ValidationError({"is_active": str(e)})
+        return instance
@@ -0,0 +1,24 @@
+from celery import shared_task
+import logging
+
+from .discovery import GroupDiscovery
+from .models import StudyGroup
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def reconcile_member_counts():
+    """Repair active_member_count drift left by paths that bypass claim_seat/release_seat."""
+    fixed = StudyGroup.objects.reconcile_member_counts()
+    if fixed:
+        logger.warning(f"Reconciled active_member_count on {fixed} groups")
+    return fixed
+
+
+@shared_task(ignore_result=True)
+def refresh_group_rankings():
+    """Rescore public groups for the discovery feed."""
+    ranked = GroupDiscovery.refresh()
+    logger.info(f"Ranked {ranked} groups for discovery")
+    return ranked
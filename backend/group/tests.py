@@ -1,10 +1,17 @@
+from datetime import timedelta
+
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import StudyGroup, GroupMember
+from .discovery import GroupDiscovery
+from .models import GroupActivityDay, GroupRanking, StudyGroup, GroupMember
 
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from Notifications.models import Notification
 
 User = get_user_model()
 
@@ -110,3 +117,541 @@ class GroupAnalyticsTests(APITestCase):
         
         # Member should no longer be an active member
         self.assertFalse(GroupMember.objects.filter(user=self.member, group=self.group, is_active=True).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class GroupListQueryTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='viewer@test.com',
+            username='viewer',
+            password='password123'
+        )
+        self.peers = User.objects.bulk_create([
+            User(email=f'peer{i}@test.com', username=f'peer{i}', password='!')
+            for i in range(5)
+        ])
+        self.client.force_authenticate(user=self.user)
+
+    def _create_groups(self, count):
+        from Message.models import Conversation
+
+        start = StudyGroup.objects.count()
+        groups = StudyGroup.objects.bulk_create([
+            StudyGroup(group_name=f'Group {i}', created_by=self.peers[i % 5])
+            for i in range(start, start + count)
+        ])
+        GroupMember.objects.bulk_create(
+            [GroupMember(group=group, user=peer) for group in groups for peer in self.peers[:3]]
+            + [GroupMember(group=group, user=self.user) for group in groups[::2]]
+        )
+        StudyGroup.objects.reconcile_member_counts()
+        Conversation.objects.bulk_create([
+            Conversation(type='group', group=group) for group in groups
+        ])
+        return groups
+
+    def test_list_query_count_does_not_grow_with_groups(self):
+        self._create_groups(5)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('studygroup-list'))
+
+        self._create_groups(100)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('studygroup-list'), {'page_size': 200})
+        self.assertEqual(len(response.data['results']), 105)
+
+    def test_list_annotations_match_membership(self):
+        groups = self._create_groups(4)
+        GroupMember.objects.create(group=groups[0], user=self.peers[4], is_active=False)
+
+        response = self.client.get(reverse('studygroup-list'))
+        by_id = {row['id']: row for row in response.data['results']}
+        self.assertTrue(by_id[groups[0].id]['is_member'])
+        self.assertFalse(by_id[groups[1].id]['is_member'])
+        self.assertEqual(by_id[groups[0].id]['member_count'], 4)
+        self.assertEqual(by_id[groups[1].id]['member_count'], 3)
+
+    def test_detail_uses_prefetched_members(self):
+        group = self._create_groups(1)[0]
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('studygroup-detail', kwargs={'pk': group.pk}))
+        self.assertEqual(len(response.data['members']), 4)
+        self.assertEqual(response.data['chat_id'], group.conversation.id)
+        self.assertEqual(response.data['invitation_link'], group.invitation_link)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ActiveMemberCountTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@test.com',
+            username='owner',
+            password='password123'
+        )
+        self.member = User.objects.create_user(
+            email='member@test.com',
+            username='member',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(
+            reverse('studygroup-list'),
+            {'group_name': 'Algebra', 'max_members': 2, 'is_public': True},
+            format='json'
+        )
+        self.group = StudyGroup.objects.get(pk=response.data['id'])
+
+    def _count(self):
+        self.group.refresh_from_db()
+        return self.group.active_member_count
+
+    def test_join_and_leave_maintain_count(self):
+        self.assertEqual(self._count(), 1)
+
+        self.client.force_authenticate(user=self.member)
+        response = self.client.post(reverse('studygroup-join', kwargs={'pk': self.group.pk}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._count(), 2)
+
+        self.client.post(reverse('studygroup-leave', kwargs={'pk': self.group.pk}))
+        self.assertEqual(self._count(), 1)
+
+    def test_full_group_rejects_join(self):
+        self.assertTrue(StudyGroup.objects.claim_seat(self.group.pk))
+        self.assertFalse(StudyGroup.objects.claim_seat(self.group.pk))
+
+        self.client.force_authenticate(user=self.member)
+        response = self.client.post(reverse('studygroup-join', kwargs={'pk': self.group.pk}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GroupMember.objects.filter(group=self.group, user=self.member).exists())
+        self.assertEqual(self._count(), 2)
+
+    def test_saving_a_loaded_group_keeps_concurrent_count_updates(self):
+        stale = StudyGroup.objects.get(pk=self.group.pk)
+        StudyGroup.objects.claim_seat(self.group.pk)
+
+        stale.group_description = 'Linear equations'
+        stale.save()
+        self.assertEqual(self._count(), 2)
+
+    def test_removing_or_deactivating_twice_releases_one_seat(self):
+        member = GroupMember.objects.create(user=self.member, group=self.group)
+        StudyGroup.objects.claim_seat(self.group.pk)
+        url = reverse('groupmember-detail', kwargs={'pk': member.pk})
+
+        for _ in range(2):
+            response = self.client.patch(url, {'is_active': False}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._count(), 1)
+
+        for _ in range(2):
+            response = self.client.patch(url, {'is_active': True}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._count(), 2)
+
+        for _ in range(2):
+            response = self.client.delete(url)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._count(), 1)
+        self.assertFalse(GroupMember.objects.get(pk=member.pk).is_active)
+
+    def test_reconcile_repairs_drift(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        StudyGroup.objects.filter(pk=self.group.pk).update(active_member_count=7)
+        call_command('reconcile_member_counts', stdout=StringIO())
+        self.assertEqual(self._count(), 1)
+        self.assertEqual(StudyGroup.objects.reconcile_member_counts(), 0)
+
+
+class GroupMembershipTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@test.com',
+            username='owner',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(
+            reverse('studygroup-list'),
+            {'group_name': 'Algebra', 'max_members': 3, 'is_public': False},
+            format='json'
+        )
+        self.group = StudyGroup.objects.get(pk=response.data['id'])
+        self.students = [
+            User.objects.create_user(
+                email=f'student{i}@test.com',
+                username=f'student{i}',
+                password='password123'
+            )
+            for i in range(3)
+        ]
+
+    def _join_via_link(self, user, token=None):
+        self.client.force_authenticate(user=user)
+        return self.client.post(reverse(
+            'studygroup-join-via-link',
+            kwargs={'pk': self.group.pk, 'token': token or self.group.invitation_token}
+        ))
+
+    def test_invite_link_joins_stop_at_capacity(self):
+        statuses = [self._join_via_link(student).status_code for student in self.students]
+
+        self.assertEqual(statuses, [201, 201, 400])
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_member_count, 3)
+        self.assertEqual(GroupMember.objects.filter(group=self.group, is_active=True).count(), 3)
+        # The refused join left nothing behind
+        self.assertFalse(self.group.conversation.members.filter(user=self.students[2]).exists())
+        self.assertFalse(Notification.objects.filter(user=self.students[2]).exists())
+
+    def test_join_is_one_short_transaction(self):
+        self.client.force_authenticate(user=self.students[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('studygroup-join', kwargs={'pk': self.group.pk}),
+                {'invitation_token': str(self.group.invitation_token)}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Group read, seat claim, activity rollup, membership, co-members
+        # whose dashboards show the count, conversation member and
+        # notification, plus the savepoint pair around them
+        self.assertLessEqual(len(queries), 9)
+        self.assertTrue(self.group.conversation.members.filter(user=self.students[0]).exists())
+        self.assertTrue(Notification.objects.filter(user=self.students[0]).exists())
+
+    def test_invalid_token_is_refused(self):
+        response = self._join_via_link(self.students[0], token='not-the-token')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.students[0])
+        response = self.client.post(reverse('studygroup-join', kwargs={'pk': self.group.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_member_count, 1)
+
+    def test_rejoin_reactivates_the_membership(self):
+        student = self.students[0]
+        self._join_via_link(student)
+        member_id = GroupMember.objects.get(group=self.group, user=student).pk
+
+        response = self.client.post(reverse('studygroup-leave', kwargs={'pk': self.group.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('studygroup-leave', kwargs={'pk': self.group.pk}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self._join_via_link(student)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['id'], member_id)
+        self.assertEqual(self.group.conversation.members.filter(user=student).count(), 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_member_count, 2)
+
+    def test_adding_a_former_member_reactivates_them(self):
+        student = self.students[0]
+        self._join_via_link(student)
+        self.client.post(reverse('studygroup-leave', kwargs={'pk': self.group.pk}))
+
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(
+            reverse('groupmember-list'),
+            {'group_id': self.group.pk, 'user_email': student.email}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(GroupMember.objects.get(group=self.group, user=student).is_active)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_member_count, 2)
+
+
+class BulkMemberImportTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@test.com',
+            username='owner',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(
+            reverse('studygroup-list'),
+            {'group_name': 'Algebra', 'max_members': 60, 'is_public': True},
+            format='json'
+        )
+        self.group = StudyGroup.objects.get(pk=response.data['id'])
+        self.students = User.objects.bulk_create([
+            User(email=f'student{i}@test.com', username=f'student{i}', password='!')
+            for i in range(50)
+        ])
+
+    def _import(self, **data):
+        return self.client.post(
+            reverse('groupmember-bulk'), {'group_id': self.group.pk, **data}, format='json'
+        )
+
+    def test_whole_class_is_added_in_a_fixed_number_of_queries(self):
+        emails = [student.email for student in self.students[:40]]
+        user_ids = [student.pk for student in self.students[40:]]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._import(emails=emails + ['nobody@test.com'], user_ids=user_ids)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['added']), 50)
+        self.assertEqual(response.data['not_found'], ['nobody@test.com'])
+        self.assertLess(len(queries), 20)
+
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_member_count, 51)
+        self.assertEqual(self.group.conversation.members.count(), 51)
+        self.assertEqual(
+            Notification.objects.filter(related_group=self.group, notification_type='group')
+            .exclude(user=self.owner).count(),
+            50
+        )
+
+    def test_existing_members_are_reported_and_former_members_reactivated(self):
+        self._import(user_ids=[self.students[0].pk, self.students[1].pk])
+        GroupMember.objects.filter(user=self.students[1]).update(is_active=False)
+        StudyGroup.objects.release_seat(self.group.pk)
+
+        response = self._import(user_ids=[s.pk for s in self.students[:3]])
+        self.assertEqual(sorted(response.data['added']), [self.students[1].pk, self.students[2].pk])
+        self.assertEqual(response.data['already_members'], [self.students[0].pk])
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_member_count, 4)
+
+    def test_import_beyond_capacity_adds_nobody(self):
+        StudyGroup.objects.filter(pk=self.group.pk).update(max_members=10)
+
+        response = self._import(user_ids=[s.pk for s in self.students[:10]])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(GroupMember.objects.filter(group=self.group).count(), 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.active_member_count, 1)
+
+    def test_non_members_cannot_import(self):
+        self.client.force_authenticate(user=self.students[0])
+        response = self._import(user_ids=[self.students[1].pk])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class GroupActivityRollupTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@test.com',
+            username='owner',
+            password='password123'
+        )
+        self.member = User.objects.create_user(
+            email='member@test.com',
+            username='member',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(
+            reverse('studygroup-list'),
+            {'group_name': 'Algebra', 'is_public': True},
+            format='json'
+        )
+        self.group = StudyGroup.objects.get(pk=response.data['id'])
+        self.client.force_authenticate(user=self.member)
+        self.client.post(reverse('studygroup-join', kwargs={'pk': self.group.pk}))
+        self.client.force_authenticate(user=self.owner)
+        self.url = reverse('studygroup-analytics', kwargs={'pk': self.group.pk})
+
+    def _task(self, **kwargs):
+        from Tasks.models import Task
+
+        return Task.objects.create(
+            title='Essay',
+            assigned_to=self.member,
+            created_by=self.owner,
+            group=self.group,
+            due_date=timezone.now() + timedelta(days=3),
+            **kwargs
+        )
+
+    def test_events_roll_up_into_todays_row(self):
+        from Message.models import Message
+
+        conversation = self.group.conversation
+        for _ in range(3):
+            Message.objects.create(conversation=conversation, sender=self.member, content='hi')
+        Message.objects.create(conversation=conversation, sender=self.owner, content='hello')
+        Message.objects.filter(sender=self.owner).get().delete()
+
+        done = self._task()
+        self._task()
+        done.status = 'completed'
+        done.save()
+        self._task(status='completed').delete()
+
+        day = GroupActivityDay.objects.get(group=self.group, day=timezone.localdate())
+        self.assertEqual(
+            (day.messages, day.tasks_created, day.tasks_completed, day.members_joined),
+            (3, 2, 1, 2)
+        )
+
+    def test_analytics_reads_the_rollup(self):
+        from Message.models import Message
+
+        Message.objects.create(conversation=self.group.conversation, sender=self.member, content='hi')
+        self._task(status='completed')
+        GroupActivityDay.objects.create(
+            group=self.group, day=timezone.localdate() - timedelta(days=8), messages=5
+        )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'days': 14})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_members'], 2)
+        self.assertEqual(response.data['total_messages'], 6)
+        self.assertEqual(response.data['completed_tasks'], 1)
+        self.assertEqual(response.data['completion_rate'], 100)
+        self.assertEqual(response.data['active_members_this_week'], 1)
+        self.assertEqual(response.data['trends']['messages'], {'this_week': 1, 'last_week': 5})
+        self.assertEqual(len(response.data['daily']), 14)
+        self.assertEqual(response.data['daily'][-1]['members_joined'], 2)
+
+    def test_leaving_is_recorded(self):
+        self.client.force_authenticate(user=self.member)
+        self.client.post(reverse('studygroup-leave', kwargs={'pk': self.group.pk}))
+
+        day = GroupActivityDay.objects.get(group=self.group, day=timezone.localdate())
+        self.assertEqual((day.members_joined, day.members_left), (2, 1))
+
+    def _fill_group(self):
+        from Message.models import Message
+
+        Message.objects.create(conversation=self.group.conversation, sender=self.member, content='hi')
+        self._task()
+        self._task(status='completed')
+
+    def test_deleting_a_group_with_messages_and_tasks(self):
+        self._fill_group()
+
+        self.group.delete()
+
+        connection.check_constraints()
+        self.assertFalse(GroupActivityDay.objects.exists())
+
+    def test_last_member_leaving_deletes_the_group(self):
+        self._fill_group()
+        self.client.force_authenticate(user=self.member)
+        self.client.post(reverse('studygroup-leave', kwargs={'pk': self.group.pk}))
+        self.client.force_authenticate(user=self.owner)
+
+        response = self.client.post(reverse('studygroup-leave', kwargs={'pk': self.group.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        connection.check_constraints()
+        self.assertFalse(StudyGroup.objects.filter(pk=self.group.pk).exists())
+        self.assertFalse(GroupActivityDay.objects.exists())
+
+    def test_deleting_the_owner_deletes_their_group(self):
+        self._fill_group()
+
+        self.owner.delete()
+
+        connection.check_constraints()
+        self.assertFalse(GroupActivityDay.objects.exists())
+
+
+class GroupDiscoveryTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@test.com',
+            username='owner',
+            password='password123'
+        )
+        self.viewer = User.objects.create_user(
+            email='viewer@test.com',
+            username='viewer',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.viewer)
+
+    def _group(self, name, members=1, messages=0, **kwargs):
+        group = StudyGroup.objects.create(
+            group_name=name, created_by=self.owner, active_member_count=members, **kwargs
+        )
+        if messages:
+            GroupActivityDay.objects.create(group=group, day=timezone.localdate(), messages=messages)
+        return group
+
+    def _discover(self, **params):
+        response = self.client.get(reverse('studygroup-discover'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_feed_is_ranked_by_activity_and_members(self):
+        quiet = self._group('Quiet', members=2)
+        busy = self._group('Busy', members=2, messages=40)
+        big = self._group('Big', members=8, messages=5)
+        self._group('Private', messages=100, is_public=False)
+        self._group('Full', members=10, max_members=10, messages=100)
+
+        self.assertEqual(GroupDiscovery.refresh(), 3)
+        with self.assertNumQueries(2):
+            response = self._discover()
+        self.assertEqual([g['id'] for g in response.data['results']], [busy.id, big.id, quiet.id])
+
+    def test_feed_skips_joined_groups_and_filters_by_type(self):
+        joined = self._group('Joined', messages=50)
+        GroupMember.objects.create(user=self.viewer, group=joined)
+        project = self._group('Project', group_type='project')
+        self._group('Academic')
+        GroupDiscovery.refresh()
+
+        response = self._discover()
+        self.assertNotIn(joined.id, [g['id'] for g in response.data['results']])
+        response = self._discover(type='project')
+        self.assertEqual([g['id'] for g in response.data['results']], [project.id])
+
+    def test_feed_pages_by_keyset_cursor(self):
+        # Two pairs of equal scores so pages break inside a tie
+        for i in range(5):
+            self._group(f'Group {i}', messages=i // 2)
+        GroupDiscovery.refresh()
+        ranked = list(
+            GroupRanking.objects.order_by('-score', 'group_id').values_list('group_id', flat=True)
+        )
+
+        first = self._discover(page_size=2)
+        self.assertIsNone(first.data['previous'])
+        self.assertNotIn('page=', first.data['next'])
+        with self.assertNumQueries(2):
+            second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        self.assertIsNone(third.data['next'])
+        seen = [g['id'] for page in (first, second, third) for g in page.data['results']]
+        self.assertEqual(seen, ranked)
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(back.data['results'], second.data['results'])
+        back = self.client.get(back.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(back.data['previous'])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(reverse('studygroup-discover'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_refresh_drops_groups_that_stop_qualifying(self):
+        group = self._group('Algebra')
+        GroupDiscovery.refresh()
+        StudyGroup.objects.filter(pk=group.pk).update(is_public=False)
+
+        self.assertEqual(self._discover().data['results'], [])
+        GroupDiscovery.refresh()
+        self.assertFalse(GroupRanking.objects.exists())
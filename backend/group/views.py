@@ -1,24 +1,37 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
-from .models import StudyGroup, GroupMember
+from .membership import MembershipError, add_members, join_group, leave_group, set_member_active
+from .analytics import GroupAnalytics, clamp_days
+from .discovery import GroupDiscovery
+from .models import GroupActivityDay, StudyGroup, GroupMember
 from .serializers import (
     StudyGroupCreateSerializer, 
     StudyGroupListSerializer, 
     StudyGroupDetailSerializer, 
     GroupMemberSerializer,
     GroupMemberUpdateSerializer,
-    GroupMemberCreateSerializer
+    GroupMemberCreateSerializer,
+    GroupMemberBulkCreateSerializer
 )
 from django.db.models import Q
 from django.db import transaction
-from Notifications.models import Notification
 from rest_framework.decorators import action
 from datetime import timezone
 from datetime import timedelta, datetime
-from django.utils.timezone import now as timezone_now
 from rest_framework.exceptions import PermissionDenied
 from Message.models import Conversation, ConversationMember
 from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+DISCOVER_PAGE_SIZE = 20
+DISCOVER_MAX_PAGE_SIZE = 50
+
+
+def _clamped_int(value, default, minimum, maximum):
+    try:
+        return min(max(int(value), minimum), maximum)
+    except (TypeError, ValueError):
+        return default
 
 class StudyGroupViewSet(viewsets.ModelViewSet):
     queryset = StudyGroup.objects.all()
@@ -36,9 +49,15 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if self.action == 'list':
-            return StudyGroup.objects.filter(
-                Q(is_public=True) | Q(members__user=user, members__is_active=True)
-            ).distinct().order_by('-created_at')
+            return StudyGroup.objects.with_member_info(user).filter(
+                Q(is_public=True) | Q(is_member=True)
+            ).order_by('-created_at')
+        if self.action == 'retrieve':
+            return StudyGroup.objects.with_member_info(user).prefetch_related(
+                StudyGroup.objects.active_members_prefetch()
+            )
+        if self.action == 'analytics':
+            return GroupAnalytics.annotate(StudyGroup.objects.all())
 
         return StudyGroup.objects.all()
     
@@ -48,7 +67,9 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
 
         if StudyGroup.objects.filter(group_name=group_name, created_by=user).exists():
             raise ValidationError({"group_name": "You already have a group with this name."})
-        group = serializer.save(created_by=user)
+        # The creator is the first active member
+        group = serializer.save(created_by=user, active_member_count=1)
+        GroupActivityDay.objects.record(group.pk, members_joined=1)
 
         GroupMember.objects.create(
             user=self.request.user,
@@ -71,7 +92,7 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
         user = request.user
 
         # security: if group is private and user isn't a member, restrict access
-        if not instance.is_public and not instance.members.filter(user=user, is_active=True).exists():
+        if not instance.is_public and not instance.is_member:
             raise PermissionDenied("You are not a member of this private group.")
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -79,167 +100,102 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='my-groups')
     def my_groups(self, request):
         # Return groups where the current user is an active member.
-        groups = StudyGroup.objects.filter(
-            members__user=request.user,
-            members__is_active=True
-        ).distinct().order_by('-created_at')
+        groups = StudyGroup.objects.with_member_info(request.user).filter(
+            is_member=True
+        ).order_by('-created_at')
         serializer = StudyGroupListSerializer(groups, many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'], url_path='join-via-link/(?P<token>[^/.]+)')
     def join_via_link(self, request, pk=None, token=None):
-        # Construct the request data format for the unified join method
-        request._full_data = {'group_id': pk, 'invitation_token': token}
-        return self.join(request)
-
-
+        return self._join(request, pk, token)
 
     @action(detail=True, methods=['post'])
     def join(self,request, pk=None):
-        group_id = pk or request.data.get('group_id')
+        return self._join(
+            request,
+            pk or request.data.get('group_id'),
+            request.data.get('invitation_token')
+        )
 
+    def _join(self, request, group_id, invitation_token):
         if not group_id:
             return Response(
                 {'error': "group_id is required."}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            group = StudyGroup.objects.get(id=group_id)
-        except StudyGroup.DoesNotExist:
-            return Response(
-                {"error": "Group not found."}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        existing_member = GroupMember.objects.filter(
-            user=request.user,
-            group=group,
-            is_active=True
-        ).first()
+            member = join_group(request.user, group_id, invitation_token)
+        except MembershipError as e:
+            return Response({"error": str(e)}, status=e.status_code)
 
-        if existing_member: 
-            return Response(
-                {"error": "You are already a member of this group."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        # check for invitation token(for private groups)
-        invitation_token = request.data.get('invitation_token')
+        serilizer = GroupMemberSerializer(member)
+        return Response(serilizer.data, status=status.HTTP_201_CREATED)
 
-        if not group.is_public:
-            # private group requires ivitation token
-            if not invitation_token:
-                return Response(
-                    {"error": "This group is private. An invitation token is required to join."},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-            # validate invitation token
-            if str(group.invitation_token) != str(invitation_token):
-                return Response(
-                    {"error": "Invalid invitation token."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        # Handle previosly inactive membership (user rejoining)
-        inactive_member = GroupMember.objects.filter(
-            user=request.user,
-            group=group,
-            is_active=False
-        ).first()
 
-        if inactive_member:
-            inactive_member.is_active = True
-            inactive_member.save()
-            member = inactive_member
-        else:
-            # create new membership
-            member = GroupMember.objects.create(
-                user=request.user,
-                group=group
-            )
-        # Ensure conversation exists and user is added
-        conversation, _ = Conversation.objects.get_or_create(
-            group=group,
-            defaults={'type': 'group'}
+    @action(detail=False, methods=['get'])
+    def discover(self, request):
+        # Public groups the user isn't in, best ranked first; ?type= filters
+        page_size = _clamped_int(
+            request.query_params.get('page_size'), DISCOVER_PAGE_SIZE, 1, DISCOVER_MAX_PAGE_SIZE
         )
-        ConversationMember.objects.get_or_create(
-            conversation=conversation,
-            user=request.user
+        position, reverse = None, False
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                position, reverse = GroupDiscovery.decode_cursor(cursor)
+            except ValueError:
+                raise ValidationError({'cursor': 'Invalid cursor.'})
+        groups, keys, has_more = GroupDiscovery.page(
+            request.user,
+            limit=page_size,
+            position=position,
+            reverse=reverse,
+            group_type=request.query_params.get('type')
         )
 
-        # send notification
-        Notification.objects.create(
-            user =request.user,
-            notification_type='group', 
-            title=f"Joined {group.group_name}",
-            message=f"You have successfully joined {group.group_name}", 
-            related_group=group
-        )
-        serilizer = GroupMemberSerializer(member)
-        return Response(serilizer.data, status=status.HTTP_201_CREATED)
+        # Like DRF's CursorPagination: the side we came from always has a page
+        has_next = has_more if not reverse else position is not None
+        has_previous = has_more if reverse else position is not None
+        url = request.build_absolute_uri()
 
+        def link(key, to_previous):
+            return replace_query_param(url, 'cursor', GroupDiscovery.encode_cursor(*key, reverse=to_previous))
+
+        serializer = StudyGroupListSerializer(groups, many=True, context={'request': request})
+        return Response({
+            'next': link(keys[-1], False) if has_next and keys else None,
+            'previous': link(keys[0], True) if has_previous and keys else None,
+            'results': serializer.data,
+        })
 
     @action(detail=False, methods=['get'])
     def search(self, request):
         query = request.query_params.get('q', "")
         if not query:
             return Response([])
-        group = StudyGroup.objects.filter(
+        group = StudyGroup.objects.with_member_info(request.user).filter(
             Q(group_name__icontains=query) , is_public=True
-        ).distinct()[:10]
+        )[:10]
         serializer = StudyGroupListSerializer(group, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def leave(self, request, pk=None):
         group = self.get_object()
-        user = request.user
 
         try:
-            with transaction.atomic():
-                member = GroupMember.objects.filter(
-                    user=user,
-                    group=group,
-                    is_active=True
-                ).select_for_update().first()
-
-                if not member:
-                    return Response(
-                        {"error": "You are not a member of this group."},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                is_owner = (group.created_by == user)
-                
-                if is_owner:
-                    # Look for other active members to transfer ownership
-                    other_member = GroupMember.objects.filter(
-                        group=group,
-                        is_active=True
-                    ).exclude(user=user).order_by('joined_at').first()
-
-                    if other_member:
-                        # Transfer ownership to the next earliest member
-                        group.created_by = other_member.user
-                        group.save()
-                    else:
-                        # Owner is the only member, delete the group
-                        group.delete()
-                        return Response(
-                            {"message": "Group deleted as you were the last member."},
-                            status=status.HTTP_200_OK
-                        )
-
-                # Soft delete current member
-                member.is_active = False
-                member.save()
-
-                return Response({"message": "Successfully left the group."})
-        except Exception as e:
-            return Response(
-                {"error": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            if not leave_group(request.user, group):
+                return Response(
+                    {"message": "Group deleted as you were the last member."},
+                    status=status.HTTP_200_OK
+                )
+        except MembershipError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+        return Response({"message": "Successfully left the group."})
         
     @action(detail=True, methods=['get'])
     def members(self, request, pk=None):
         group = self.get_object()
-        members  = group.members.filter(is_active=True)
+        members  = group.members.filter(is_active=True).select_related('user', 'group')
         
         serializer = GroupMemberSerializer(members, many=True)
         return Response(serializer.data)
@@ -249,48 +205,11 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
         group = self.get_object()
         
         # Only the creator can view analytics
-        if group.created_by != request.user:
+        if group.created_by_id != request.user.id:
             raise PermissionDenied("Only the group creator can access analytics.")
 
-        total_members = group.members.filter(is_active=True).count()
-        
-        # Messages are stored in the conversation model
-        try:
-            total_messages = group.conversation.messages.count() if hasattr(group, 'conversation') and group.conversation else 0
-        except:
-            total_messages = 0
-            
-        total_tasks = group.tasks.count()
-        completed_tasks = group.tasks.filter(status='completed').count()
-        
-        week_ago = timezone_now() - timedelta(days=7)
-        
-        # Count active members who have sent messages this week
-        try:
-            if hasattr(group, 'conversation') and group.conversation:
-                active_members = GroupMember.objects.filter(
-                    group=group,
-                    is_active=True,
-                    user__sent_messages__conversation=group.conversation,
-                    user__sent_messages__timestamp__gte=week_ago
-                ).distinct().count()
-            else:
-                active_members = 0
-        except:
-            active_members = 0
-
-        analytics_data = {
-            'group_id': group.id,
-            'group_name': group.group_name,
-            'total_members': total_members,
-            'total_messages': total_messages,
-            'total_asks': total_tasks,
-            'completed_tasks': completed_tasks,
-            'active_members_this_week': active_members,
-            'completion_rate': round((completed_tasks/total_tasks * 100) if total_tasks > 0 else 0, 2)
-        }
-
-        return Response(analytics_data)
+        days = clamp_days(request.query_params.get('days'))
+        return Response(GroupAnalytics.report(group, days))
         
 class GroupMemberViewSet(viewsets.ModelViewSet):
     queryset = GroupMember.objects.filter(is_active=True)
@@ -299,6 +218,8 @@ class GroupMemberViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return GroupMemberCreateSerializer
+        elif self.action == 'bulk':
+            return GroupMemberBulkCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return GroupMemberUpdateSerializer
         return GroupMemberSerializer
@@ -308,9 +229,9 @@ class GroupMemberViewSet(viewsets.ModelViewSet):
         return GroupMember.objects.filter(
             group__members__user=user,
             group__members__is_active=True
-        ).distinct()
+        ).select_related('user', 'group').distinct()
     
-    def perform_create(self, serializer):
+    def _group_for_adding(self):
         group_id = self.request.data.get('group_id')
         if not group_id:
             raise ValidationError({"group_id": "This field is required."})
@@ -337,9 +258,26 @@ class GroupMemberViewSet(viewsets.ModelViewSet):
 
         if not current_user_membership:
             raise PermissionDenied("You don't have permission to add members to this group........")
+        return group
 
+    def perform_create(self, serializer):
         # Pass group to serializer
-        serializer.save(group=group)
+        serializer.save(group=self._group_for_adding())
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Add up to MAX_BULK_MEMBERS users, by email or id, in one request."""
+        group = self._group_for_adding()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            report = add_members(group, **serializer.validated_data)
+        except MembershipError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+        return Response(
+            report, status=status.HTTP_201_CREATED if report['added'] else status.HTTP_200_OK
+        )
 
     def destroy(self, request, *args, **kwargs):
         # Remove a member from the group. Only admins/moderators can do this.
@@ -360,8 +298,7 @@ class GroupMemberViewSet(viewsets.ModelViewSet):
         if member_to_remove.user == request.user:
             raise PermissionDenied("Use the leave endpoint to leave the group.")
 
-        # Soft delete by setting is_active to False
-        member_to_remove.is_active = False
-        member_to_remove.save()
+        # Soft delete by setting is_active to False; removing a member twice is a no-op
+        set_member_active(member_to_remove, False)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
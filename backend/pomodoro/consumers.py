@@ -26,12 +26,13 @@ from jwt import decode as jwt_decode, InvalidTokenError
 from .models import PomodoroSession, UserPomodoroSession
 from group.models import StudyGroup, GroupMember
 from Notifications.notification_service import NotificationService
+from common.metrics import ConsumerMetricsMixin
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class PomodoroConsumer(AsyncWebsocketConsumer):
+class PomodoroConsumer(ConsumerMetricsMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time Pomodoro timer synchronization.
     
@@ -81,7 +81,7 @@ class PomodoroSession(models.Model):
         db_table = 'pomodoro_sessions'
         ordering = ['-created_at']
 
-    def can_control(self, user, action):
+    def can_control(self, user, action, is_member=None):
         """
         Determine if a user can perform a specific action on this session.
         
@@ -90,26 +90,23 @@ class PomodoroSession(models.Model):
         - FLEXIBLE mode: All members can start/pause/resume (join the session)
         
         Settings changes are always leader-only regardless of mode.
+        Pass `is_member` when the caller already knows whether the user is
+        an active member of the group, to skip the lookup.
         """
         if not user or not user.is_authenticated:
             return False
         
         # Check if user is the group creator (always has full control)
-        is_creator = (self.group.created_by == user)
+        is_creator = (self.group.created_by_id == user.pk)
         if is_creator:
             return True
         
         # Check roles via GroupMember
-        from group.models import GroupMember
-        try:
-            member = self.group.members.get(user=user, is_active=True)
-        except GroupMember.DoesNotExist:
+        if is_member is None:
+            is_member = self.group.members.filter(user=user, is_active=True).exists()
+        if not is_member:
             return False
         
-        # Group creators have full control
-        if self.group.created_by == user:
-            return True
-        
         # Settings changes are ALWAYS leader-only
         if action in ['settings', 'toggle_sync_mode']:
             return False
@@ -59,14 +59,14 @@ class PomodoroSessionSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.can_control(request.user, 'start')
+        return obj.can_control(request.user, 'start', is_member=self.context.get('is_member'))
 
     def get_is_creator(self, obj):
         """Return True only if the requesting user is the group's original creator."""
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.group.created_by == request.user
+        return obj.group.created_by_id == request.user.pk
 
 
 class PomodoroSettingsSerializer(serializers.ModelSerializer):
@@ -179,5 +179,5 @@ class UserPomodoroSessionSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.group.created_by == request.user
+        return obj.group.created_by_id == request.user.pk
 
@@ -85,6 +85,13 @@ class PomodoroViewSet(viewsets.ModelViewSet):
             group_id__in=user_groups
         ).select_related('group', 'started_by')
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # get_queryset only returns sessions of the user's active groups;
+        # by_group passes its own answer
+        context['is_member'] = True
+        return context
+
     def _get_flexible_response(self, session, request):
         """
         Helper to return the UserPomodoroSession state masked with Shared Session ID.
@@ -139,7 +146,10 @@ class PomodoroViewSet(viewsets.ModelViewSet):
         if session.sync_mode == 'flexible':
             return self._get_flexible_response(session, request)
         
-        serializer = self.get_serializer(session)
+        # Public groups' sessions are served to non-members too
+        serializer = self.get_serializer(
+            session, context={**self.get_serializer_context(), 'is_member': is_member}
+        )
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -64,8 +64,9 @@ class StudyFileViewSet(viewsets.ModelViewSet):
         if mine:
             queryset = queryset.filter(owner=request.user)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     # Optional: Filter by file type
     # Example: /api/study-files/by_type/?type=pdf
@@ -101,6 +101,8 @@ LOGIN_REDIRECT_URL = '/api/auth/google/callback/' # Redirect to backend view to
 LOGOUT_REDIRECT_URL = f'{FRONTEND_URL}/login'     # Redirect to frontend login after logout
 
 MIDDLEWARE = [
+    'common.metrics.MetricsMiddleware',
+    'common.instrumentation.RequestInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -234,6 +236,9 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.BasicAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Cursor pages for every list endpoint; see common.pagination
+    'DEFAULT_PAGINATION_CLASS': 'common.pagination.CursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -271,6 +276,66 @@ CELERY_RESULT_BACKEND = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL"))
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# Periodic jobs, run by `celery -A studybuddy beat`
+CELERY_BEAT_SCHEDULE = {
+    'mark-overdue-tasks': {
+        'task': 'Tasks.tasks.mark_overdue_tasks',
+        'schedule': 5 * 60,
+    },
+    'send-due-reminders': {
+        'task': 'Notifications.tasks.send_due_reminders',
+        'schedule': 60,
+    },
+    'reconcile-member-counts': {
+        'task': 'group.tasks.reconcile_member_counts',
+        'schedule': 60 * 60,
+    },
+    'reconcile-subscriptions': {
+        'task': 'subscriptions.tasks.reconcile_subscriptions',
+        'schedule': 15 * 60,
+    },
+    'refresh-group-rankings': {
+        'task': 'group.tasks.refresh_group_rankings',
+        'schedule': 15 * 60,
+    },
+}
+
+# Minutes before a task's due date / a session's start to send reminders
+REMINDER_OFFSET_MINUTES = {
+    'task': [24 * 60, 60],
+    'session': [60, 10],
+}
+
+# Share of requests logged with query count, DB and serializer time;
+# requests slower than REQUEST_INSTRUMENTATION_SLOW_MS are always logged
+REQUEST_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('REQUEST_INSTRUMENTATION_SAMPLE_RATE', '0.01'))
+REQUEST_INSTRUMENTATION_SLOW_MS = float(os.getenv('REQUEST_INSTRUMENTATION_SLOW_MS', '1000'))
+
+# /internal/metrics/ answers scrapes bearing METRICS_TOKEN or, with no
+# token set, scrapes from METRICS_ALLOWED_IPS. Neither set refuses every
+# scrape. The IP list checks REMOTE_ADDR, so behind a reverse proxy on the
+# same host every client looks like the proxy: list loopback only when
+# nothing proxies to this process, and use the token otherwise.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'studybuddy.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
@@ -300,12 +365,16 @@ cloudinary.config(
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
 FRONTEND_URL = os.getenv('FRONTEND_URL', '').rstrip('/')
+# Public origin of this API, for absolute URLs built outside a request
+BACKEND_URL = os.getenv('BACKEND_URL', '').rstrip('/')
 CHAPA_SECRET_KEY = os.getenv('CHAPA_SECRET_KEY')
 CHAPA_WEBHOOK_SECRET = os.getenv('CHAPA_WEBHOOK_SECRET')
 CHAPA_PUBLIC_KEY = os.getenv('CHAPA_PUBLIC_KEY')
 # MEDIA_URL = '/media/'
 # MEDIA_ROOT = BASE_DIR / 'media'
 CHAPA_MOCK_MODE = os.getenv('CHAPA_MOCK_MODE', 'False').lower() in ('true', '1')
+# Checkouts still pending after this long are re-verified and settled
+PENDING_PAYMENT_TTL = timedelta(hours=24)
 
 # For development, set to True. In production, should be False.
 CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False').lower() in ('true', '1')
@@ -19,6 +19,7 @@ from django.urls import path, include
 from django.conf import settings
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from django.conf.urls.static import static
+from common.metrics import metrics_view
 
 
  
@@ -41,6 +42,7 @@ urlpatterns = [
     path('api/studytracker/', include('studytracker.urls')),
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('internal/metrics/', metrics_view, name='metrics'),
 
 ] # + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 # if settings.DEBUG:
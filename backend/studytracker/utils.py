@@ -3,6 +3,7 @@ from django.utils import timezone
 from datetime import timedelta
 from .models import StudyStreak, Achievement, UserAchievement, StudyActivity
 from Notifications.models import Notification
+from common.signals import notifications_bulk_created
 
 def record_activity_and_update_streak(user, duration=1):
     # Called by the server whenever user activity is detected.
@@ -59,4 +60,5 @@ def _check_badges(user, streak_days):
     ]
 
     UserAchievement.objects.bulk_create(new_achievements)
-    Notification.objects.bulk_create(new_notifications)
\ No newline at end of file
+    Notification.objects.bulk_create(new_notifications)
+    notifications_bulk_created(new_notifications)
\ No newline at end of file
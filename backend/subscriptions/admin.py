@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SubscriptionPlan, UserSubscription, Payment
+from .models import SubscriptionPlan, UserSubscription, Payment, IdempotencyKey
 
 
 @admin.register(SubscriptionPlan)
@@ -24,3 +24,10 @@ class PaymentAdmin(admin.ModelAdmin):
     list_filter = ['status', 'currency']
     search_fields = ['tx_ref', 'user__username', 'user__email']
     raw_id_fields = ['user', 'subscription']
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'outcome', 'created_at']
+    list_filter = ['outcome']
+    search_fields = ['key']
@@ -1,18 +1,66 @@
+import threading
 import uuid
+
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class ChapaService:
     """
     Chapa Payment Gateway Service
+
+    Calls go through one pooled requests.Session per process, so keep-alive
+    connections to Chapa are reused, with (connect, read) timeouts and
+    retries. Verification GETs are retried on gateway errors; initialize
+    POSTs only when the connection could not be made.
     """
 
     BASE_URL = "https://api.chapa.co/v1"
+    POOL_SIZE = 20
+    TIMEOUT = (3.05, 15)
+    MAX_RETRIES = 2
 
     def __init__(self):
         # Explicit mock mode (NEVER auto-detect from env)
         self.is_mock = getattr(settings, "CHAPA_MOCK_MODE", False)
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return getattr(settings, "CHAPA_BASE_URL", self.BASE_URL).rstrip("/")
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        retries = Retry(
+            total=getattr(settings, "CHAPA_MAX_RETRIES", self.MAX_RETRIES),
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_SIZE,
+            pool_maxsize=self.POOL_SIZE,
+            max_retries=retries,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def timeout(self):
+        return getattr(settings, "CHAPA_TIMEOUT", self.TIMEOUT)
 
     def get_auth_headers(self):
         """
@@ -73,11 +121,11 @@ class ChapaService:
 
         # ---------- REAL CHAPA CALL ----------
         try:
-            response = requests.post(
-                f"{self.BASE_URL}/transaction/initialize",
+            response = self.session.post(
+                f"{self.base_url}/transaction/initialize",
                 json=payload,
                 headers=self.get_auth_headers(),
-                timeout=30,
+                timeout=self.timeout,
             )
 
             data = response.json()
@@ -124,10 +172,10 @@ class ChapaService:
 
         # ---------- REAL CHAPA CALL ----------
         try:
-            response = requests.get(
-                f"{self.BASE_URL}/transaction/verify/{tx_ref}",
+            response = self.session.get(
+                f"{self.base_url}/transaction/verify/{tx_ref}",
                 headers=self.get_auth_headers(),
-                timeout=30,
+                timeout=self.timeout,
             )
 
             data = response.json()
@@ -144,6 +192,8 @@ class ChapaService:
                 "verified": False,
                 "message": data.get("message", "Verification failed"),
                 "status_code": response.status_code,
+                # Gateway trouble, not an answer about the payment
+                "retryable": response.status_code in (429, 502, 503, 504),
                 "data": data,
             }
 
@@ -152,6 +202,7 @@ class ChapaService:
                 "success": False,
                 "verified": False,
                 "message": str(e),
+                "retryable": True,
                 "data": None,
             }
 
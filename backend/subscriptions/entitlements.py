@@ -0,0 +1,104 @@
+"""
+Per-user premium entitlements.
+
+A user's entitlement is built from their active subscriptions and cached
+until the latest end date among them, so premium checks and
+my_subscription are a cache hit. Every subscription in the record keeps
+its own end date and expired ones are dropped when the record is read,
+which resolves stacked subscriptions without touching the database.
+Records are keyed by a per-user version, as in Tasks.cache. Any change
+to a user's subscriptions bumps the version (see common.signals) and
+activation rebuilds the record under the new one. A build that read its
+rows before the change stores them under the version it started from,
+which is no longer read, so it cannot overwrite the fresh record.
+"""
+
+import math
+import time
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import UserSubscription
+from .serializers import UserSubscriptionSerializer
+
+
+class Entitlement:
+    # Lifetime of records with no end date to expire at: no subscription,
+    # or an open-ended one. Subscription changes delete them sooner.
+    CACHE_TTL = 60 * 60 * 24
+
+    # Versions must outlive every record keyed by them
+    VERSION_TTL = CACHE_TTL * 7
+
+    @staticmethod
+    def version_key(user_id):
+        return f"entitlement_version_{user_id}"
+
+    @staticmethod
+    def cache_key(user_id, version):
+        return f"entitlement_{user_id}_{version}"
+
+    @classmethod
+    def _version(cls, user_id):
+        key = cls.version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            # A nanosecond start never repeats a version an evicted key had
+            cache.add(key, time.time_ns(), timeout=cls.VERSION_TTL)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def _load(user_id, now):
+        subscriptions = (
+            UserSubscription.objects.filter(user_id=user_id, status='active')
+            .filter(Q(end_date__isnull=True) | Q(end_date__gt=now))
+            .select_related('plan')
+        )
+        return [
+            (sub.end_date.timestamp() if sub.end_date else None, UserSubscriptionSerializer(sub).data)
+            for sub in subscriptions
+        ]
+
+    @classmethod
+    def build(cls, user_id):
+        """Load the user's unexpired active subscriptions and cache the record."""
+        # Read before the rows, so a change landing meanwhile outdates this record
+        version = cls._version(user_id)
+        now = timezone.now()
+        record = cls._load(user_id, now)
+
+        ends = [end for end, _ in record]
+        if not ends or None in ends:
+            timeout = cls.CACHE_TTL
+        else:
+            timeout = max(1, math.ceil(max(ends) - now.timestamp()))
+        cache.set(cls.cache_key(user_id, version), record, timeout=timeout)
+        return record
+
+    @classmethod
+    def subscriptions(cls, user):
+        """Serialized subscriptions of `user` that are valid right now."""
+        record = cache.get(cls.cache_key(user.id, cls._version(user.id)))
+        if record is None:
+            record = cls.build(user.id)
+        now = timezone.now().timestamp()
+        return [data for end, data in record if end is None or end > now]
+
+    @classmethod
+    def is_premium(cls, user):
+        return bool(cls.subscriptions(user))
+
+    @classmethod
+    def invalidate(cls, user_id):
+        cls.invalidate_many([user_id])
+
+    @classmethod
+    def invalidate_many(cls, user_ids):
+        for user_id in set(user_ids):
+            try:
+                cache.incr(cls.version_key(user_id))
+            except ValueError:
+                pass  # Never read yet; the next read starts a fresh version
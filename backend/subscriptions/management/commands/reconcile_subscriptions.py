@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions.reconcile import SWEEP_BATCH_SIZE, reconcile_subscriptions
+
+
+class Command(BaseCommand):
+    help = 'Expire lapsed subscriptions and re-verify stale pending payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        report = reconcile_subscriptions(batch_size=options['batch_size'])
+        payments = report['payments']
+        self.stdout.write(
+            f"Expired {report['expired']} subscriptions in {report['expire_ms']}ms"
+        )
+        self.stdout.write(
+            f"Re-verified stale payments in {report['sweep_ms']}ms: "
+            f"{payments['succeeded']} succeeded, {payments['failed']} failed, "
+            f"{payments['deferred']} deferred"
+        )
+        self.stdout.write(self.style.SUCCESS("Subscription reconciliation complete"))
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 
@@ -50,6 +50,10 @@ class UserSubscription(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Expiry sweep: active subscriptions by end_date
+            models.Index(fields=['status', 'end_date']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.plan.name} ({self.status})"
@@ -63,25 +67,49 @@ class UserSubscription(models.Model):
         return True
 
     def activate(self):
-        # Activate the subscription with stacking logic
-        # Find the latest active and valid subscription for this user
-        latest_sub = UserSubscription.objects.filter(
-            user=self.user,
-            status='active'
-        ).exclude(id=self.id).order_by('-end_date').first()
-
-        now = timezone.now()
-        
-        if latest_sub and latest_sub.end_date and latest_sub.end_date > now:
-            # Stack after the latest subscription
-            self.start_date = latest_sub.end_date
-        else:
-            # Start immediately
-            self.start_date = now
-
-        self.status = 'active'
-        self.end_date = self.start_date + timezone.timedelta(days=self.plan.duration_days)
-        self.save()
+        """
+        Activate the subscription with stacking logic. Runs under a row lock
+        on the user, so concurrent activations of their subscriptions stack
+        one after another, and activating an active subscription is a no-op.
+        Returns whether this call activated it.
+        """
+        from django.contrib.auth import get_user_model
+
+        with transaction.atomic():
+            get_user_model().objects.select_for_update().only('pk').get(pk=self.user_id)
+
+            current = UserSubscription.objects.only(
+                'status', 'start_date', 'end_date'
+            ).get(pk=self.pk)
+            if current.status == 'active':
+                self.status = current.status
+                self.start_date = current.start_date
+                self.end_date = current.end_date
+                return False
+
+            # Find the latest active and valid subscription for this user
+            latest_sub = UserSubscription.objects.filter(
+                user_id=self.user_id,
+                status='active'
+            ).exclude(id=self.id).order_by('-end_date').first()
+
+            now = timezone.now()
+
+            if latest_sub and latest_sub.end_date and latest_sub.end_date > now:
+                # Stack after the latest subscription
+                self.start_date = latest_sub.end_date
+            else:
+                # Start immediately
+                self.start_date = now
+
+            self.status = 'active'
+            self.end_date = self.start_date + timezone.timedelta(days=self.plan.duration_days)
+            self.save(update_fields=['status', 'start_date', 'end_date', 'updated_at'])
+
+            # Rebuild the cached entitlement once the activation is visible
+            from .entitlements import Entitlement
+            transaction.on_commit(lambda: Entitlement.build(self.user_id))
+        return True
 
 
 class Payment(models.Model):
@@ -115,6 +143,31 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Stale checkout sweep: pending payments by age
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.tx_ref} - {self.amount} {self.currency} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A provider callback that has been settled, e.g. `chapa:<tx_ref>`. The
+    unique key is the guard: whoever inserts it settles the callback, and
+    every later delivery is a single lookup.
+    """
+    key = models.CharField(max_length=150, unique=True)
+    outcome = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+
+    def __str__(self):
+        return f"{self.key} ({self.outcome})"
+
+    @staticmethod
+    def for_payment(tx_ref):
+        return f"chapa:{tx_ref}"
@@ -0,0 +1,147 @@
+"""
+Applying Chapa verification results to payments and subscriptions.
+
+Both the verify endpoint and the webhook end up in `apply_verification`.
+It is idempotent on tx_ref through IdempotencyKey: the transaction that
+marks a payment successful also inserts `chapa:<tx_ref>`, so a webhook
+GET and POST racing for the same tx_ref settle it once, and every later
+callback is one lookup that never calls Chapa. Only a success writes the
+key; any other answer leaves the tx_ref open for a later success.
+
+Callers choose which unsuccessful answers fail a payment and cancel its
+subscription. Webhooks and the queued task only ever promote, since a
+callback may arrive before the money clears or name a tx_ref it has no
+business with. The verify endpoint fails a payment only when Chapa
+reports a terminal decline, and the reconcile sweep fails checkouts
+that are still unpaid after PENDING_PAYMENT_TTL.
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from common.utils import enqueue_task
+from .chapa_service import chapa_service
+from .models import IdempotencyKey, Payment
+
+logger = logging.getLogger(__name__)
+
+# How long a queued verification blocks duplicate webhook deliveries
+QUEUED_TTL = 5 * 60
+
+# Chapa payment statuses that end a checkout for good
+DECLINED_STATUSES = frozenset({'failed', 'cancelled'})
+
+# Which unsuccessful answers apply_verification records as failures
+FAIL_NONE = 'none'
+FAIL_DECLINED = 'declined'
+FAIL_UNPAID = 'unpaid'
+
+
+class VerificationUnavailable(Exception):
+    """Chapa could not be asked; the payment stays pending."""
+
+
+def _queued_key(tx_ref):
+    return f"chapa_verify_queued_{tx_ref}"
+
+
+def apply_verification(tx_ref, failures=FAIL_DECLINED):
+    """
+    Verify `tx_ref` with Chapa and record the outcome. Returns the payment,
+    or None when there is no payment for it. Raises VerificationUnavailable
+    when Chapa can't be reached, so callers can retry later.
+
+    `failures` picks the unsuccessful answers that fail the payment:
+    FAIL_DECLINED for a terminal status from Chapa, FAIL_UNPAID for any of
+    them, FAIL_NONE for none. Other answers leave the payment pending.
+    """
+    key = IdempotencyKey.for_payment(tx_ref)
+    if IdempotencyKey.objects.filter(key=key).exists():
+        return Payment.objects.filter(tx_ref=tx_ref).first()
+
+    payment = Payment.objects.filter(tx_ref=tx_ref).only('id', 'status').first()
+    if payment is None:
+        return None
+
+    result = chapa_service.verify_payment(tx_ref)
+    if not result['success'] and result.get('retryable'):
+        raise VerificationUnavailable(result.get('message', 'Chapa unavailable'))
+    verified = result['success'] and result['verified']
+    if not verified:
+        if _is_failure(result, failures):
+            return _record_failure(payment, result)
+        return payment
+
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key=key, outcome='success')
+
+            payment = Payment.objects.select_for_update().select_related(
+                'subscription__plan'
+            ).get(pk=payment.pk)
+            if payment.status == 'success':
+                return payment
+
+            payment.chapa_response = result.get('data') or {}
+            payment.status = 'success'
+            payment.save()
+            if payment.subscription:
+                payment.subscription.activate()
+    except IntegrityError:
+        # A concurrent callback inserted the key first and settled it
+        return Payment.objects.filter(tx_ref=tx_ref).first()
+    return payment
+
+
+def _is_failure(result, failures):
+    if failures == FAIL_UNPAID:
+        return True
+    if failures == FAIL_DECLINED:
+        return result['success'] and (result.get('data') or {}).get('status') in DECLINED_STATUSES
+    return False
+
+
+def _record_failure(payment, result):
+    # No key: a failure never settles the tx_ref, so a later success still can
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().select_related(
+            'subscription'
+        ).get(pk=payment.pk)
+        if payment.status == 'success':
+            return payment
+
+        payment.chapa_response = result.get('data') or {}
+        payment.status = 'failed'
+        payment.save()
+        subscription = payment.subscription
+        if subscription and subscription.status == 'pending':
+            subscription.status = 'cancelled'
+            subscription.save()
+    return payment
+
+
+def queue_verification(tx_ref):
+    """
+    Hand a webhook's tx_ref to the verify_chapa_payment task and return at
+    once. Deliveries for a tx_ref that is already settled (one key lookup)
+    or queued are dropped. Without a broker the verification runs inline instead.
+    """
+    from .tasks import verify_chapa_payment
+
+    if IdempotencyKey.objects.filter(key=IdempotencyKey.for_payment(tx_ref)).exists():
+        return False
+    if not cache.add(_queued_key(tx_ref), True, timeout=QUEUED_TTL):
+        return False
+
+    if not enqueue_task(verify_chapa_payment, tx_ref):
+        try:
+            apply_verification(tx_ref, failures=FAIL_NONE)
+        finally:
+            cache.delete(_queued_key(tx_ref))
+    return True
+
+
+def release_queued(tx_ref):
+    cache.delete(_queued_key(tx_ref))
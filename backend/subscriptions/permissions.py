@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from .models import UserSubscription
+from .entitlements import Entitlement
 
 class IsPremiumUser(permissions.BasePermission):
     """
@@ -11,8 +11,5 @@ class IsPremiumUser(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
         
-        # Check if user has an active subscription
-        return UserSubscription.objects.filter(
-            user=request.user,
-            status='active'
-        ).exists()
+        # Served from the cached entitlement, see subscriptions.entitlements
+        return Entitlement.is_premium(request.user)
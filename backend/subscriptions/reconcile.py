@@ -0,0 +1,92 @@
+"""
+Periodic subscription housekeeping.
+
+`expire_subscriptions` moves every active subscription past its end date
+to `expired` with one UPDATE over the (status, end_date) index.
+`sweep_stale_payments` re-verifies checkouts left pending for longer than
+settings.PENDING_PAYMENT_TTL, in batches of primary keys. Past the TTL
+any answer but a success fails the payment, so abandoned checkouts end
+up failed and their subscriptions cancelled. Payments Chapa can't
+answer for stay pending until the next run.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .entitlements import Entitlement
+from .models import Payment, UserSubscription
+from .payments import FAIL_UNPAID, VerificationUnavailable, apply_verification
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PENDING_PAYMENT_TTL = timedelta(hours=24)
+SWEEP_BATCH_SIZE = 100
+
+
+def expire_subscriptions(now=None):
+    """Expire active subscriptions past their end date. Returns how many."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = UserSubscription.objects.filter(status='active', end_date__lte=now)
+        user_ids = list(due.values_list('user_id', flat=True).distinct())
+        expired = due.update(status='expired', updated_at=now)
+    # update() skips the signals that drop cached entitlements
+    Entitlement.invalidate_many(user_ids)
+    return expired
+
+
+def sweep_stale_payments(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Re-verify pending payments older than the TTL. Returns counts per outcome."""
+    now = now or timezone.now()
+    ttl = getattr(settings, 'PENDING_PAYMENT_TTL', DEFAULT_PENDING_PAYMENT_TTL)
+    stale = Payment.objects.filter(status='pending', created_at__lt=now - ttl).order_by('pk')
+
+    counts = {'succeeded': 0, 'failed': 0, 'deferred': 0}
+    last_pk = 0
+    while True:
+        batch = list(stale.filter(pk__gt=last_pk).values_list('pk', 'tx_ref')[:batch_size])
+        if not batch:
+            break
+        for pk, tx_ref in batch:
+            try:
+                payment = apply_verification(tx_ref, failures=FAIL_UNPAID)
+            except VerificationUnavailable:
+                counts['deferred'] += 1
+                continue
+            counts['succeeded' if payment.status == 'success' else 'failed'] += 1
+        last_pk = batch[-1][0]
+        if len(batch) < batch_size:
+            break
+    return counts
+
+
+def reconcile_subscriptions(batch_size=SWEEP_BATCH_SIZE):
+    """Run both sweeps and return their counts and timings in milliseconds."""
+    now = timezone.now()
+
+    start = time.perf_counter()
+    expired = expire_subscriptions(now)
+    expire_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    payments = sweep_stale_payments(now, batch_size=batch_size)
+    sweep_ms = (time.perf_counter() - start) * 1000
+
+    report = {
+        'expired': expired,
+        'payments': payments,
+        'expire_ms': round(expire_ms, 2),
+        'sweep_ms': round(sweep_ms, 2),
+    }
+    logger.info(
+        f"Subscription reconciliation: expired={expired} "
+        f"payments_succeeded={payments['succeeded']} payments_failed={payments['failed']} "
+        f"payments_deferred={payments['deferred']} expire_ms={report['expire_ms']} "
+        f"sweep_ms={report['sweep_ms']}"
+    )
+    return report
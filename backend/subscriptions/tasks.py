@@ -0,0 +1,24 @@
+from celery import shared_task
+import logging
+
+from .payments import FAIL_NONE, VerificationUnavailable, apply_verification, release_queued
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5, default_retry_delay=30)
+def verify_chapa_payment(self, tx_ref):
+    try:
+        apply_verification(tx_ref, failures=FAIL_NONE)
+    except VerificationUnavailable as e:
+        logger.warning(f"Chapa verification of {tx_ref} deferred: {e}")
+        # Keep the queued marker so webhook redeliveries don't pile up retries
+        raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+    release_queued(tx_ref)
+
+
+@shared_task(ignore_result=True)
+def reconcile_subscriptions():
+    from .reconcile import reconcile_subscriptions as run
+
+    return run()
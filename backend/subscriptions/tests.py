@@ -0,0 +1,390 @@
+import json
+import threading
+from datetime import timedelta
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .chapa_service import chapa_service
+from .entitlements import Entitlement
+from .models import IdempotencyKey, Payment, SubscriptionPlan, UserSubscription
+from .reconcile import expire_subscriptions, sweep_stale_payments
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EntitlementTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.plan = SubscriptionPlan.objects.create(
+            name='Pro', slug='pro', price=100, duration_days=30
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _subscribe(self, tx_ref):
+        subscription = UserSubscription.objects.create(
+            user=self.user, plan=self.plan, tx_ref=tx_ref
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.activate()
+        return subscription
+
+    def test_activation_rebuilds_entitlement(self):
+        self.assertFalse(Entitlement.is_premium(self.user))
+
+        subscription = self._subscribe('tx-1')
+        with self.assertNumQueries(0):
+            self.assertTrue(Entitlement.is_premium(self.user))
+            response = self.client.get(reverse('subscriptions-my-subscription'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['has_subscription'])
+        self.assertEqual(response.data['subscriptions'][0]['id'], subscription.id)
+
+    def test_stacked_subscriptions_expire_from_the_cached_record(self):
+        first = self._subscribe('tx-1')
+        second = self._subscribe('tx-2')
+        self.assertEqual(second.start_date, first.end_date)
+        self.assertEqual(len(Entitlement.subscriptions(self.user)), 2)
+
+        later = first.end_date + timedelta(days=1)
+        with mock.patch('subscriptions.entitlements.timezone.now', return_value=later):
+            with self.assertNumQueries(0):
+                valid = Entitlement.subscriptions(self.user)
+        self.assertEqual([data['id'] for data in valid], [second.id])
+
+        after_all = second.end_date + timedelta(seconds=1)
+        with mock.patch('subscriptions.entitlements.timezone.now', return_value=after_all):
+            self.assertFalse(Entitlement.is_premium(self.user))
+
+    def test_subscription_changes_invalidate(self):
+        subscription = self._subscribe('tx-1')
+        self.assertTrue(Entitlement.is_premium(self.user))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.status = 'cancelled'
+            subscription.save()
+        self.assertFalse(Entitlement.is_premium(self.user))
+
+    def test_stale_build_cannot_overwrite_the_activation_rebuild(self):
+        subscription = UserSubscription.objects.create(
+            user=self.user, plan=self.plan, tx_ref='tx-1'
+        )
+        load = Entitlement._load
+        loads = []
+
+        def load_then_activate(user_id, now):
+            # The first reader loads the empty record, then the activation
+            # commits and rebuilds before that reader stores it
+            record = load(user_id, now)
+            if not loads:
+                loads.append(record)
+                with self.captureOnCommitCallbacks(execute=True):
+                    subscription.activate()
+            return record
+
+        with mock.patch.object(Entitlement, '_load', side_effect=load_then_activate):
+            self.assertEqual(Entitlement.build(self.user.id), [])
+
+        with self.assertNumQueries(0):
+            self.assertTrue(Entitlement.is_premium(self.user))
+
+    def test_activating_twice_is_a_no_op(self):
+        subscription = self._subscribe('tx-1')
+        end_date = subscription.end_date
+
+        again = UserSubscription.objects.get(pk=subscription.pk)
+        self.assertFalse(again.activate())
+        again.refresh_from_db()
+        self.assertEqual(again.end_date, end_date)
+
+    def test_second_subscription_stacks_after_the_first(self):
+        first = self._subscribe('tx-1')
+        second = self._subscribe('tx-2')
+        self.assertEqual(second.start_date, first.end_date)
+
+    def test_expired_active_subscription_is_not_premium(self):
+        UserSubscription.objects.create(
+            user=self.user, plan=self.plan, tx_ref='tx-old', status='active',
+            start_date=timezone.now() - timedelta(days=40),
+            end_date=timezone.now() - timedelta(days=10),
+        )
+        self.assertFalse(Entitlement.is_premium(self.user))
+
+        response = self.client.get(reverse('subscriptions-my-subscription'))
+        self.assertFalse(response.data['has_subscription'])
+
+
+class StubChapaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.client_address[1]))
+        tx_ref = self.path.rsplit('/', 1)[-1]
+        responses = server.verify_responses.get(tx_ref) or [(200, 'success')]
+        code, payment_status = responses.pop(0) if len(responses) > 1 else responses[0]
+        if code == 200:
+            body = {'status': 'success', 'data': {'status': payment_status, 'tx_ref': tx_ref}}
+        else:
+            body = {'status': 'failed', 'message': 'Gateway unavailable'}
+        payload = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubChapaServer(ThreadingHTTPServer):
+    """Local stand-in for the Chapa API; responses are set per tx_ref."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubChapaHandler)
+        self.requests = []
+        self.verify_responses = {}
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CHAPA_SECRET_KEY='test-key', CHAPA_WEBHOOK_SECRET=None)
+class StubChapaTestCase(APITestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubChapaServer()
+        threading.Thread(target=cls.stub.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.shutdown()
+        cls.stub.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.stub.requests.clear()
+        self.stub.verify_responses.clear()
+        # Each test gets a session built from its own settings
+        chapa_service._session = None
+        self.addCleanup(setattr, chapa_service, '_session', None)
+        settings_override = override_settings(CHAPA_BASE_URL=self.stub.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ChapaVerificationTests(StubChapaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='password123'
+        )
+        self.plan = SubscriptionPlan.objects.create(
+            name='Pro', slug='pro', price=100, duration_days=30
+        )
+        self.subscription = UserSubscription.objects.create(
+            user=self.user, plan=self.plan, tx_ref='SB-1'
+        )
+        Payment.objects.create(
+            user=self.user, subscription=self.subscription, amount=100, tx_ref='SB-1'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_verify_activates_subscription(self):
+        response = self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'active')
+        self.assertEqual(Payment.objects.get(tx_ref='SB-1').status, 'success')
+
+    def test_declined_payment_cancels_subscription(self):
+        self.stub.verify_responses['SB-1'] = [(200, 'failed')]
+
+        response = self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'cancelled')
+
+    def test_gateway_errors_are_retried_on_a_pooled_connection(self):
+        self.stub.verify_responses['SB-1'] = [(503, None), (200, 'success')]
+
+        response = self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.stub.requests), 2)
+        # Both attempts went over the same kept-alive connection
+        self.assertEqual(len({port for _, port in self.stub.requests}), 1)
+
+    @override_settings(CHAPA_MAX_RETRIES=0)
+    def test_unreachable_gateway_leaves_payment_pending(self):
+        self.stub.verify_responses['SB-1'] = [(503, None)]
+
+        response = self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(Payment.objects.get(tx_ref='SB-1').status, 'pending')
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'pending')
+
+    def test_duplicate_webhooks_verify_once(self):
+        self.client.force_authenticate(user=None)
+        for _ in range(3):
+            response = self.client.post(
+                reverse('chapa-webhook'), {'tx_ref': 'SB-1'}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(self.stub.requests), 1)
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'active')
+
+
+    def test_webhook_after_verify_is_one_lookup(self):
+        self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+        self.assertEqual(IdempotencyKey.objects.get().outcome, 'success')
+        self.stub.requests.clear()
+        self.client.force_authenticate(user=None)
+
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse('chapa-webhook'), {'tx_ref': 'SB-1'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.stub.requests), 0)
+
+    def test_settled_payment_is_not_verified_again(self):
+        self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+
+        self.stub.verify_responses['SB-1'] = [(200, 'failed')]
+        self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(Payment.objects.get(tx_ref='SB-1').status, 'success')
+
+    def test_unsuccessful_answer_leaves_tx_ref_open(self):
+        self.stub.verify_responses['SB-1'] = [(200, 'failed')]
+        self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        # The customer pays after all; the next webhook still activates
+        self.stub.verify_responses['SB-1'] = [(200, 'success')]
+        self.client.force_authenticate(user=None)
+        self.client.post(reverse('chapa-webhook'), {'tx_ref': 'SB-1'}, format='json')
+
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(Payment.objects.get(tx_ref='SB-1').status, 'success')
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'active')
+
+
+    def test_pending_answer_keeps_checkout_open(self):
+        self.stub.verify_responses['SB-1'] = [(200, 'pending')]
+
+        response = self.client.post(reverse('subscriptions-verify'), {'tx_ref': 'SB-1'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Payment.objects.get(tx_ref='SB-1').status, 'pending')
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'pending')
+
+    def test_webhook_never_fails_a_checkout(self):
+        self.client.force_authenticate(user=None)
+        for payment_status in ('pending', 'failed'):
+            self.stub.verify_responses['SB-1'] = [(200, payment_status)]
+            self.client.post(reverse('chapa-webhook'), {'tx_ref': 'SB-1'}, format='json')
+        # A tx_ref Chapa doesn't know about, as a spoofed callback would name
+        self.stub.verify_responses['SB-1'] = [(404, None)]
+        self.client.post(reverse('chapa-webhook'), {'tx_ref': 'SB-1'}, format='json')
+
+        self.assertEqual(len(self.stub.requests), 3)
+        self.assertEqual(Payment.objects.get(tx_ref='SB-1').status, 'pending')
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'pending')
+
+
+class SubscriptionReconcileTests(StubChapaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = User.objects.bulk_create([
+            User(email=f'user{i}@test.com', username=f'user{i}', password='!')
+            for i in range(3)
+        ])
+        self.plan = SubscriptionPlan.objects.create(
+            name='Pro', slug='pro', price=100, duration_days=30
+        )
+        self.now = timezone.now()
+
+    def _checkout(self, user, tx_ref, age):
+        subscription = UserSubscription.objects.create(user=user, plan=self.plan, tx_ref=tx_ref)
+        payment = Payment.objects.create(
+            user=user, subscription=subscription, amount=100, tx_ref=tx_ref
+        )
+        Payment.objects.filter(pk=payment.pk).update(created_at=self.now - age)
+        return subscription
+
+    def test_lapsed_subscriptions_expire_in_one_update(self):
+        for i, user in enumerate(self.users):
+            UserSubscription.objects.create(
+                user=user, plan=self.plan, tx_ref=f'tx-{i}', status='active',
+                start_date=self.now - timedelta(days=31),
+                end_date=self.now + timedelta(days=-1 if i < 2 else 5),
+            )
+        self.assertTrue(Entitlement.is_premium(self.users[2]))
+
+        with self.assertNumQueries(4):  # savepoint, user ids, update, release
+            self.assertEqual(expire_subscriptions(self.now), 2)
+
+        self.assertEqual(
+            list(UserSubscription.objects.order_by('tx_ref').values_list('status', flat=True)),
+            ['expired', 'expired', 'active']
+        )
+        self.assertTrue(Entitlement.is_premium(self.users[2]))
+
+    def test_stale_checkouts_are_settled(self):
+        paid = self._checkout(self.users[0], 'SB-PAID', timedelta(days=2))
+        abandoned = self._checkout(self.users[1], 'SB-GONE', timedelta(days=2))
+        fresh = self._checkout(self.users[2], 'SB-FRESH', timedelta(minutes=5))
+        self.stub.verify_responses['SB-GONE'] = [(400, None)]
+
+        counts = sweep_stale_payments(self.now, batch_size=1)
+
+        self.assertEqual(counts, {'succeeded': 1, 'failed': 1, 'deferred': 0})
+        self.assertEqual([path.rsplit('/', 1)[-1] for path, _ in self.stub.requests], ['SB-PAID', 'SB-GONE'])
+        for subscription, expected in ((paid, 'active'), (abandoned, 'cancelled'), (fresh, 'pending')):
+            subscription.refresh_from_db()
+            self.assertEqual(subscription.status, expected)
+
+    @override_settings(CHAPA_MAX_RETRIES=0)
+    def test_unreachable_gateway_defers_and_command_reports(self):
+        self._checkout(self.users[0], 'SB-WAIT', timedelta(days=2))
+        self.stub.verify_responses['SB-WAIT'] = [(503, None)]
+
+        out = StringIO()
+        call_command('reconcile_subscriptions', stdout=out)
+
+        self.assertIn('0 succeeded, 0 failed, 1 deferred', out.getvalue())
+        self.assertEqual(Payment.objects.get(tx_ref='SB-WAIT').status, 'pending')
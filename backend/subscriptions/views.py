@@ -9,6 +9,7 @@ from django.http import HttpResponse
 import json
 import hmac
 import hashlib
+import logging
 from django.conf import settings
 
 from .models import SubscriptionPlan, UserSubscription, Payment
@@ -20,7 +21,10 @@ from .serializers import (
     VerifyPaymentSerializer
 )
 from .chapa_service import chapa_service
+from .entitlements import Entitlement
+from .payments import VerificationUnavailable, apply_verification, queue_verification
 
+logger = logging.getLogger(__name__)
 
 class SubscriptionPlanViewSet(viewsets.ReadOnlyModelViewSet):
     # Listing subscription plan
@@ -36,20 +40,13 @@ class SubscriptionViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def my_subscription(self, request):
-        # Get all of current user's valid subscriptions
-        subscriptions = UserSubscription.objects.filter(
-            user=request.user,
-            status='active'
-        )
-        
-        # Filter for only valid ones (not expired)
-        valid_subs = [s for s in subscriptions if s.is_valid()]
+        # Current user's valid subscriptions, from the cached entitlement
+        valid_subs = Entitlement.subscriptions(request.user)
         
         if valid_subs:
-            serializer = UserSubscriptionSerializer(valid_subs, many=True)
             return Response({
                 'has_subscription': True,
-                'subscriptions': serializer.data
+                'subscriptions': valid_subs
             })
         
         return Response({
@@ -61,7 +58,7 @@ class SubscriptionViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def history(self, request):
         # Get user's subscription history
-        subscriptions = UserSubscription.objects.filter(user=request.user)
+        subscriptions = UserSubscription.objects.filter(user=request.user).select_related('plan')
         serializer = UserSubscriptionSerializer(subscriptions, many=True)
         return Response(serializer.data)
     
@@ -179,39 +176,38 @@ class SubscriptionViewSet(viewsets.ViewSet):
                 'subscription': UserSubscriptionSerializer(subscription).data
             })
         
-        # Verify with Chapa
-        result = chapa_service.verify_payment(tx_ref)
-        
-        # Update payment record
-        payment = Payment.objects.filter(tx_ref=tx_ref).first()
-        if payment:
-            payment.chapa_response = result.get('data', {})
-            
-            if result['success'] and result['verified']:
-                payment.status = 'success'
-                payment.save()
-                
-                # Activate subscription
-                subscription.activate()
-                
-                return Response({
-                    'message': 'Payment verified and subscription activated',
-                    'subscription': UserSubscriptionSerializer(subscription).data
-                })
-            else:
-                payment.status = 'failed'
-                payment.save()
-                subscription.status = 'cancelled'
-                subscription.save()
-                
-                return Response({
-                    'error': 'Payment verification failed',
-                    'message': result.get('message', 'Unknown error')
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
+        # Verify with Chapa; a webhook may already have settled it
+        try:
+            payment = apply_verification(tx_ref)
+        except VerificationUnavailable as e:
+            return Response({
+                'error': 'Payment provider unavailable, try again shortly',
+                'message': str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if payment is None:
+            return Response({
+                'error': 'Payment record not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        subscription.refresh_from_db()
+        if payment.status == 'success':
+            return Response({
+                'message': 'Payment verified and subscription activated',
+                'subscription': UserSubscriptionSerializer(subscription).data
+            })
+
+        if payment.status == 'pending':
+            # Not paid yet; the checkout stays open for the webhook or a retry
+            return Response({
+                'error': 'Payment not completed yet',
+                'status': payment.status
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         return Response({
-            'error': 'Payment record not found'
-        }, status=status.HTTP_404_NOT_FOUND)
+            'error': 'Payment verification failed',
+            'message': (payment.chapa_response or {}).get('message', 'Unknown error')
+        }, status=status.HTTP_400_BAD_REQUEST)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -253,27 +249,15 @@ class ChapaWebhookView(APIView):
             return self._process_payment(tx_ref)
 
         except Exception as e:
-            print("Webhook error:", e)
+            logger.error(f"Webhook error: {e}")
             return HttpResponse(status=500)
 
     def _process_payment(self, tx_ref):
-        """Common payment processing logic"""
+        """Acknowledge at once; verification runs in the verify_chapa_payment task"""
         try:
-            result = chapa_service.verify_payment(tx_ref)
-
-            if result['success'] and result['verified']:
-                payment = Payment.objects.filter(tx_ref=tx_ref).first()
-
-                if payment and payment.status != 'success':
-                    payment.status = 'success'
-                    payment.chapa_response = result.get('data', {})
-                    payment.save()
-
-                    if payment.subscription:
-                        payment.subscription.activate()
-
+            queue_verification(tx_ref)
             return HttpResponse(status=200)
 
         except Exception as e:
-            print("Payment processing error:", e)
+            logger.error(f"Payment processing error: {e}")
             return HttpResponse(status=500)
@@ -1,4 +1,4 @@
-import axios from "axios";
+import axios, { type AxiosRequestConfig } from "axios";
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || "http://127.0.0.1:8000";
 
@@ -126,4 +126,27 @@ export const getAuthHeader = () => {
 /** Get auth token */
 export const getToken = () => localStorage.getItem("token");
 
+/** A cursor page from a paginated list endpoint */
+export interface Page<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+/** Items of a list response, paginated or not */
+export const pageItems = <T>(data: T[] | Page<T>): T[] =>
+  Array.isArray(data) ? data : data.results ?? [];
+
+/** GET every item of a paginated list endpoint by following `next` */
+export const fetchAllPages = async <T>(url: string, config?: AxiosRequestConfig): Promise<T[]> => {
+  let { data } = await api.get<T[] | Page<T>>(url, config);
+  const items = pageItems(data);
+  // `next` is absolute and already carries the query string
+  while (!Array.isArray(data) && data.next) {
+    ({ data } = await api.get<Page<T>>(data.next));
+    items.push(...pageItems(data));
+  }
+  return items;
+};
+
 export default api;
@@ -1,11 +1,10 @@
-import api from './apiClient';
+import api, { fetchAllPages, pageItems, type Page } from './apiClient';
 import type { Conversation, Message, SendMessageRequest } from '../types/chat';
 
 // Fetch all conversations
 export const fetchConversations = async (query?: string): Promise<Conversation[]> => {
     const params = query ? { search: query } : {};
-    const response = await api.get('/conversations/', { params });
-    return response.data;
+    return fetchAllPages<Conversation>('/conversations/', { params });
 };
 
 // Fetch specific conversation
@@ -14,10 +13,20 @@ export const fetchConversation = async (id: number): Promise<Conversation> => {
     return response.data;
 };
 
-// Fetch messages for a conversation
-export const fetchMessages = async (conversationId: number): Promise<Message[]> => {
-    const response = await api.get(`/messages/?conversation_id=${conversationId}`);
-    return response.data;
+// Fetch the latest page of a conversation's messages, or the page before
+// `olderUrl` (a previous call's `next`), oldest first
+export const fetchMessages = async (
+    conversationId: number,
+    olderUrl?: string | null
+): Promise<{ messages: Message[]; next: string | null }> => {
+    const { data } = olderUrl
+        ? await api.get<Message[] | Page<Message>>(olderUrl)
+        : await api.get<Message[] | Page<Message>>('/messages/', { params: { conversation_id: conversationId } });
+    // Pages come newest first
+    return {
+        messages: [...pageItems(data)].reverse(),
+        next: Array.isArray(data) ? null : data.next,
+    };
 };
 
 // Send text message
@@ -1,4 +1,4 @@
-import api from './apiClient';
+import api, { fetchAllPages } from './apiClient';
 import type {
     StudyGroup,
     StudyGroupDetail,
@@ -21,8 +21,7 @@ export type { StudyGroup, StudyGroupDetail, GroupMember, GroupAnalytics };
  * Fetch all groups (public + user's private groups)
  */
 export const fetchGroups = async (): Promise<StudyGroup[]> => {
-    const response = await api.get('/groups/');
-    return response.data;
+    return fetchAllPages<StudyGroup>('/groups/');
 };
 
 /**
@@ -1,4 +1,4 @@
-import api from './apiClient';
+import api, { fetchAllPages } from './apiClient';
 
 // ============================================
 // TYPES
@@ -84,8 +84,7 @@ export const fetchCalendarEvents = async (start?: string, end?: string): Promise
 };
 
 export const fetchSessions = async (): Promise<StudySession[]> => {
-    const response = await api.get('/sessions/');
-    return response.data;
+    return fetchAllPages<StudySession>('/sessions/');
 };
 
 export const fetchUpcomingSessions = async (): Promise<StudySession[]> => {
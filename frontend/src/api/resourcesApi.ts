@@ -1,4 +1,4 @@
-import api from './apiClient';
+import api, { fetchAllPages } from './apiClient';
 
 export interface StudyFile {
     id: number;
@@ -28,13 +28,11 @@ export interface StudyFileList {
 }
 
 export const fetchFiles = async (): Promise<StudyFileList[]> => {
-    const response = await api.get('/files/');
-    return response.data;
+    return fetchAllPages<StudyFileList>('/files/');
 };
 
 export const fetchMyFiles = async (): Promise<StudyFileList[]> => {
-    const response = await api.get('/files/', { params: { mine: true } });
-    return response.data;
+    return fetchAllPages<StudyFileList>('/files/', { params: { mine: true } });
 };
 
 export const fetchGroupFiles = async (groupId: number): Promise<StudyFileList[]> => {
@@ -1,4 +1,4 @@
-import api from './apiClient';
+import api, { fetchAllPages } from './apiClient';
 
 export interface Task {
     id: number;
@@ -10,8 +10,7 @@ export interface Task {
 }
 
 export const fetchTasks = async (): Promise<Task[]> => {
-    const response = await api.get('/tasks/');
-    return response.data;
+    return fetchAllPages<Task>('/tasks/');
 };
 
 export const createTask = async (data: Partial<Task>): Promise<Task> => {
@@ -13,7 +13,7 @@ interface ChatContainerProps {
 }
 
 function ChatContainer({ onBackClick }: ChatContainerProps) {
-  const { selectedUser, messages, getMessageByConvId, isMessagesLoading, handleWebSocketMessage, setReplyTo, typingUsers, setUserTyping, clearUserTyping, markMessagesAsRead } =
+  const { selectedUser, messages, getMessageByConvId, isMessagesLoading, olderMessagesUrl, isOlderMessagesLoading, loadOlderMessages, handleWebSocketMessage, setReplyTo, typingUsers, setUserTyping, clearUserTyping, markMessagesAsRead } =
     useChatStore();
   const { user } = useAuth();
   const messagesEndRef = useRef<HTMLDivElement>(null);
@@ -53,10 +53,11 @@ function ChatContainer({ onBackClick }: ChatContainerProps) {
     }
   }, [selectedUser, getMessageByConvId]);
 
-  // Auto-scroll to bottom when new messages arrive
+  // Auto-scroll to bottom when new messages arrive, not when older ones load
+  const lastMessageId = messages[messages.length - 1]?.id;
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [messages]);
+  }, [lastMessageId]);
 
   const isGroup = !!selectedUser?.group_name;
 
@@ -99,6 +100,17 @@ function ChatContainer({ onBackClick }: ChatContainerProps) {
           </div>
         ) : (
           <div className="max-w-3xl mx-auto space-y-1">
+            {olderMessagesUrl && (
+              <div className="flex justify-center pb-2">
+                <button
+                  onClick={loadOlderMessages}
+                  disabled={isOlderMessagesLoading}
+                  className="px-3 py-1 rounded-lg text-[12px] font-medium text-slate-400 hover:text-slate-200 hover:bg-white/[0.06] transition-all disabled:opacity-50"
+                >
+                  {isOlderMessagesLoading ? 'Loading…' : 'Load older messages'}
+                </button>
+              </div>
+            )}
             {messages.map((msg, index) => {
               const isOwn = msg.sender?.id === user?.id;
               const prevMsg = index > 0 ? messages[index - 1] : null;
@@ -1,7 +1,7 @@
 // Re-export the unified API client for backward compatibility.
 // All modules should eventually import directly from '../api/apiClient'.
 import api from "../api/apiClient";
-import { API_BASE, WS_BASE } from "../api/apiClient";
+import { API_BASE, WS_BASE, fetchAllPages } from "../api/apiClient";
 import type { Conversation, Message } from "../types/chat";
 
 export { API_BASE, WS_BASE };
@@ -75,8 +75,7 @@ export const authAPI = {
 export const chatAPI = {
   getConversations: async (search?: string): Promise<Conversation[]> => {
     const params = search ? `?search=${encodeURIComponent(search)}` : "";
-    const res = await api.get(`/conversations/${params}`);
-    return res.data;
+    return fetchAllPages<Conversation>(`/conversations/${params}`);
   },
 
   startIndividualConversation: async (
@@ -1,7 +1,7 @@
 import { create } from "zustand";
 import toast from "react-hot-toast";
 import api from "../services/api";
-import { WS_BASE } from "../api/apiClient";
+import { WS_BASE, pageItems, type Page } from "../api/apiClient";
 
 export interface User {
   id: number;
@@ -54,6 +54,8 @@ interface ChatStoreState {
   allContacts: Contact[];
   chats: Contact[];
   messages: Message[];
+  // Cursor URL of the page before the oldest loaded message
+  olderMessagesUrl: string | null;
   activeTab: string;
 
   onlineUsers: Set<number>;
@@ -66,6 +68,7 @@ interface ChatStoreState {
   
   isUsersLoading: boolean;
   isMessagesLoading: boolean;
+  isOlderMessagesLoading: boolean;
   isSoundEnabled: boolean;
   
   setUserOnline: (userId: number) => void;
@@ -84,6 +87,7 @@ interface ChatStoreState {
   getAllGroupContacts: () => Promise<void>;
   getAllIndividualContacts: () => Promise<void>;
   getMessageByConvId: (convId?: number) => Promise<void>;
+  loadOlderMessages: () => Promise<void>;
   connectPresenceSocket: (token: string) => void;
   sendMessage: (data: SendMessageInput) => Promise<void>;
   handleWebSocketMessage: (message: Message) => void;
@@ -93,10 +97,12 @@ export const useChatStore = create<ChatStoreState>((set, get) => ({
   allContacts: [],
   chats: [],
   messages: [],
+  olderMessagesUrl: null,
   activeTab: "chats",
   selectedUser: null,
   isUsersLoading: false,
   isMessagesLoading: false,
+  isOlderMessagesLoading: false,
 
   onlineUsers: new Set(),
   typingUsers: new Set(),
@@ -247,20 +253,50 @@ export const useChatStore = create<ChatStoreState>((set, get) => ({
     const id = convId ?? selected?.id;
     if (!id) return;
 
-    set({ isMessagesLoading: true });
+    set({ isMessagesLoading: true, olderMessagesUrl: null });
 
     try {
-      const res = await api.get("/messages/", {
+      const res = await api.get<Message[] | Page<Message>>("/messages/", {
         params: { conversation_id: id },
       });
 
-      set({ messages: res.data || [] });
+      // Pages come newest first
+      set({
+        messages: [...pageItems(res.data)].reverse(),
+        olderMessagesUrl: Array.isArray(res.data) ? null : res.data.next,
+      });
     } catch (err) {
       toast.error("Failed to load messages");
     } finally {
       set({ isMessagesLoading: false });
     }
   },
+
+  // Prepend the page of messages before the oldest one loaded
+  loadOlderMessages: async () => {
+    const { olderMessagesUrl, isOlderMessagesLoading, selectedUser } = get();
+    if (!olderMessagesUrl || isOlderMessagesLoading) return;
+
+    set({ isOlderMessagesLoading: true });
+    try {
+      const res = await api.get<Page<Message>>(olderMessagesUrl);
+      // Drop the page if the user switched conversations meanwhile
+      if (get().selectedUser?.id !== selectedUser?.id) return;
+
+      set(state => {
+        const loaded = new Set(state.messages.map(m => m.id));
+        const older = [...pageItems(res.data)].reverse().filter(m => !loaded.has(m.id));
+        return {
+          messages: [...older, ...state.messages],
+          olderMessagesUrl: res.data.next,
+        };
+      });
+    } catch (err) {
+      toast.error("Failed to load older messages");
+    } finally {
+      set({ isOlderMessagesLoading: false });
+    }
+  },
   sendTyping: () => {
     const socket = get().socket;
     if (!socket || socket.readyState !== WebSocket.OPEN) return;